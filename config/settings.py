@@ -4,8 +4,9 @@
 すべての設定値を一元管理します。
 環境変数や外部ファイルから設定を読み込むことも可能です。
 """
+import os
 from dataclasses import dataclass
-from typing import Final
+from typing import Final, Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -23,6 +24,23 @@ class ServoConfig:
     MAX_ANGLE: int = 90
     MIN_PULSE_WIDTH: float = 0.5 / 1000  # 0.5ms
     MAX_PULSE_WIDTH: float = 2.4 / 1000  # 2.4ms
+    
+    # 出力方式: "auto", "hardware_pwm", "lgpio", "gpiozero"
+    # "auto" はハードウェアPWM → lgpio → gpiozero の順に使えるものを選ぶ
+    # ハードウェアPWMには /boot/firmware/config.txt に dtoverlay=pwm,pin=12,func=4 が必要
+    BACKEND: str = "auto"
+    
+    # ハードウェアPWMの pwmchip 番号（Raspberry Pi 5 では 2 の場合がある）
+    PWM_CHIP: int = 0
+    
+    # 軌道を標本化する周波数（Hz）。サーボのPWM周期20msに合わせる
+    MOTION_RATE_HZ: float = 50.0
+    
+    # ゆっくりした動作で、角度を出力してから電力供給を止めるまでの時間（秒）
+    STEP_HOLD_S: float = 0.1
+    
+    # 水分補給後に初期位置へ戻す動作の時間（秒）
+    GRADUAL_MOVE_S: float = 2.0
 
 
 @dataclass(frozen=True)
@@ -32,8 +50,88 @@ class SensorConfig:
     # 121000/183 = 661 (1gあたりの値)
     REFERENCE_UNIT: int = 717
     
+    # チャンネルB（ゲイン32）のロードセルの参照単位。NoneでチャンネルBを使用しない
+    # ゲインがAの1/4なので、同じロードセルならREFERENCE_UNITの約1/4
+    REFERENCE_UNIT_B: Optional[int] = None
+    
+    # A/B交互読み取りで、チャンネルを切り替えるまでに読むフレーム数
+    CHANNEL_BURST: int = 1
+    
+    # チャンネル切り替え直後に読み捨てるフレーム数（整定待ち）
+    CHANNEL_SWITCH_DISCARD: int = 0
+    
     # 測定の安定性を高めるための読み取り回数
     READ_TIMES: int = 5
+    
+    # DOUTの立ち下がりエッジで変換完了を待つ（Falseでビジーウェイト）
+    USE_INTERRUPT: bool = True
+    
+    # 1回の変換を待つ最大時間（秒）。10SPSで1変換100ms
+    READ_TIMEOUT_S: float = 0.5
+    
+    # バックグラウンドで連続サンプリングし、get_weightはバッファから計算する
+    # main.py のイベント駆動の監視エンジンはこのサンプルで動くため、Trueが必要
+    CONTINUOUS_SAMPLING: bool = True
+    
+    # 連続サンプリングのリングバッファ容量（サンプル数）
+    SAMPLE_BUFFER_SIZE: int = 256
+    
+    # 生値に順に適用するストリーミングフィルタ
+    # "median", "trimmed_mean", "ema", "kalman" を組み合わせて指定（空でフィルタなし）
+    FILTERS: Tuple[str, ...] = ("median", "ema")
+    
+    # 移動中央値のウィンドウ（サンプル数）
+    MEDIAN_WINDOW: int = 5
+    
+    # トリム平均のウィンドウ（サンプル数）と上下の除外割合
+    TRIM_WINDOW: int = 10
+    TRIM_RATIO: float = 0.2
+    
+    # 指数移動平均の係数（大きいほど追従が速い）
+    EMA_ALPHA: float = 0.5
+    
+    # カルマンフィルタのプロセス分散・観測分散（生値の2乗単位）
+    KALMAN_PROCESS_VARIANCE: float = 1.0e4
+    KALMAN_MEASUREMENT_VARIANCE: float = 2.5e5
+
+
+@dataclass(frozen=True)
+class CalibrationConfig:
+    """キャリブレーション保存設定"""
+    # オフセット・参照単位などを保存するファイル
+    # ファイルがあれば REFERENCE_UNIT よりこちらの値を優先します
+    FILE_PATH: str = "./calibration.json"
+    
+    # 保存済みオフセットからのずれがこれを超えたら起動時に風袋引きする（グラム）
+    DRIFT_THRESHOLD_G: float = 5.0
+    
+    # 起動時のドリフト確認に使うサンプル数
+    DRIFT_CHECK_SAMPLES: int = 3
+    
+    # 起動時のずれがこれ以上なら物が載っているとみなし、風袋引きしない（グラム）
+    LOAD_PRESENT_G: float = 100.0
+    
+    # コップ待ち（IDLE）の間、空の状態の重量からゼロ点を自動で補正する
+    AUTO_ZERO: bool = True
+    
+    # 補正前に重量が安定している必要がある時間（秒）
+    AUTO_ZERO_WINDOW_S: float = 30.0
+    
+    # 平均がこの範囲内のときだけ補正する（グラム）
+    AUTO_ZERO_BAND_G: float = 10.0
+    
+    # 安定とみなす重量の標準偏差の上限（グラム）
+    AUTO_ZERO_TOLERANCE_G: float = 1.0
+    
+    # 1回の補正量の上限（グラム）
+    AUTO_ZERO_MAX_STEP_G: float = 0.5
+    
+    # 補正の最小間隔（秒）
+    AUTO_ZERO_INTERVAL_S: float = 60.0
+    
+    # 補正後、まとめてファイルに保存するまでの時間（秒）
+    # 電源断でこの間の補正は失われますが、起動時のドリフト確認で補われます
+    AUTO_ZERO_SAVE_DELAY_S: float = 300.0
 
 
 @dataclass(frozen=True)
@@ -52,6 +150,25 @@ class MonitoringConfig:
     # 警告としてサーボを動かす時間（秒）
     # 本番: 5分 = 300秒, テスト: 20秒
     ALERT_DURATION_S: int = 20
+    
+    # 水分補給とみなすのに必要な、しきい値を超えた連続サンプル数（ノイズ対策）
+    DRINK_CONFIRM_SAMPLES: int = 3
+    
+    # コップ検知のヒステリシス幅（グラム）
+    # WEIGHT_THRESHOLD_G以上で検知し、そこからこの値を引いた重量未満で未検知に戻る
+    PRESENCE_HYSTERESIS_G: float = 20.0
+    
+    # コップ設置後の整定判定に使う時間窓（秒）
+    SETTLE_WINDOW_S: float = 1.0
+    
+    # 整定とみなす重量の標準偏差の上限（グラム）
+    SETTLE_TOLERANCE_G: float = 2.0
+    
+    # 整定とみなす重量の傾きの上限（グラム/秒）
+    SETTLE_MAX_SLOPE_G_S: float = 2.0
+    
+    # この時間内に整定しなければ、その時点の平均重量を採用する（秒）
+    SETTLE_TIMEOUT_S: float = 10.0
 
 
 @dataclass(frozen=True)
@@ -60,6 +177,52 @@ class LoggingConfig:
     LOG_DIR: str = "./waiting_log"
     LOG_FILENAME: str = "weight_log.csv"
     PROCESSED_LOG_DIR: str = "./processed_logs"
+    
+    # 記録中のログファイルがこのサイズ（バイト）に達したら、番号付きのセグメントとして封印する（0で無効）
+    SEGMENT_MAX_BYTES: int = 1024 * 1024
+    
+    # 記録中のログファイルに最初の行を書いてからこの時間で封印する（秒、0で無効）
+    # 同期処理は封印済みのセグメントだけを送信するため、送信までの最大の遅れになる
+    SEGMENT_MAX_AGE_S: float = 3600.0
+    
+    # ログの形式（"csv", "binary", "sqlite"。ファイルの拡張子はそれぞれ .csv, .bin, .db になる）
+    LOG_FORMAT: str = "csv"
+    
+    # バッファがこの行数に達したらファイルに書き出す
+    FLUSH_ROWS: int = 64
+    
+    # 最初の行をバッファしてからこの時間で書き出す（秒）
+    FLUSH_INTERVAL_S: float = 5.0
+    
+    # fsync の方針（"always": 書き出しのたび, "interval": FSYNC_INTERVAL_S ごと, "never": 終了時のみ）
+    FSYNC_POLICY: str = "interval"
+    
+    # "interval" の場合の fsync の最短間隔（秒）
+    FSYNC_INTERVAL_S: float = 60.0
+    
+    # 書き込みキューの容量（記録数）
+    QUEUE_CAPACITY: int = 256
+    
+    # キューが満杯のときの動作（"block": 待つ, "drop_oldest": 古い記録を捨てる, "spill": メモリにあふれさせる）
+    QUEUE_OVERFLOW: str = "spill"
+    
+    # "spill" の場合にメモリ上に保持する記録数の上限
+    QUEUE_SPILL_LIMIT: int = 10000
+    
+    # HX711の生値をすべて記録する（誤警告の調査・フィルタの調整用。CONTINUOUS_SAMPLING が必要）
+    RAW_RECORDING: bool = False
+    
+    # 生値の記録ファイルの保存先（日付ごとに raw_YYYYMMDD.hxr）
+    RAW_LOG_DIR: str = "./raw_log"
+    
+    # 1チャンクの最大サンプル数
+    RAW_CHUNK_SAMPLES: int = 600
+    
+    # 1チャンクの最大時間（秒）。電源断で失う記録の上限
+    RAW_CHUNK_SECONDS: float = 60.0
+    
+    # 状態遷移の記録を終了時に追記するファイル（LOG_DIR 内）
+    TRANSITION_LOG_FILENAME: str = "transitions.csv"
 
 
 class Settings:
@@ -72,13 +235,26 @@ class Settings:
         self.gpio = GPIOPins()
         self.servo = ServoConfig()
         self.sensor = SensorConfig()
+        self.calibration = CalibrationConfig()
         self.monitoring = MonitoringConfig()
         self.logging = LoggingConfig()
     
     @property
     def log_file_path(self) -> str:
         """ログファイルの完全パス"""
-        return f"{self.logging.LOG_DIR}/{self.logging.LOG_FILENAME}"
+        filename = self.logging.LOG_FILENAME
+        if self.logging.LOG_FORMAT == "binary":
+            filename = os.path.splitext(filename)[0] + ".bin"
+        elif self.logging.LOG_FORMAT == "sqlite":
+            filename = os.path.splitext(filename)[0] + ".db"
+        return f"{self.logging.LOG_DIR}/{filename}"
+    
+    @property
+    def segmented_log(self) -> bool:
+        """ロガーがセグメントを封印する場合True（SQLiteでは使用しない）"""
+        return self.logging.LOG_FORMAT != "sqlite" and (
+            self.logging.SEGMENT_MAX_BYTES > 0 or self.logging.SEGMENT_MAX_AGE_S > 0
+        )
 
 
 # グローバル設定インスタンス（シングルトン）
@@ -0,0 +1,216 @@
+"""asyncio用の重量センサーモジュール
+
+WeightSensorの連続サンプリングスレッドが取得したサンプルを
+イベントループに渡し、awaitで重量を待てるようにします。
+待機側ごとにスレッドを使うことはありません。
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, List, Optional, Set, Tuple
+
+from controllers.weight_sensor import WeightSensor
+
+# (タイムスタンプ, 重量[g])
+Sample = Tuple[float, float]
+
+
+class AsyncWeightSensor:
+    """
+    WeightSensorをasyncioから使うためのクラス
+
+    サンプリングスレッドからのサンプルはまとめてイベントループに渡すため、
+    サンプルごとにループを起こすことはありません。
+    イベントループ上で生成し、使い終わったら close() を呼んでください。
+
+    使い方:
+        sensor = AsyncWeightSensor(weight_sensor)
+        weight = await sensor.get_weight()
+        async for timestamp, weight in sensor:
+            ...
+        weight = await sensor.wait_until(lambda w: w < 50, timeout=10)
+    """
+
+    def __init__(self, sensor: WeightSensor, queue_size: int = 64):
+        """
+        センサーをイベントループに接続します。
+
+        Args:
+            sensor: 連続サンプリングが有効なWeightSensor
+            queue_size: 非同期イテレータごとに保持するサンプル数。
+                読み取りが追いつかない場合は古いサンプルから捨てます。
+                イベントループに渡す前のサンプルの保持数も同じです
+                （ループが止まっている間にあふれた分は pending_dropped_count に数えます）
+
+        Raises:
+            RuntimeError: イベントループ外で呼ばれた場合、
+                または連続サンプリングが有効でない場合
+        """
+        self.sensor = sensor
+        self.queue_size = queue_size
+        self._loop = asyncio.get_running_loop()
+        self._latest: Optional[Sample] = None
+
+        # サンプリングスレッドからイベントループへの受け渡し
+        self._pending: Deque[Sample] = deque(maxlen=queue_size)
+        self._pending_lock = threading.Lock()
+        self._drain_scheduled = False
+
+        # イベントループ上でのみ操作する
+        self._waiters: List[Tuple[Callable[[float], bool], asyncio.Future]] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.dropped_count = 0
+        self.pending_dropped_count = 0
+        self._closed = False
+
+        sensor.add_weight_listener(self._on_weight)
+
+    @property
+    def latest(self) -> Optional[Sample]:
+        """最新のサンプル（まだない場合None）"""
+        return self._latest
+
+    def _on_weight(self, timestamp: float, weight: float) -> None:
+        """サンプリングスレッドから呼ばれ、サンプルをイベントループに渡します"""
+        with self._pending_lock:
+            dropped = len(self._pending) == self._pending.maxlen
+            if dropped:
+                # イベントループが受け取る前に最も古いサンプルが捨てられる
+                self.pending_dropped_count += 1
+                count = self.pending_dropped_count
+            self._pending.append((timestamp, weight))
+            scheduled = self._drain_scheduled
+            self._drain_scheduled = True
+        if dropped and (count == 1 or count % 100 == 0):
+            print(f"\n[警告] イベントループが追いつかないためサンプルを破棄しました（累計 {count} 件）")
+        if scheduled:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # イベントループが終了している
+            pass
+
+    def _drain(self) -> None:
+        """イベントループ上で、溜まったサンプルを待機側に配ります"""
+        with self._pending_lock:
+            samples = list(self._pending)
+            self._pending.clear()
+            self._drain_scheduled = False
+        for sample in samples:
+            self._latest = sample
+            for queue in self._subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped_count += 1
+                queue.put_nowait(sample)
+            if self._waiters:
+                self._resolve_waiters(sample[1])
+
+    def _resolve_waiters(self, weight: float) -> None:
+        remaining = []
+        for predicate, future in self._waiters:
+            if future.done():
+                continue
+            try:
+                matched = predicate(weight)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if matched:
+                future.set_result(weight)
+            else:
+                remaining.append((predicate, future))
+        self._waiters = remaining
+
+    def _is_fresh(self) -> bool:
+        if self._latest is None:
+            return False
+        return time.monotonic() - self._latest[0] <= 2 * self.sensor.read_timeout_s
+
+    async def get_weight(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        最新の重量を返します。
+
+        最新のサンプルが古い場合は、次のサンプルを待ちます。
+
+        Args:
+            timeout: 次のサンプルを待つ最大時間（秒）。省略時は read_timeout_s の2倍
+
+        Returns:
+            Optional[float]: 重量（グラム）。期限内にサンプルが届かない場合None
+        """
+        if self._is_fresh():
+            return self._latest[1]
+        if timeout is None:
+            timeout = 2 * self.sensor.read_timeout_s
+        return await self.wait_until(lambda weight: True, timeout)
+
+    async def wait_until(
+        self,
+        predicate: Callable[[float], bool],
+        timeout: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        重量が条件を満たすまで待ちます。
+
+        最新のサンプルが既に条件を満たしている場合はすぐに返ります。
+
+        Args:
+            predicate: 重量（グラム）を受け取り、条件を満たす場合Trueを返す関数
+            timeout: 最大待ち時間（秒）。Noneの場合は無期限
+
+        Returns:
+            Optional[float]: 条件を満たした重量（グラム）。タイムアウト時はNone
+        """
+        if self._closed:
+            raise RuntimeError("AsyncWeightSensorは終了しています")
+        if self._is_fresh() and predicate(self._latest[1]):
+            return self._latest[1]
+        future = self._loop.create_future()
+        self._waiters.append((predicate, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def samples(self) -> AsyncIterator[Sample]:
+        """
+        取得したサンプルを順に返す非同期イテレータ
+
+        Yields:
+            Tuple[float, float]: (タイムスタンプ, 重量[g])
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            while not self._closed:
+                sample = await queue.get()
+                if sample is None:
+                    break
+                yield sample
+        finally:
+            self._subscribers.discard(queue)
+
+    def __aiter__(self) -> AsyncIterator[Sample]:
+        return self.samples()
+
+    def close(self) -> None:
+        """
+        センサーとの接続を解除し、待機中の処理を終了させます。
+
+        イベントループ上で呼び出してください。
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.sensor.remove_weight_listener(self._on_weight)
+        for _, future in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._waiters = []
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
@@ -0,0 +1,279 @@
+"""
+サーボのモーション再生エンジン
+
+事前に計算した MotionProfile を専用スレッドで再生します。
+各点は動作開始時刻からの絶対時刻で出力するため、待機の誤差が積み重ならず、
+300秒の警告動作も300秒で終わります。
+
+play() はすぐに MotionHandle を返します。呼び出し側はサーボの動作時間を待たずに済み、
+必要なら handle.wait() で待つ、asyncio から await する、cancel() で止めることができます。
+
+開始角度が再生時まで決まらない動作（前の動作がキャンセルされうる場合など）は、
+現在の角度から軌道を作る関数を渡すと、再生開始時に一度だけ計算します。
+"""
+import asyncio
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Union
+
+from utils.cancellation import CancellationToken
+from utils.motion_profile import MotionProfile
+
+# 現在の角度（不明な場合None）から軌道を作る関数
+ProfileFactory = Callable[[Optional[float]], MotionProfile]
+
+
+class MotionHandle:
+    """
+    再生を依頼した動作1つ分のハンドル
+
+    await すると、動作が終わった時点で interrupted（キャンセルで中断したか）を返します。
+    """
+
+    def __init__(
+        self,
+        profile: Union[MotionProfile, ProfileFactory],
+        hold_s: float = 0.0,
+        token: Optional[CancellationToken] = None,
+        on_step: Optional[Callable[[float], None]] = None
+    ):
+        """
+        ハンドルを初期化します。
+
+        Args:
+            profile: 再生する軌道、または現在の角度から軌道を作る関数
+            hold_s: 最後の点を出力してから電力供給を止めるまでの時間（秒）
+            token: キャンセルトークン（省略時は新しく作成）
+            on_step: 角度を出力するたびに再生スレッドから呼び出す関数
+        """
+        self.profile = profile
+        self.hold_s = hold_s
+        self.token = token if token is not None else CancellationToken()
+        self.on_step = on_step
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.last_angle: Optional[float] = None
+        self.interrupted = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[["MotionHandle"], None]] = []
+
+    @property
+    def done(self) -> bool:
+        """動作が終わった（またはキャンセルで中断した）場合True"""
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセルが要求されている場合True"""
+        return self.token.cancelled
+
+    def cancel(self) -> None:
+        """動作を止めます（どのスレッドからでも呼び出せます）"""
+        self.token.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        動作が終わるまで待ちます。
+
+        Args:
+            timeout: 最大待ち時間（秒）。Noneの場合は終わるまで待つ
+
+        Returns:
+            bool: 動作が終わった場合True
+        """
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback: Callable[["MotionHandle"], None]) -> None:
+        """
+        動作が終わったときに呼び出す関数を登録します。
+
+        すでに終わっている場合はすぐに呼び出します。それ以外は再生スレッドから呼び出されます。
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, interrupted: bool, finished_at: float) -> None:
+        with self._lock:
+            self.interrupted = interrupted
+            self.finished_at = finished_at
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"サーボ動作の完了通知でエラーが発生しました: {e}")
+
+    def __await__(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(handle: "MotionHandle") -> None:
+            if not future.done():
+                future.set_result(handle.interrupted)
+
+        def on_done(handle: "MotionHandle") -> None:
+            try:
+                loop.call_soon_threadsafe(resolve, handle)
+            except RuntimeError:
+                # イベントループが既に閉じている
+                pass
+
+        self.add_done_callback(on_done)
+        return future.__await__()
+
+
+class MotionEngine:
+    """
+    MotionProfile を専用スレッドで順に再生するクラス
+
+    依頼された動作は到着順に再生します。
+    点と点の間隔が step_hold_s より長い場合は、出力から step_hold_s 後に
+    サーボへの電力供給を止めます（発熱・ノイズ防止）。
+    """
+
+    def __init__(
+        self,
+        write: Callable[[float], None],
+        detach: Callable[[], None],
+        step_hold_s: float = 0.1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        エンジンを初期化し、再生スレッドを開始します。
+
+        Args:
+            write: 角度を出力する関数
+            detach: 電力供給を止める関数
+            step_hold_s: 点を出力してから電力供給を止めるまでの時間（秒）
+            clock: 単調時計
+        """
+        self._write = write
+        self._detach = detach
+        self.step_hold_s = step_hold_s
+        self._clock = clock
+        self._queue: "queue.Queue[Optional[MotionHandle]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending: List[MotionHandle] = []
+        self._current: Optional[MotionHandle] = None
+        self._closed = False
+        # 最後に出力した角度（まだ出力していない場合None）
+        self.angle: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name="servo-motion", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        """再生中または再生待ちの動作がある場合True"""
+        with self._lock:
+            return self._current is not None or bool(self._pending)
+
+    def play(
+        self,
+        profile: Union[MotionProfile, ProfileFactory],
+        hold_s: float = 0.0,
+        token: Optional[CancellationToken] = None,
+        on_step: Optional[Callable[[float], None]] = None
+    ) -> MotionHandle:
+        """
+        軌道の再生を依頼します。すぐに戻ります。
+
+        Args:
+            profile: 再生する軌道、または現在の角度から軌道を作る関数
+            hold_s: 最後の点を出力してから電力供給を止めるまでの時間（秒）
+            token: キャンセルトークン
+            on_step: 角度を出力するたびに呼び出す関数
+
+        Returns:
+            MotionHandle: 動作のハンドル
+        """
+        handle = MotionHandle(profile, hold_s, token, on_step)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("motion engine is closed")
+            self._pending.append(handle)
+        self._queue.put(handle)
+        return handle
+
+    def stop(self) -> None:
+        """再生中と再生待ちの動作をすべてキャンセルします"""
+        with self._lock:
+            handles = list(self._pending)
+            if self._current is not None:
+                handles.append(self._current)
+        for handle in handles:
+            handle.cancel()
+
+    def close(self, timeout: Optional[float] = 2.0) -> None:
+        """動作をすべて止め、再生スレッドを終了します"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.stop()
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            handle = self._queue.get()
+            if handle is None:
+                return
+            with self._lock:
+                self._pending.remove(handle)
+                self._current = handle
+            interrupted = True
+            try:
+                if not handle.cancelled:
+                    interrupted = self._play(handle)
+            except Exception as e:
+                print(f"\nサーボの動作中にエラーが発生しました: {e}")
+            finally:
+                try:
+                    self._detach()
+                except Exception as e:
+                    print(f"\nサーボの電力供給を止められませんでした: {e}")
+                with self._lock:
+                    self._current = None
+                handle._finish(interrupted, self._clock())
+
+    def _play(self, handle: MotionHandle) -> bool:
+        """
+        軌道を絶対時刻で再生します。
+
+        Returns:
+            bool: キャンセルで中断した場合True
+        """
+        token = handle.token
+        if not isinstance(handle.profile, MotionProfile):
+            handle.profile = handle.profile(self.angle)
+        times = handle.profile.times
+        angles = handle.profile.angles
+        count = len(times)
+        start = self._clock()
+        handle.started_at = start
+        for i in range(count):
+            delay = start + times[i] - self._clock()
+            if delay > 0 and token.wait(delay):
+                return True
+            if token.cancelled:
+                return True
+            angle = angles[i]
+            self._write(angle)
+            self.angle = angle
+            handle.last_angle = angle
+            if handle.on_step is not None:
+                handle.on_step(angle)
+            # 次の点まで間があれば、動き終わるのを待って電力供給を止める
+            if i + 1 < count and times[i + 1] - times[i] > self.step_hold_s:
+                if token.wait(self.step_hold_s):
+                    return True
+                self._detach()
+        if handle.hold_s > 0 and token.wait(handle.hold_s):
+            return True
+        return False
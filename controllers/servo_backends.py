@@ -0,0 +1,312 @@
+"""
+サーボの出力バックエンド
+
+角度をパルス幅に変換してサーボへ出力する方法を選べるようにします。
+
+    - hardware_pwm: /sys/class/pwm のPWMチャンネルを使います（GPIO12はPWM0）。
+      パルスはPWMペリフェラルが生成するため、CPUを使わず、
+      HX711の読み取りなどでCPUが混んでもパルス幅が揺れません。
+      /boot/firmware/config.txt に dtoverlay=pwm,pin=12,func=4 が必要です。
+    - lgpio: lgpio の tx_servo でパルスを出力します。
+      パルスは lgpio のスレッドが生成するため、Python のスレッドの影響は受けません。
+    - gpiozero: gpiozero の AngularServo（既定のピンファクトリ）。従来の方式です。
+
+"auto" は上から順に試し、使えたものを選びます。
+それ以外を指定して使えなかった場合は gpiozero に切り替えます。
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+# "auto" で試す順番
+BACKEND_ORDER: Tuple[str, ...] = ("hardware_pwm", "lgpio", "gpiozero")
+
+
+class ServoBackend(ABC):
+    """
+    サーボ出力の基底クラス
+
+    write() は角度をパルス幅に変換して set_pulse_width() を呼び出します。
+    サブクラスは set_pulse_width() と detach() を実装してください
+    （実装していない場合は作成時に TypeError になります）。
+    """
+
+    name = ""
+
+    def __init__(
+        self,
+        min_angle: float,
+        max_angle: float,
+        min_pulse_width: float,
+        max_pulse_width: float,
+        frequency_hz: float = 50.0
+    ):
+        """
+        Args:
+            min_angle: 最小角度
+            max_angle: 最大角度
+            min_pulse_width: 最小角度でのパルス幅（秒）
+            max_pulse_width: 最大角度でのパルス幅（秒）
+            frequency_hz: パルスの周波数（Hz）
+        """
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self.min_pulse_width = min_pulse_width
+        self.max_pulse_width = max_pulse_width
+        self.frequency_hz = frequency_hz
+
+    def pulse_width(self, angle: float) -> float:
+        """角度に対応するパルス幅（秒）を返します"""
+        ratio = (angle - self.min_angle) / (self.max_angle - self.min_angle)
+        ratio = min(max(ratio, 0.0), 1.0)
+        return self.min_pulse_width + ratio * (self.max_pulse_width - self.min_pulse_width)
+
+    def write(self, angle: float) -> None:
+        """角度を出力します"""
+        self.set_pulse_width(self.pulse_width(angle))
+
+    @abstractmethod
+    def set_pulse_width(self, seconds: float) -> None:
+        """パルス幅（秒）を出力します"""
+
+    @abstractmethod
+    def detach(self) -> None:
+        """パルスの出力を止めます（サーボへの電力供給の停止）"""
+
+    def close(self) -> None:
+        """出力を止め、ピンを解放します"""
+        self.detach()
+
+
+class HardwarePwmBackend(ServoBackend):
+    """sysfs のPWMチャンネルによるハードウェアPWM"""
+
+    name = "hardware_pwm"
+
+    # GPIO番号 -> PWMチャンネル
+    PIN_CHANNELS = {12: 0, 18: 0, 13: 1, 19: 1}
+
+    def __init__(
+        self,
+        pin: int,
+        min_angle: float,
+        max_angle: float,
+        min_pulse_width: float,
+        max_pulse_width: float,
+        frequency_hz: float = 50.0,
+        chip: int = 0,
+        sysfs_root: str = "/sys/class/pwm"
+    ):
+        """
+        PWMチャンネルを準備します。
+
+        Args:
+            pin: GPIO番号（12, 13, 18, 19）
+            chip: pwmchip の番号（Raspberry Pi 5 では 2 の場合があります）
+            sysfs_root: PWMのsysfsディレクトリ
+        """
+        super().__init__(min_angle, max_angle, min_pulse_width, max_pulse_width, frequency_hz)
+        channel = self.PIN_CHANNELS.get(pin)
+        if channel is None:
+            raise ValueError(f"GPIO{pin} はハードウェアPWMのピンではありません")
+        chip_dir = os.path.join(sysfs_root, f"pwmchip{chip}")
+        if not os.path.isdir(chip_dir):
+            raise FileNotFoundError(f"{chip_dir} がありません（dtoverlay=pwm を確認してください）")
+        self._chip_dir = chip_dir
+        self._channel = channel
+        self._dir = os.path.join(chip_dir, f"pwm{channel}")
+        if not os.path.isdir(self._dir):
+            self._write_file(os.path.join(chip_dir, "export"), channel)
+            self._wait_for_export()
+        self._enabled = False
+        self._duty_ns: Optional[int] = None
+        self._write_attr("enable", 0)
+        self._write_attr("period", round(1e9 / frequency_hz))
+
+    def _wait_for_export(self, timeout_s: float = 1.0) -> None:
+        # エクスポート直後は udev が権限を設定するまで書き込めないことがある
+        deadline = time.monotonic() + timeout_s
+        while not os.access(os.path.join(self._dir, "period"), os.W_OK):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{self._dir} を利用できません")
+            time.sleep(0.01)
+
+    @staticmethod
+    def _write_file(path: str, value: int) -> None:
+        with open(path, "w") as f:
+            f.write(str(value))
+
+    def _write_attr(self, attr: str, value: int) -> None:
+        self._write_file(os.path.join(self._dir, attr), value)
+
+    def set_pulse_width(self, seconds: float) -> None:
+        duty_ns = round(seconds * 1e9)
+        if duty_ns != self._duty_ns:
+            self._write_attr("duty_cycle", duty_ns)
+            self._duty_ns = duty_ns
+        if not self._enabled:
+            self._write_attr("enable", 1)
+            self._enabled = True
+
+    def detach(self) -> None:
+        if self._enabled:
+            self._write_attr("enable", 0)
+            self._enabled = False
+
+    def close(self) -> None:
+        self.detach()
+        try:
+            self._write_file(os.path.join(self._chip_dir, "unexport"), self._channel)
+        except OSError:
+            pass
+
+
+class LgpioBackend(ServoBackend):
+    """lgpio の tx_servo によるサーボパルス"""
+
+    name = "lgpio"
+
+    def __init__(
+        self,
+        pin: int,
+        min_angle: float,
+        max_angle: float,
+        min_pulse_width: float,
+        max_pulse_width: float,
+        frequency_hz: float = 50.0,
+        chip: int = 0
+    ):
+        """
+        GPIOチップを開き、ピンを出力として確保します。
+
+        Args:
+            pin: GPIO番号
+            chip: gpiochip の番号
+        """
+        super().__init__(min_angle, max_angle, min_pulse_width, max_pulse_width, frequency_hz)
+        import lgpio
+        self._lgpio = lgpio
+        self._pin = pin
+        self._handle = lgpio.gpiochip_open(chip)
+        try:
+            lgpio.gpio_claim_output(self._handle, pin)
+        except Exception:
+            lgpio.gpiochip_close(self._handle)
+            raise
+
+    def set_pulse_width(self, seconds: float) -> None:
+        self._lgpio.tx_servo(
+            self._handle, self._pin, round(seconds * 1e6), round(self.frequency_hz)
+        )
+
+    def detach(self) -> None:
+        # パルス幅0でパルスの出力を止める
+        self._lgpio.tx_servo(self._handle, self._pin, 0)
+
+    def close(self) -> None:
+        self.detach()
+        self._lgpio.gpio_free(self._handle, self._pin)
+        self._lgpio.gpiochip_close(self._handle)
+
+
+class GpiozeroBackend(ServoBackend):
+    """gpiozero の AngularServo（従来の方式）"""
+
+    name = "gpiozero"
+
+    def __init__(
+        self,
+        pin: int,
+        min_angle: float,
+        max_angle: float,
+        min_pulse_width: float,
+        max_pulse_width: float,
+        frequency_hz: float = 50.0,
+        pin_factory=None
+    ):
+        """
+        AngularServo を作成します。
+
+        Args:
+            pin: GPIO番号
+            pin_factory: gpiozero のピンファクトリ（省略時は既定。ベンチマークでは MockFactory）
+        """
+        super().__init__(min_angle, max_angle, min_pulse_width, max_pulse_width, frequency_hz)
+        from gpiozero import AngularServo
+        self.servo = AngularServo(
+            pin,
+            min_angle=min_angle,
+            max_angle=max_angle,
+            min_pulse_width=min_pulse_width,
+            max_pulse_width=max_pulse_width,
+            frame_width=1.0 / frequency_hz,
+            pin_factory=pin_factory
+        )
+
+    def write(self, angle: float) -> None:
+        self.servo.angle = min(max(angle, self.min_angle), self.max_angle)
+
+    def set_pulse_width(self, seconds: float) -> None:
+        self.servo.pulse_width = seconds
+
+    def detach(self) -> None:
+        self.servo.detach()
+
+    def close(self) -> None:
+        self.servo.close()
+
+
+def create_servo_backend(
+    backend: str,
+    pin: int,
+    min_angle: float,
+    max_angle: float,
+    min_pulse_width: float,
+    max_pulse_width: float,
+    frequency_hz: float = 50.0,
+    pwm_chip: int = 0
+) -> ServoBackend:
+    """
+    サーボ出力のバックエンドを作成します。
+
+    Args:
+        backend: "auto", "hardware_pwm", "lgpio", "gpiozero"
+        pin: GPIO番号
+        min_angle: 最小角度
+        max_angle: 最大角度
+        min_pulse_width: 最小パルス幅（秒）
+        max_pulse_width: 最大パルス幅（秒）
+        frequency_hz: パルスの周波数（Hz）
+        pwm_chip: hardware_pwm で使う pwmchip の番号
+
+    Returns:
+        ServoBackend: 使用できたバックエンド
+
+    Raises:
+        ValueError: 不明なバックエンド名の場合
+    """
+    if backend == "auto":
+        candidates = BACKEND_ORDER
+    elif backend in BACKEND_ORDER:
+        candidates = (backend,) if backend == "gpiozero" else (backend, "gpiozero")
+    else:
+        raise ValueError(f"unknown servo backend: {backend}")
+
+    args = (pin, min_angle, max_angle, min_pulse_width, max_pulse_width, frequency_hz)
+    for name in candidates:
+        if name == "gpiozero":
+            # 最後の手段なので、失敗した場合はそのまま例外を送出する
+            result: ServoBackend = GpiozeroBackend(*args)
+        else:
+            try:
+                if name == "hardware_pwm":
+                    result = HardwarePwmBackend(*args, chip=pwm_chip)
+                else:
+                    result = LgpioBackend(*args)
+            except Exception as e:
+                print(f"サーボ出力 {name} を使用できません: {e}")
+                continue
+        print(f"サーボ出力: {result.name}")
+        return result
+    raise RuntimeError("no servo backend available")
@@ -1,10 +1,18 @@
 """サーボモーター制御モジュール
 
-gpiozeroライブラリを使用してサーボモーターを制御します。
+サーボへの出力は controllers/servo_backends.py のバックエンド
+（ハードウェアPWM・lgpio・gpiozero）から選びます。
+
+動作は utils/motion_profile.py で軌道を事前に計算し、MotionEngine の専用スレッドで
+再生します。各メソッドはすぐに MotionHandle を返し、サーボの動作時間を待ちません。
 """
-from gpiozero import AngularServo
-import time
-from typing import Generator
+from typing import Callable, Optional, Union
+
+from utils.cancellation import CancellationToken
+from utils.motion_profile import MotionProfile, hold, s_curve, trapezoidal
+
+from .motion_engine import MotionEngine, MotionHandle, ProfileFactory
+from .servo_backends import create_servo_backend
 
 
 class ServoController:
@@ -20,7 +28,12 @@ class ServoController:
         min_angle: int,
         max_angle: int,
         min_pulse_width: float = 0.5 / 1000,
-        max_pulse_width: float = 2.4 / 1000
+        max_pulse_width: float = 2.4 / 1000,
+        motion_rate_hz: float = 50.0,
+        step_hold_s: float = 0.1,
+        gradual_move_s: float = 2.0,
+        backend: str = "auto",
+        pwm_chip: int = 0
     ):
         """
         サーボモーターを初期化します。
@@ -31,86 +44,152 @@ class ServoController:
             max_angle: 最大角度
             min_pulse_width: 最小パルス幅（秒）
             max_pulse_width: 最大パルス幅（秒）
+            motion_rate_hz: 軌道の標本化の周波数（Hz）
+            step_hold_s: ゆっくりした動作で、角度を出力してから電力供給を止めるまでの時間（秒）
+            gradual_move_s: 段階的に初期位置へ戻すときの動作時間（秒）
+            backend: 出力方式（"auto", "hardware_pwm", "lgpio", "gpiozero"）
+            pwm_chip: ハードウェアPWMで使う pwmchip の番号
         """
         self.min_angle = min_angle
         self.max_angle = max_angle
-        self.servo = AngularServo(
+        self.backend = create_servo_backend(
+            backend,
             pin,
-            min_angle=min_angle,
-            max_angle=max_angle,
-            min_pulse_width=min_pulse_width,
-            max_pulse_width=max_pulse_width
+            min_angle,
+            max_angle,
+            min_pulse_width,
+            max_pulse_width,
+            pwm_chip=pwm_chip
         )
+        self.motion_rate_hz = motion_rate_hz
+        self.gradual_move_s = gradual_move_s
+        self.motion = MotionEngine(self._write_angle, self.backend.detach, step_hold_s=step_hold_s)
         print("サーボモーターの準備ができました。")
     
-    def move_to_angle(self, angle: int, duration: float = 1.0) -> None:
+    def _write_angle(self, angle: float) -> None:
+        """角度を出力します（再生スレッドから呼び出されます）"""
+        self.backend.write(min(max(angle, self.min_angle), self.max_angle))
+    
+    @property
+    def busy(self) -> bool:
+        """動作中または動作待ちの場合True"""
+        return self.motion.busy
+    
+    def play(
+        self,
+        profile: Union[MotionProfile, ProfileFactory],
+        hold_s: float = 0.0,
+        token: Optional[CancellationToken] = None,
+        on_step: Optional[Callable[[float], None]] = None
+    ) -> MotionHandle:
+        """
+        軌道を再生します。すぐに戻ります。
+        
+        前の動作が終わっていない場合は、その後に再生します。
+        
+        Args:
+            profile: 再生する軌道、または現在の角度から軌道を作る関数
+            hold_s: 最後の点の後、電力供給を止めるまでの時間（秒）
+            token: 動作を途中で止めるためのキャンセルトークン
+            on_step: 角度を出力するたびに呼び出す関数（再生スレッドから呼ばれます）
+        
+        Returns:
+            MotionHandle: 動作のハンドル
+        """
+        return self.motion.play(profile, hold_s, token, on_step)
+    
+    def move_to_angle(self, angle: int, duration: float = 1.0) -> MotionHandle:
         """
         サーボを指定された角度に移動させます。
         
         Args:
             angle: 目標角度
-            duration: 移動後の待機時間（秒）
+            duration: 移動後、電力供給を止めるまでの時間（秒）
+        
+        Returns:
+            MotionHandle: 動作のハンドル
         """
-        self.servo.angle = angle
-        time.sleep(duration)
+        return self.play(hold(angle), hold_s=duration)
     
-    def move_to_initial_position(self, gradual: bool = False) -> None:
+    def move_to(self, angle: float, duration_s: float, shape: str = "s_curve") -> MotionHandle:
         """
-        サーボを初期位置（最大角度）に移動させます。
+        現在の角度から目標角度まで、軌道に沿って移動させます。
+        
+        開始角度は前の動作が終わった時点の角度です。
+        角度が不明な場合（起動直後）は目標角度へ直接移動します。
         
         Args:
-            gradual: Trueの場合、段階的に移動します
+            angle: 目標角度
+            duration_s: 動作時間（秒）
+            shape: "s_curve" または "trapezoidal"
+        
+        Returns:
+            MotionHandle: 動作のハンドル
+        """
+        if shape == "s_curve":
+            build = lambda start: s_curve(start, angle, duration_s, self.motion_rate_hz)
+        elif shape == "trapezoidal":
+            build = lambda start: trapezoidal(start, angle, duration_s, rate_hz=self.motion_rate_hz)
+        else:
+            raise ValueError(f"unknown motion shape: {shape}")
+        # 開始角度は前の動作が終わった時点の角度（再生開始時に計算する）
+        return self.play(lambda start: hold(angle) if start is None else build(start))
+    
+    def move_to_initial_position(self, gradual: bool = False) -> MotionHandle:
+        """
+        サーボを初期位置（最大角度）に移動させます。すぐに戻ります。
+        
+        Args:
+            gradual: Trueの場合、S字の軌道でゆっくり移動します（負荷軽減）
+        
+        Returns:
+            MotionHandle: 動作のハンドル
         """
         print(f"サーボを初期位置 ({self.max_angle}度) に移動します。")
         
         if gradual:
-            # 段階的に移動（負荷軽減）
-            quarter = self.max_angle / 4
-            half = self.max_angle / 2
-            
-            self.move_to_angle(int(quarter), duration=0.5)
-            self.move_to_angle(int(half), duration=0.5)
-            self.move_to_angle(self.max_angle, duration=1.0)
+            handle = self.move_to(self.max_angle, self.gradual_move_s, shape="s_curve")
         else:
-            self.move_to_angle(self.max_angle, duration=1.0)
-        
-        self.detach()
-        print("サーボを初期位置に戻しました。")
+            handle = self.move_to_angle(self.max_angle, duration=1.0)
+        handle.add_done_callback(lambda h: print("サーボを初期位置に戻しました。"))
+        return handle
     
-    def rotate_slowly(self, duration_sec: int) -> Generator[int, None, None]:
+    def alert_sweep(
+        self,
+        duration_sec: int,
+        token: Optional[CancellationToken] = None,
+        on_step: Optional[Callable[[int], None]] = None
+    ) -> MotionHandle:
         """
-        指定された時間をかけて、最大角度から最小角度までゆっくり回転します。
+        警告動作として、指定された時間をかけて最大角度から最小角度までゆっくり回転します。
         
-        警告動作として使用され、各角度でジェネレータとして値を返します。
-        これにより、呼び出し側は各ステップで重量変化を確認できます。
+        軌道は1度刻みで事前に計算し、角度を出力するたびに電力供給を止めます。
+        別スレッドから token.cancel()（または handle.cancel()）を呼ぶと、
+        数ミリ秒以内に回転を止めます。
         
         Args:
             duration_sec: 回転にかける時間（秒）
+            token: 回転を途中で止めるためのキャンセルトークン
+            on_step: 各角度で呼び出す関数（再生スレッドから呼ばれます）
         
-        Yields:
-            int: 現在の角度
+        Returns:
+            MotionHandle: 動作のハンドル。await すると中断した場合Trueを返す
         """
         total_steps = self.max_angle - self.min_angle
-        servo_move_time = 0.1  # サーボ移動の待機時間（秒）
-        
-        # 実際の待機時間からサーボ移動時間を引く
-        step_interval = (duration_sec / total_steps) - servo_move_time
-        if step_interval < 0:
-            step_interval = 0
-        
+        # 1度ずつ出力できるよう、1度あたり少なくとも1点を標本化する
+        rate_hz = max(self.motion_rate_hz, total_steps / duration_sec if duration_sec > 0 else 0.0)
+        profile = trapezoidal(
+            self.max_angle, self.min_angle, duration_sec,
+            accel_fraction=0.0, rate_hz=rate_hz
+        ).quantize(1.0)
         print(f"{duration_sec}秒かけてサーボを回転させます...")
-        print(f"総ステップ数: {total_steps}, ステップ間隔: {step_interval:.3f}秒")
-        
-        for angle in range(self.max_angle, self.min_angle - 1, -1):
-            self.servo.angle = angle
-            yield angle
-            time.sleep(servo_move_time)
-            
-            # サーボへの電力供給を一時的に停止（発熱・ノイズ防止）
-            self.servo.detach()
-            
-            if step_interval > 0:
-                time.sleep(step_interval)
+        print(f"総ステップ数: {total_steps}, ステップ間隔: {duration_sec / max(1, total_steps):.3f}秒")
+        step = None if on_step is None else (lambda angle: on_step(int(angle)))
+        return self.play(profile, token=token, on_step=step)
+    
+    def stop(self) -> None:
+        """動作中と動作待ちの動作をすべて止めます"""
+        self.motion.stop()
     
     def detach(self) -> None:
         """
@@ -118,7 +197,7 @@ class ServoController:
         
         発熱やノイズを防ぐために、動作完了後は電力供給を停止します。
         """
-        self.servo.detach()
+        self.backend.detach()
     
     def cleanup(self) -> None:
         """
@@ -126,4 +205,5 @@ class ServoController:
         
         プログラム終了時に呼び出してください。
         """
-        self.detach()
\ No newline at end of file
+        self.motion.close()
+        self.backend.close()
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""重量センサーの連続サンプリングモジュール
+
+専用スレッドでHX711を変換レートのまま読み続け、
+タイムスタンプ付きの生値をリングバッファに格納します。
+"""
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.hx711 import HX711, HX711TimeoutError
+from utils.ring_buffer import SampleRingBuffer
+
+
+class WeightSampler:
+    """
+    HX711をバックグラウンドで連続読み取りするクラス
+
+    読み取り側はハードウェアI/Oを行わず、バッファから最新値を取得します。
+    """
+
+    def __init__(self, hx: HX711, capacity: int = 256, recover_after: int = 2):
+        """
+        サンプラーを初期化します。
+
+        Args:
+            hx: HX711インスタンス
+            capacity: リングバッファの容量（サンプル数）
+            recover_after: 連続してこの回数タイムアウトしたらHX711をリセットする
+        """
+        self.hx = hx
+        self.buffer = SampleRingBuffer(capacity)
+        self.recover_after = recover_after
+        self.error_count = 0
+        self.timeout_count = 0
+        self.recovery_count = 0
+        self._consecutive_timeouts = 0
+        self._listeners: Dict[str, List[Callable[[float, int], None]]] = {'A': []}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """サンプリングスレッドが動作中かどうか"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, timeout: float = 1.0) -> bool:
+        """
+        サンプリングスレッドを開始します。
+
+        停止を要求した前のスレッドがまだ読み取り中の場合は、終了を待ってから開始します。
+        2つのスレッドが同時にHX711を読むことはありません。
+
+        Args:
+            timeout: 前のスレッドの終了を待つ最大時間（秒）
+
+        Returns:
+            bool: サンプリングスレッドが動作中の場合True。
+                前のスレッドが終了せず開始できなかった場合False
+        """
+        if self.running:
+            if not self._stop_event.is_set():
+                return True
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print("前のサンプリングスレッドが終了していないため、サンプリングを開始できません。")
+                return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="hx711-sampler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 1.0) -> bool:
+        """
+        サンプリングスレッドを停止します。
+
+        Args:
+            timeout: スレッド終了を待つ最大時間（秒）
+
+        Returns:
+            bool: スレッドが終了した場合True。時間内に終了しなかった場合False
+                （停止要求は残るため、読み取りが終わりしだい終了します）
+        """
+        self._stop_event.set()
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"サンプリングスレッドが {timeout} 秒以内に終了しませんでした。")
+            return False
+        self._thread = None
+        return True
+
+    def add_listener(self, listener: Callable[[float, int], None], channel: str = 'A') -> None:
+        """
+        サンプル取得ごとに呼び出すリスナーを登録します。
+
+        リスナーはサンプリングスレッド上で (タイムスタンプ, 生値) を引数に呼ばれます。
+        読み取りを遅らせないよう、処理は短く保ってください。
+
+        Args:
+            listener: コールバック関数
+            channel: 対象チャンネル（'A' または 'B'）
+        """
+        self._listeners.setdefault(channel, []).append(listener)
+
+    def remove_listener(self, listener: Callable[[float, int], None], channel: str = 'A') -> None:
+        """登録済みのリスナーを解除します"""
+        listeners = self._listeners.get(channel, [])
+        if listener in listeners:
+            listeners.remove(listener)
+
+    def latest(self, n: int, timeout: Optional[float] = None) -> array:
+        """
+        最新n件の生値を返します。
+
+        バッファが空の場合は最初のサンプルが届くまで待機します。
+
+        Args:
+            n: 取得件数
+            timeout: 最初のサンプルを待つ最大時間（秒）
+
+        Returns:
+            array: 生値の配列（古い順）。タイムアウト時は空
+        """
+        self.buffer.wait_for_total(1, timeout)
+        return self.buffer.latest(n)
+
+    def _wait_for_data(self) -> bool:
+        """
+        ポーリングモードで変換完了を待ちます。
+
+        エッジ検出が無効な場合でもCPUを占有しないよう、短い間隔で確認します。
+
+        Returns:
+            bool: 変換が完了した場合True。停止要求があった場合False
+
+        Raises:
+            HX711TimeoutError: HX711の読み取りタイムアウト内に変換が完了しない場合
+        """
+        timeout = self.hx.readTimeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop_event.is_set():
+            if self.hx.is_ready():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                raise HX711TimeoutError(f"no data ready within {timeout:.3f} s")
+            self._stop_event.wait(0.005)
+        return False
+
+    def _recover(self) -> None:
+        """
+        応答しないHX711を電源再投入でリセットします。
+
+        リセット後の最初の変換待ちもタイムアウトで打ち切られるため、
+        ここで無期限にブロックすることはありません。
+        """
+        self.recovery_count += 1
+        print("HX711が応答しません。電源を再投入してリセットします。")
+        try:
+            self.hx.reset()
+        except HX711TimeoutError:
+            pass
+        except Exception as e:
+            print(f"HX711のリセット中にエラーが発生しました: {e}")
+
+    def _run(self) -> None:
+        """サンプリングループ"""
+        while not self._stop_event.is_set():
+            try:
+                if not self.hx.interruptMode and not self._wait_for_data():
+                    break
+                sample = self._read_sample()
+            except HX711TimeoutError:
+                self.timeout_count += 1
+                self._consecutive_timeouts += 1
+                if self._consecutive_timeouts >= self.recover_after:
+                    self._consecutive_timeouts = 0
+                    self._recover()
+                continue
+            except Exception as e:
+                self.error_count += 1
+                print(f"サンプリング中にエラーが発生しました: {e}")
+                self._stop_event.wait(0.1)
+                continue
+            self._consecutive_timeouts = 0
+            if sample is not None:
+                self._store(time.monotonic(), *sample)
+
+    def _read_sample(self) -> Optional[Tuple[str, int]]:
+        """
+        1サンプルを読み取ります。
+
+        Returns:
+            Optional[Tuple[str, int]]: (チャンネル, 生値)。破棄した場合はNone
+        """
+        return 'A', self.hx.read_long()
+
+    def _buffer_for(self, channel: str) -> SampleRingBuffer:
+        return self.buffer
+
+    def _store(self, timestamp: float, channel: str, value: int) -> None:
+        """サンプルをバッファに格納し、リスナーに通知します"""
+        self._buffer_for(channel).append(timestamp, value)
+        for listener in self._listeners.get(channel, ()):
+            try:
+                listener(timestamp, value)
+            except Exception as e:
+                print(f"サンプルリスナーでエラーが発生しました: {e}")
+
+
+class DualChannelSampler(WeightSampler):
+    """
+    HX711のチャンネルAとBを交互に連続読み取りするクラス
+
+    各フレームの24ビット後に送るクロック数で次の変換のチャンネルを選ぶため、
+    set_gain() のように変換を読み捨てずにチャンネルを切り替えられます。
+    チャンネルごとにリングバッファを持ちます（オフセットはHX711側のA/B値を使用）。
+
+    HX711のデータシートでは、チャンネル切り替え直後の出力に整定時間が必要と
+    されています。値が安定しない場合は discard_after_switch を増やしてください。
+    """
+
+    def __init__(
+        self,
+        hx: HX711,
+        capacity: int = 256,
+        burst: int = 1,
+        discard_after_switch: int = 0
+    ):
+        """
+        サンプラーを初期化します。
+
+        Args:
+            hx: HX711インスタンス
+            capacity: チャンネルごとのリングバッファ容量
+            burst: 切り替えまでに同じチャンネルから読むフレーム数
+            discard_after_switch: 切り替え直後に読み捨てるフレーム数
+        """
+        super().__init__(hx, capacity)
+        if burst <= discard_after_switch:
+            raise ValueError("burst must be greater than discard_after_switch")
+        self.buffer_b = SampleRingBuffer(capacity)
+        self.burst = burst
+        self.discard_after_switch = discard_after_switch
+        self.discarded_count = 0
+        self._position = 0
+
+    def latest_b(self, n: int, timeout: Optional[float] = None) -> array:
+        """
+        チャンネルBの最新n件の生値を返します。
+
+        Args:
+            n: 取得件数
+            timeout: 最初のサンプルを待つ最大時間（秒）
+
+        Returns:
+            array: 生値の配列（古い順）。タイムアウト時は空
+        """
+        self.buffer_b.wait_for_total(1, timeout)
+        return self.buffer_b.latest(n)
+
+    def _buffer_for(self, channel: str) -> SampleRingBuffer:
+        return self.buffer_b if channel == 'B' else self.buffer
+
+    def _recover(self) -> None:
+        # 電源再投入でHX711はチャンネルAに戻るため、バーストを最初からやり直す
+        super()._recover()
+        self._position = 0
+
+    def _read_sample(self) -> Optional[Tuple[str, int]]:
+        configured = self.hx.get_gain()
+        gain_a = configured if configured != 32 else 128
+        current_is_b = self.hx.conversionGain == 32
+
+        # バーストの最後のフレームで、次の変換をもう一方のチャンネルに切り替える
+        last_in_burst = self._position == self.burst - 1
+        if last_in_burst:
+            next_gain = gain_a if current_is_b else 32
+        else:
+            next_gain = 32 if current_is_b else gain_a
+
+        gain, value = self.hx.read_long_interleaved(next_gain)
+        position = self._position
+        self._position = 0 if last_in_burst else position + 1
+
+        if position < self.discard_after_switch:
+            self.discarded_count += 1
+            return None
+        return ('B' if gain == 32 else 'A'), value
@@ -3,8 +3,10 @@
 HX711を使用してロードセルからの重量データを読み取ります。
 """
 import RPi.GPIO as GPIO
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 import sys
+import threading
+import time
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
@@ -12,7 +14,12 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from utils.hx711 import HX711
+from utils.hx711 import HX711, HX711TimeoutError
+from utils.filters import StreamFilter
+from utils.sample_stats import median, to_weight, trimmed_mean
+from controllers.weight_sampler import DualChannelSampler, WeightSampler
+from core.calibration import CalibrationData, CalibrationStore
+from core.zero_tracker import ZeroTracker
 
 
 class WeightSensor:
@@ -20,7 +27,26 @@ class WeightSensor:
     HX711重量センサーを制御するクラス
     """
     
-    def __init__(self, data_pin: int, clk_pin: int, reference_unit: int):
+    def __init__(
+        self,
+        data_pin: int,
+        clk_pin: int,
+        reference_unit: int,
+        use_interrupt: bool = False,
+        read_timeout_s: float = 0.5,
+        continuous: bool = False,
+        buffer_size: int = 256,
+        sample_filter: Optional[StreamFilter] = None,
+        reference_unit_b: Optional[int] = None,
+        channel_burst: int = 1,
+        channel_switch_discard: int = 0,
+        calibration_store: Optional[CalibrationStore] = None,
+        drift_threshold_g: float = 5.0,
+        drift_check_samples: int = 3,
+        load_present_g: float = 100.0,
+        zero_tracker: Optional[ZeroTracker] = None,
+        calibration_save_delay_s: float = 300.0
+    ):
         """
         センサーを初期化します。
         
@@ -28,15 +54,75 @@ class WeightSensor:
             data_pin: HX711のDATピン番号
             clk_pin: HX711のSCKピン番号
             reference_unit: 参照単位（キャリブレーション値）
+            use_interrupt: DOUTの立ち下がりエッジで変換完了を待つ場合True
+            read_timeout_s: 1回の読み取りで変換完了を待つ最大時間（秒）。
+                ポーリング・エッジ検出のどちらでも有効です
+            continuous: バックグラウンドで連続サンプリングする場合True
+            buffer_size: 連続サンプリング時のリングバッファ容量
+            sample_filter: 生値に逐次適用するフィルタ（FilterChainなど）
+            reference_unit_b: チャンネルB（ゲイン32）の参照単位。
+                指定するとチャンネルBのロードセルも使用します
+            channel_burst: 連続サンプリング時、チャンネルを切り替えるまでのフレーム数
+            channel_switch_discard: チャンネル切り替え直後に読み捨てるフレーム数
+            calibration_store: キャリブレーションの保存先。指定すると起動時に
+                保存済みの値を読み込み、ドリフト確認のみで風袋引きを省略します
+            drift_threshold_g: 保存済みオフセットからのずれがこれを超えたら風袋引きする（グラム）
+            drift_check_samples: ドリフト確認に使うサンプル数
+            load_present_g: ずれがこれ以上なら物が載っているとみなし、
+                保存済みオフセットをそのまま使う（グラム）
+            zero_tracker: ゼロ点の自動追従。set_zero_tracking(True) の間、
+                空の状態の重量からオフセットを少しずつ補正します
+            calibration_save_delay_s: ゼロ点を補正してから保存するまでの時間（秒）。
+                サンプリングスレッドでは保存せず、この間の補正をまとめて保存します
         
         Raises:
             RuntimeError: センサーの初期化に失敗した場合
         """
+        self.read_timeout_s = read_timeout_s
+        self.sampler: Optional[WeightSampler] = None
+        self.sample_filter = sample_filter
+        self.dual_channel = reference_unit_b is not None
+        self.calibration_store = calibration_store
+        self.drift_threshold_g = drift_threshold_g
+        self.drift_check_samples = drift_check_samples
+        self.load_present_g = load_present_g
+        self.timeout_count = 0
+        self.recovery_count = 0
+        self.zero_tracker = zero_tracker
+        self._zero_tracking = False
+        self.calibration_save_delay_s = calibration_save_delay_s
+        self._calibration_dirty = False
+        self._calibration_timer: Optional[threading.Timer] = None
+        self._calibration_lock = threading.Lock()
+        self._weight_listeners: List[Callable[[float, float], None]] = []
+        
         try:
-            self.hx = HX711(data_pin, clk_pin)
+            # set_gain()内で最初の変換を待つため、起動時の固定待ちは不要。
+            # DOUTが応答しない場合も読み取りタイムアウトで初期化を打ち切る
+            self.hx = HX711(
+                data_pin, clk_pin, startup_delay=0, read_timeout=read_timeout_s
+            )
             self.hx.set_reading_format("MSB", "MSB")
             self.hx.set_reference_unit(reference_unit)
-            self.reset_and_tare()
+            if self.dual_channel:
+                self.hx.set_reference_unit_B(reference_unit_b)
+            if use_interrupt:
+                self._enable_interrupt_mode(read_timeout_s)
+            if not self._restore_calibration():
+                self.reset_and_tare()
+            if continuous:
+                if self.dual_channel:
+                    self.sampler = DualChannelSampler(
+                        self.hx,
+                        capacity=buffer_size,
+                        burst=channel_burst,
+                        discard_after_switch=channel_switch_discard
+                    )
+                else:
+                    self.sampler = WeightSampler(self.hx, capacity=buffer_size)
+                self.sampler.add_listener(self._on_sample)
+                self.sampler.start()
+                print("連続サンプリングを開始しました。")
             print("重量センサーの準備ができました。")
         except Exception as e:
             error_msg = f"HX711の初期化中にエラーが発生しました: {e}"
@@ -44,30 +130,418 @@ class WeightSensor:
             GPIO.cleanup()
             raise RuntimeError(error_msg) from e
     
+    def _enable_interrupt_mode(self, read_timeout_s: float) -> None:
+        """
+        エッジ検出による読み取りを有効にします。
+        
+        エッジ検出が使えない環境ではビジーウェイトのまま続行します。
+        """
+        try:
+            self.hx.enable_interrupt_mode(timeout=read_timeout_s)
+            print("HX711をエッジ検出モードで使用します。")
+        except RuntimeError as e:
+            print(f"エッジ検出を有効にできませんでした。ポーリングで読み取ります: {e}")
+    
+    def _restore_calibration(self) -> bool:
+        """
+        保存済みのキャリブレーション値を適用し、ドリフトを確認します。
+        
+        Returns:
+            bool: 保存済みの値をそのまま使える場合True。
+                風袋引きが必要な場合False
+        """
+        if self.calibration_store is None:
+            return False
+        data = self.calibration_store.load()
+        if data is None:
+            print("保存済みのキャリブレーションがないため、風袋引きを行います。")
+            return False
+        if self.dual_channel and (data.offset_b is None or data.reference_unit_b is None):
+            print("チャンネルBのキャリブレーションがないため、風袋引きを行います。")
+            return False
+        
+        self.hx.set_reading_format(data.byte_format, data.bit_format)
+        if data.gain != self.hx.get_gain():
+            self.hx.set_gain(data.gain)
+        self.hx.set_reference_unit(data.reference_unit)
+        self.hx.set_offset_A(data.offset)
+        if self.dual_channel:
+            self.hx.set_reference_unit_B(data.reference_unit_b)
+            self.hx.set_offset_B(data.offset_b)
+        
+        values = self.hx.read_many(self.drift_check_samples)
+        drift_g = to_weight(median(values), data.offset, data.reference_unit)
+        if abs(drift_g) <= self.drift_threshold_g:
+            print(f"保存済みのキャリブレーションを使用します。（ドリフト: {drift_g:.2f} g）")
+            return True
+        if abs(drift_g) >= self.load_present_g:
+            # ゼロ点のずれではなく、コップなどが載ったまま起動したとみなす
+            print(f"起動時に {drift_g:.2f} g の荷重があるため、保存済みのオフセットを使用します。")
+            return True
+        print(f"ドリフトが {drift_g:.2f} g あるため、風袋引きを行います。")
+        return False
+    
+    def save_calibration(self) -> bool:
+        """
+        現在のキャリブレーション値を保存します。
+        
+        Returns:
+            bool: 保存に成功した場合True（保存先がない場合はFalse）
+        """
+        if self.calibration_store is None:
+            return False
+        data = CalibrationData(
+            offset=self.hx.get_offset_A(),
+            reference_unit=self.hx.get_reference_unit_A(),
+            gain=self.hx.get_gain(),
+            byte_format=self.hx.byte_format,
+            bit_format=self.hx.bit_format
+        )
+        if self.dual_channel:
+            data.offset_b = self.hx.get_offset_B()
+            data.reference_unit_b = self.hx.get_reference_unit_B()
+        return self.calibration_store.save(data)
+    
+    def _pause_sampling(self) -> bool:
+        """
+        連続サンプリングを一時停止します。
+        
+        Returns:
+            bool: 停止した場合True（_resume_samplingで再開してください）
+        """
+        if self.sampler is None or not self.sampler.running:
+            return False
+        self.sampler.stop()
+        return True
+    
+    def _resume_sampling(self) -> None:
+        """一時停止した連続サンプリングを、バッファとフィルタを空にして再開します"""
+        self.sampler.buffer.clear()
+        if self.dual_channel:
+            self.sampler.buffer_b.clear()
+        if self.sample_filter is not None:
+            self.sample_filter.reset()
+        self.sampler.start()
+    
     def reset_and_tare(self) -> None:
         """
         センサーをリセットし、風袋引き（ゼロ点調整）を行います。
+        
+        連続サンプリング中の場合は一時停止し、風袋引き後に再開します。
+        キャリブレーションの保存先がある場合は、新しいオフセットを保存します。
         """
+        resume = self._pause_sampling()
+        
         self.hx.reset()
         self.hx.tare()
+        if self.dual_channel:
+            self.hx.tare_B()
+        if self.zero_tracker is not None:
+            self.zero_tracker.reset()
         print("センサーをリセットし、風袋引きを行いました。")
+        self.save_calibration()
+        
+        if resume:
+            self._resume_sampling()
     
-    def get_weight(self, times: int = 5) -> float:
+    def calibrate(self, known_weight_g: float, times: int = 15) -> float:
         """
-        指定された回数重量を測定し、その平均値を返します。
+        既知の重さのものを載せた状態で参照単位を求め、保存します。
+        
+        先に空の状態で reset_and_tare() を実行しておいてください。
         
         Args:
-            times: 測定回数（平均化のため）
+            known_weight_g: 載せたものの重さ（グラム）
+            times: 測定回数
         
         Returns:
-            float: 測定された重量（グラム）。エラー時は0.0
+            float: 新しい参照単位（1gあたりの値）
         """
+        if known_weight_g <= 0:
+            raise ValueError("known_weight_g must be greater than zero")
+        resume = self._pause_sampling()
         try:
-            weight = self.hx.get_weight(times)
-            return float(weight)
+            values = self.hx.read_many(times)
+            reference_unit = (trimmed_mean(values, 0.2) - self.hx.get_offset_A()) / known_weight_g
+            self.hx.set_reference_unit(reference_unit)
+            self.save_calibration()
+            print(f"参照単位を {reference_unit:.2f} に設定しました。")
+            return reference_unit
+        finally:
+            if resume:
+                self._resume_sampling()
+    
+    def get_weight(self, times: int = 5, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        指定された回数重量を測定し、その中央値を返します。
+        
+        連続サンプリング中はハードウェアを読まず、
+        リングバッファの最新times件から計算します。
+        フィルタが設定されている場合は、フィルタの推定値を返します
+        （連続サンプリング中はtimesを使用しません）。
+        
+        HX711が応答しない場合でもtimeout秒以内に戻ります。
+        直接読み取り中にタイムアウトした場合は、HX711をリセットします。
+        
+        Args:
+            times: 測定回数（連続サンプリング時は使用するサンプル数）
+            timeout: 読み取り全体の最大待ち時間（秒）。
+                省略時は read_timeout_s × times
+        
+        Returns:
+            Optional[float]: 測定された重量（グラム）。
+                期限内に新しいサンプルが得られなかった場合やエラー時はNone
+        """
+        if timeout is None:
+            timeout = self.read_timeout_s * times
+        try:
+            if self.sampler is not None and self.sampler.running:
+                if self._samples_stale(self.sampler.buffer):
+                    return None
+                if self.sample_filter is not None:
+                    return self._weight_from_filter()
+                return self._weight_from_buffer(times)
+            values = self.hx.read_many(times, timeout)
+            if self.sample_filter is not None:
+                for value in values:
+                    self.sample_filter.update(value)
+                weight = self._weight_from_filter()
+            else:
+                weight = to_weight(
+                    median(values), self.hx.get_offset_A(), self.hx.get_reference_unit_A()
+                )
+            self._track_zero(time.monotonic(), weight)
+            return weight
+        except HX711TimeoutError as e:
+            self.timeout_count += 1
+            print(f"重量の読み取りがタイムアウトしました: {e}")
+            self.recover()
+            return None
         except Exception as e:
             print(f"重量の取得中にエラーが発生しました: {e}")
-            return 0.0
+            return None
+    
+    def _samples_stale(self, buffer) -> bool:
+        """
+        連続サンプリングのバッファが更新されていないかを確認します。
+        
+        読み取りタイムアウトの2倍以上新しいサンプルがなければ、
+        HX711が応答していないとみなします。
+        """
+        last = buffer.last_timestamp()
+        if last is None:
+            # まだ1件もない場合は、最初のサンプルを待つ処理に任せる
+            return False
+        return time.monotonic() - last > 2 * self.read_timeout_s
+    
+    def recover(self) -> bool:
+        """
+        応答しないHX711を電源再投入でリセットします。
+        
+        連続サンプリング中はサンプリングスレッドが自動でリセットするため、
+        何もしません。
+        
+        Returns:
+            bool: リセット後に読み取りできた場合True
+        """
+        if self.sampler is not None and self.sampler.running:
+            return False
+        self.recovery_count += 1
+        print("HX711が応答しません。電源を再投入してリセットします。")
+        try:
+            self.hx.reset()
+            return self.hx.wait_ready(self.read_timeout_s)
+        except Exception as e:
+            print(f"HX711のリセット中にエラーが発生しました: {e}")
+            return False
+    
+    def get_weight_b(self, times: int = 5) -> Optional[float]:
+        """
+        チャンネルBの重量を返します。
+        
+        連続サンプリング中はチャンネルBのリングバッファの最新times件の中央値、
+        それ以外はゲインを切り替えて直接測定します。
+        
+        Args:
+            times: 測定回数（連続サンプリング時は使用するサンプル数）
+        
+        Returns:
+            Optional[float]: 測定された重量（グラム）。
+                新しいサンプルが得られなかった場合やエラー時はNone
+        """
+        if not self.dual_channel:
+            raise RuntimeError("チャンネルBは有効になっていません")
+        try:
+            if self.sampler is not None and self.sampler.running:
+                if self._samples_stale(self.sampler.buffer_b):
+                    return None
+                values = self.sampler.latest_b(times, timeout=self.read_timeout_s)
+                if not values:
+                    raise RuntimeError("チャンネルBのサンプルがまだ取得されていません")
+                return to_weight(
+                    median(values), self.hx.get_offset_B(), self.hx.get_reference_unit_B()
+                )
+            return float(self.hx.get_weight_B(times))
+        except HX711TimeoutError as e:
+            self.timeout_count += 1
+            print(f"チャンネルBの読み取りがタイムアウトしました: {e}")
+            self.recover()
+            return None
+        except Exception as e:
+            print(f"チャンネルBの重量の取得中にエラーが発生しました: {e}")
+            return None
+    
+    def _weight_from_buffer(self, times: int) -> float:
+        """
+        リングバッファの最新サンプルから重量を計算します。
+        
+        Raises:
+            RuntimeError: サンプルが1件も取得できていない場合
+        """
+        values = self.sampler.latest(times, timeout=self.read_timeout_s)
+        if not values:
+            raise RuntimeError("サンプルがまだ取得されていません")
+        return to_weight(
+            median(values), self.hx.get_offset_A(), self.hx.get_reference_unit_A()
+        )
+    
+    def _weight_from_filter(self) -> float:
+        """
+        フィルタの推定値から重量を計算します。
+        
+        Raises:
+            RuntimeError: まだ推定値がない場合
+        """
+        if self.sample_filter.value is None and self.sampler is not None:
+            self.sampler.buffer.wait_for_total(1, self.read_timeout_s)
+        raw = self.sample_filter.value
+        if raw is None:
+            raise RuntimeError("サンプルがまだ取得されていません")
+        return to_weight(raw, self.hx.get_offset_A(), self.hx.get_reference_unit_A())
+    
+    def _on_sample(self, timestamp: float, value: int) -> None:
+        """サンプリングスレッドから呼ばれ、フィルタ・ゼロ点追従・リスナーを更新します"""
+        if self.sample_filter is not None:
+            value = self.sample_filter.update(value)
+        if not self._zero_tracking and not self._weight_listeners:
+            return
+        weight = to_weight(value, self.hx.get_offset_A(), self.hx.get_reference_unit_A())
+        self._track_zero(timestamp, weight)
+        for listener in tuple(self._weight_listeners):
+            try:
+                listener(timestamp, weight)
+            except Exception as e:
+                print(f"重量リスナーでエラーが発生しました: {e}")
+    
+    def add_weight_listener(self, listener: Callable[[float, float], None]) -> None:
+        """
+        連続サンプリングでサンプルを取得するたびに呼び出すリスナーを登録します。
+        
+        リスナーはサンプリングスレッド上で (タイムスタンプ, 重量[g]) を引数に呼ばれます。
+        フィルタが設定されている場合は、フィルタ適用後の重量です。
+        
+        Args:
+            listener: コールバック関数
+        
+        Raises:
+            RuntimeError: 連続サンプリングが有効でない場合
+        """
+        if self.sampler is None:
+            raise RuntimeError("連続サンプリングが有効ではありません")
+        self._weight_listeners.append(listener)
+    
+    def remove_weight_listener(self, listener: Callable[[float, float], None]) -> None:
+        """登録済みの重量リスナーを解除します"""
+        if listener in self._weight_listeners:
+            self._weight_listeners.remove(listener)
+    
+    def set_zero_tracking(self, enabled: bool) -> None:
+        """
+        ゼロ点の自動追従を有効・無効にします。
+        
+        何も載っていないはずの状態（IDLE）の間だけ有効にしてください。
+        連続サンプリング中はサンプリングスレッドで補正するため、
+        呼び出し元をブロックしません。
+        
+        Args:
+            enabled: 有効にする場合True
+        """
+        if self.zero_tracker is None or enabled == self._zero_tracking:
+            return
+        self.zero_tracker.reset()
+        self._zero_tracking = enabled
+    
+    def _track_zero(self, timestamp: float, weight: float) -> None:
+        """空の状態の重量をゼロ点追従に与え、必要ならオフセットを補正します"""
+        if not self._zero_tracking:
+            return
+        step_g = self.zero_tracker.update(timestamp, weight)
+        if step_g is None:
+            return
+        # weight = (raw - offset) / reference_unit なので、
+        # offset を step_g * reference_unit 増やすと重量が step_g 減る
+        self.hx.set_offset_A(
+            self.hx.get_offset_A() + step_g * self.hx.get_reference_unit_A()
+        )
+        print(
+            f"\n[ゼロ点補正] {step_g:+.2f} g "
+            f"（累積 {self.zero_tracker.total_correction_g:+.2f} g, "
+            f"{self.zero_tracker.correction_count}回目）"
+        )
+        self._mark_calibration_dirty()
+    
+    def _mark_calibration_dirty(self) -> None:
+        """
+        キャリブレーションが変わったことを記録し、保存を予約します。
+        
+        サンプリングスレッドから呼ばれるため、ここではファイルに書き込みません。
+        保存はタイマーのスレッド、または flush_calibration() / cleanup() で行います。
+        """
+        if self.calibration_store is None:
+            return
+        with self._calibration_lock:
+            self._calibration_dirty = True
+            if self._calibration_timer is not None:
+                return
+            self._calibration_timer = threading.Timer(
+                self.calibration_save_delay_s, self.flush_calibration
+            )
+            self._calibration_timer.daemon = True
+            self._calibration_timer.start()
+    
+    def flush_calibration(self) -> bool:
+        """
+        未保存のキャリブレーション（ゼロ点の補正）があれば保存します。
+        
+        Returns:
+            bool: 保存した場合True（未保存の変更がない、または保存に失敗した場合False）
+        """
+        with self._calibration_lock:
+            if self._calibration_timer is not None:
+                self._calibration_timer.cancel()
+                self._calibration_timer = None
+            if not self._calibration_dirty:
+                return False
+            self._calibration_dirty = False
+        if self.save_calibration():
+            return True
+        with self._calibration_lock:
+            self._calibration_dirty = True
+        return False
+    
+    def zero_tracking_telemetry(self) -> Dict[str, Any]:
+        """
+        ゼロ点の自動補正の履歴を返します。
+        
+        Returns:
+            Dict[str, Any]: 補正回数・累積補正量など。自動追従を使わない場合は空
+        """
+        if self.zero_tracker is None:
+            return {}
+        telemetry = self.zero_tracker.telemetry()
+        telemetry['enabled'] = self._zero_tracking
+        telemetry['offset'] = self.hx.get_offset_A()
+        return telemetry
     
     def is_ready(self) -> bool:
         """
@@ -88,6 +562,10 @@ class WeightSensor:
         プログラム終了時に呼び出してください。
         """
         try:
+            if self.sampler is not None:
+                self.sampler.stop()
+            self.flush_calibration()
+            self.hx.disable_interrupt_mode()
             self.hx.power_down()
         except Exception as e:
             print(f"センサーのクリーンアップ中にエラーが発生しました: {e}")
\ No newline at end of file
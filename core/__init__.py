@@ -1,7 +1,26 @@
 """
 コアモジュール
 """
+from .calibration import CalibrationData, CalibrationStore
+from .event_store import SqliteWeightLogger, WeightEventStore
+from .log_writer import QueuedWeightLogger
 from .logger import WeightLogger
-from .state_machine import HydrationState, HydrationStateMachine
+from .settle_detector import DrinkDetector, PresenceDetector, SettleDetector
+from .state_machine import (
+    HydrationState,
+    HydrationStateMachine,
+    InvalidTransitionError,
+    Trigger,
+)
+from .timers import DeadlineScheduler, VirtualClock
+from .transition_journal import TransitionJournal, TransitionRecord
+from .zero_tracker import ZeroTracker
 
-__all__ = ['WeightLogger', 'HydrationState', 'HydrationStateMachine']
+__all__ = [
+    'CalibrationData', 'CalibrationStore',
+    'WeightLogger', 'QueuedWeightLogger', 'SqliteWeightLogger', 'WeightEventStore',
+    'HydrationState', 'HydrationStateMachine',
+    'DrinkDetector', 'PresenceDetector', 'SettleDetector', 'ZeroTracker',
+    'DeadlineScheduler', 'VirtualClock',
+    'Trigger', 'InvalidTransitionError', 'TransitionJournal', 'TransitionRecord',
+]
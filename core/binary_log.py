@@ -0,0 +1,138 @@
+"""
+重量ログのバイナリ形式
+
+CSVの代わりに使える固定長のバイナリ形式です。
+
+    ヘッダー（16バイト）: マジック b"HWLG", バージョン(uint16), レコード長(uint16), 予約(8バイト)
+    レコード（12バイト）: 時刻（UNIX時間のミリ秒, int64）, 重量（グラム, float32）
+
+すべてリトルエンディアンです。読み取りはファイルを mmap し、
+NumPy の構造化配列としてコピーせずに扱います。
+
+CSVへの変換:
+
+    python -m core.binary_log waiting_log/weight_log.bin [出力.csv]
+"""
+import mmap
+import struct
+import sys
+from datetime import datetime
+from typing import Optional
+
+MAGIC = b"HWLG"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")
+RECORD = struct.Struct("<qf")
+HEADER_SIZE = HEADER.size
+RECORD_SIZE = RECORD.size
+
+
+def header_bytes() -> bytes:
+    """ファイル先頭のヘッダーを返します"""
+    return HEADER.pack(MAGIC, VERSION, RECORD_SIZE)
+
+
+def check_header(data: bytes, path: str = "") -> None:
+    """
+    ヘッダーを検証します。
+
+    Raises:
+        ValueError: バイナリログではない、または対応していないバージョンの場合
+    """
+    if len(data) < HEADER_SIZE or data[:4] != MAGIC:
+        raise ValueError(f"'{path}' は重量ログのバイナリ形式ではありません")
+    _, version, record_size = HEADER.unpack_from(data)
+    if version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError(
+            f"'{path}' は対応していない形式です（バージョン {version}, レコード長 {record_size}）"
+        )
+
+
+def encode_record(weight: float, timestamp: datetime) -> bytes:
+    """
+    1件分のレコードを返します。
+
+    Args:
+        weight: 重量（グラム）
+        timestamp: 日時（タイムゾーンなしの場合はローカル時刻）
+    """
+    return RECORD.pack(round(timestamp.timestamp() * 1000), weight)
+
+
+def record_dtype():
+    """レコードの NumPy 構造化型（ts_ms: int64, weight: float32）"""
+    import numpy as np
+    return np.dtype([('ts_ms', '<i8'), ('weight', '<f4')])
+
+
+def read_binary_log(path: str):
+    """
+    バイナリログを mmap して構造化配列として返します。
+
+    配列はファイルの内容をコピーせずに参照する読み取り専用のビューです。
+    途中で切れた最後のレコードは含みません。
+
+    Args:
+        path: ログファイルのパス
+
+    Returns:
+        numpy.ndarray: ts_ms・weight を持つ構造化配列
+
+    Raises:
+        ValueError: バイナリログではない場合
+    """
+    import numpy as np
+    with open(path, 'rb') as f:
+        check_header(f.read(HEADER_SIZE), path)
+        f.seek(0, 2)
+        count = (f.tell() - HEADER_SIZE) // RECORD_SIZE
+        if count == 0:
+            return np.empty(0, dtype=record_dtype())
+        # マップはファイルを閉じた後も有効で、配列が参照している間は保持される
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, dtype=record_dtype(), count=count, offset=HEADER_SIZE)
+
+
+def is_binary_log(path: str) -> bool:
+    """ファイルがバイナリログの場合True"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def export_csv(path: str, csv_path: str) -> int:
+    """
+    バイナリログを WeightLogger と同じ形式のCSVに変換します。
+
+    Args:
+        path: バイナリログのパス
+        csv_path: 出力するCSVのパス
+
+    Returns:
+        int: 書き出したレコード数
+    """
+    records = read_binary_log(path)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        f.write("timestamp,weight_g\r\n")
+        for ts_ms, weight in zip(records['ts_ms'].tolist(), records['weight'].tolist()):
+            timestamp = datetime.fromtimestamp(ts_ms / 1000)
+            f.write(f"{timestamp.strftime('%Y-%m-%d %H:%M:%S')},{weight:.2f}\r\n")
+    return len(records)
+
+
+def main(argv: Optional[list] = None) -> None:
+    """バイナリログをCSVに変換します（スタンドアロン実行用）"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("使い方: python -m core.binary_log 入力.bin [出力.csv]")
+        return
+    source = argv[0]
+    target = argv[1] if len(argv) > 1 else source.rsplit('.', 1)[0] + ".csv"
+    count = export_csv(source, target)
+    print(f"'{source}' の {count} 件を '{target}' に書き出しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+センサーキャリブレーションの永続化モジュール
+
+オフセット・参照単位・ゲイン・読み取りフォーマットを
+バージョン付きのJSONファイルに保存し、起動時に読み込みます。
+"""
+import json
+import os
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+# ファイル形式のバージョン（互換性のない変更をしたら上げる）
+CALIBRATION_VERSION = 1
+
+
+@dataclass
+class CalibrationData:
+    """HX711のキャリブレーション値"""
+    offset: float
+    reference_unit: float
+    gain: int = 128
+    byte_format: str = "MSB"
+    bit_format: str = "MSB"
+    offset_b: Optional[float] = None
+    reference_unit_b: Optional[float] = None
+    saved_at: str = ""
+
+
+class CalibrationStore:
+    """
+    キャリブレーションファイルを読み書きするクラス
+    """
+
+    def __init__(self, file_path: str):
+        """
+        ストアを初期化します。
+
+        Args:
+            file_path: キャリブレーションファイルのパス
+        """
+        self.file_path = file_path
+
+    def load(self) -> Optional[CalibrationData]:
+        """
+        キャリブレーション値を読み込みます。
+
+        Returns:
+            Optional[CalibrationData]: ファイルがない、壊れている、
+                またはバージョンが異なる場合はNone
+        """
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"キャリブレーションファイルを読み込めませんでした: {e}")
+            return None
+
+        if not isinstance(payload, dict) or payload.get('version') != CALIBRATION_VERSION:
+            print("キャリブレーションファイルのバージョンが異なるため使用しません。")
+            return None
+
+        names = {f.name for f in fields(CalibrationData)}
+        try:
+            return CalibrationData(**{k: v for k, v in payload.items() if k in names})
+        except TypeError as e:
+            print(f"キャリブレーションファイルの内容が不正です: {e}")
+            return None
+
+    def save(self, data: CalibrationData) -> bool:
+        """
+        キャリブレーション値を保存します。
+
+        一時ファイルに書き込んでから置き換えるため、
+        書き込み途中で電源が落ちても既存のファイルは壊れません。
+
+        Args:
+            data: 保存するキャリブレーション値
+
+        Returns:
+            bool: 保存に成功した場合True
+        """
+        data.saved_at = datetime.now().isoformat(timespec='seconds')
+        payload = {'version': CALIBRATION_VERSION, **asdict(data)}
+        tmp_path = f"{self.file_path}.tmp"
+        try:
+            Path(self.file_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            return True
+        except OSError as e:
+            print(f"キャリブレーションファイルの保存に失敗しました: {e}")
+            return False
@@ -0,0 +1,214 @@
+"""
+SQLite（WALモード）の重量ログ
+
+CSVログの代わりに使える、標準ライブラリ sqlite3 によるログです。
+
+    weight_log(id, ts_ms, weight_g, synced)
+
+時刻（UNIX時間のミリ秒）と未同期の行にインデックスがあるため、
+同期処理は未同期の行だけを1回のクエリで取得でき、ファイル全体を読み直したり移動したりしません。
+WALモードでは、記録するプロセスと同期処理のプロセスが互いの読み取りを待たせません
+（書き込み同士は短時間だけ順番待ちになります）。
+"""
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from .logger import WeightLogger
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weight_log (
+    id INTEGER PRIMARY KEY,
+    ts_ms INTEGER NOT NULL,
+    weight_g REAL NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS weight_log_ts ON weight_log (ts_ms);
+CREATE INDEX IF NOT EXISTS weight_log_unsynced ON weight_log (ts_ms) WHERE synced = 0;
+"""
+
+# 書き込みが重なったときに待つ最大時間（秒）
+BUSY_TIMEOUT_S = 5.0
+
+
+def is_sqlite_log(path: str) -> bool:
+    """ファイルがSQLiteのデータベースの場合True"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+def _connect(path: str, synchronous: str = "NORMAL") -> sqlite3.Connection:
+    """WALモードで接続し、テーブルとインデックスを作成します"""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SqliteWeightLogger(WeightLogger):
+    """
+    重量データをSQLiteに記録するクラス
+
+    行のバッファ・書き出しのしきい値・fsync の方針は WeightLogger と同じです。
+    書き出しはバッファした行を1つのトランザクションでまとめて挿入します。
+    fsync の方針が "always" の場合はコミットごとに同期し（synchronous=FULL）、
+    それ以外は方針に従ってチェックポイントで同期します。
+    """
+
+    LOG_FORMATS = ("sqlite",)
+    _write_errors = (OSError, sqlite3.Error)
+
+    def __init__(
+        self,
+        log_file_path: str,
+        flush_rows: int = 64,
+        flush_interval_s: float = 5.0,
+        fsync_policy: str = "interval",
+        fsync_interval_s: float = 60.0,
+        clock=time.monotonic
+    ):
+        """
+        ロガーを初期化し、データベースを開きます。
+
+        Args:
+            log_file_path: データベースファイルのパス
+            flush_rows: バッファがこの行数に達したら書き出す
+            flush_interval_s: 最初の行をバッファしてからこの時間（秒）で書き出す
+            fsync_policy: fsync の方針（"always", "interval", "never"）
+            fsync_interval_s: "interval" の場合の fsync の最短間隔（秒）
+            clock: 単調時計
+        """
+        self._conn: Optional[sqlite3.Connection] = None
+        super().__init__(
+            log_file_path, flush_rows, flush_interval_s, fsync_policy, fsync_interval_s,
+            log_format="sqlite", clock=clock
+        )
+
+    def _open(self) -> bool:
+        created = not os.path.exists(self.log_file_path)
+        synchronous = "FULL" if self.fsync_policy == "always" else "NORMAL"
+        self._conn = _connect(self.log_file_path, synchronous)
+        return created
+
+    def _encode_row(self, weight: float, timestamp: datetime, timestamp_str: str):
+        return round(timestamp.timestamp() * 1000), weight
+
+    def _row_size(self, row) -> int:
+        # 行はタプルで、ファイルのバイト数には対応しない。サイズはデータベースとWALから求める
+        return 0
+    
+    def _write_rows(self, rows: list) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO weight_log (ts_ms, weight_g) VALUES (?, ?)", rows
+            )
+
+    def _sync(self) -> None:
+        # WALの内容をデータベースに反映し、両方を fsync する
+        self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def _is_open(self) -> bool:
+        return self._conn is not None
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_log_file_size(self) -> int:
+        """
+        データベースのサイズ（WALを含む）を取得します。
+        
+        まだ書き出していない行は含みません。
+
+        Returns:
+            int: サイズ（バイト）、ファイルが存在しない場合は0
+        """
+        size = 0
+        for path in (self.log_file_path, self.log_file_path + "-wal"):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+
+class WeightEventStore:
+    """
+    SQLiteの重量ログを読み取るクラス（同期処理・履歴の参照用）
+
+    記録中のプロセスと同時に使用できます。
+    """
+
+    def __init__(self, path: str):
+        """
+        データベースを開きます。
+
+        Args:
+            path: データベースファイルのパス
+        """
+        self.path = path
+        self._conn = _connect(path)
+
+    def unsynced(self) -> Tuple[List[Tuple[int, float]], Optional[Tuple[int, float]], int]:
+        """
+        未同期の行を時刻順に取得します。
+
+        Returns:
+            Tuple: (未同期の行 [(ts_ms, weight_g)], 直前に同期した行（なければNone）,
+                    取得した行の最大ID（mark_synced() に渡す）)
+        """
+        rows = self._conn.execute(
+            "SELECT id, ts_ms, weight_g FROM weight_log WHERE synced = 0 ORDER BY ts_ms, id"
+        ).fetchall()
+        if not rows:
+            return [], None, 0
+        previous = self._conn.execute(
+            "SELECT ts_ms, weight_g FROM weight_log"
+            " WHERE synced = 1 AND ts_ms <= ? ORDER BY ts_ms DESC, id DESC LIMIT 1",
+            (rows[0][1],)
+        ).fetchone()
+        return [(ts, weight) for _, ts, weight in rows], previous, max(row[0] for row in rows)
+
+    def mark_synced(self, max_id: int) -> int:
+        """
+        unsynced() で取得した行を同期済みにします。
+
+        取得した後に記録された行（IDが max_id より大きい行）は対象外です。
+
+        Returns:
+            int: 同期済みにした行数
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "UPDATE weight_log SET synced = 1 WHERE synced = 0 AND id <= ?", (max_id,)
+            )
+        return cursor.rowcount
+
+    def history(self, start: datetime, end: datetime) -> List[Tuple[datetime, float]]:
+        """
+        指定した期間の記録を取得します。
+
+        Args:
+            start: 開始日時（含む）
+            end: 終了日時（含まない）
+
+        Returns:
+            List[Tuple[datetime, float]]: (日時, 重量) のリスト
+        """
+        rows = self._conn.execute(
+            "SELECT ts_ms, weight_g FROM weight_log WHERE ts_ms >= ? AND ts_ms < ? ORDER BY ts_ms",
+            (round(start.timestamp() * 1000), round(end.timestamp() * 1000))
+        ).fetchall()
+        return [(datetime.fromtimestamp(ts / 1000), weight) for ts, weight in rows]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,203 @@
+"""
+重量ログの書き込みキュー
+
+記録を有限長のキューに入れてすぐに戻り、専用の書き込みスレッドが WeightLogger へ書き込みます。
+SDカードへの書き込みが遅くても、監視ループ（イベントループ）やセンサー・サーボの処理は待たされません。
+
+キューが満杯のときの動作（overflow）:
+    - block:       空きができるまで待つ（記録は失われないが、呼び出し側が待たされる）
+    - drop_oldest: 最も古い記録を捨てて追加する
+    - spill:       メモリ上にあふれさせて追加する（spill_limit を超えると最も古い記録を捨てる）
+"""
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .logger import WeightLogger
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+
+class QueuedWeightLogger:
+    """
+    WeightLogger の前段に置く書き込みキュー
+
+    log_weight() は記録の日時をその場で決めてキューに入れるだけなので、
+    書き込みが遅れてもログの日時はずれません。
+    """
+
+    def __init__(
+        self,
+        logger: WeightLogger,
+        capacity: int = 256,
+        overflow: str = "spill",
+        spill_limit: int = 10000
+    ):
+        """
+        書き込みキューを初期化し、書き込みスレッドを開始します。
+
+        Args:
+            logger: 書き込み先のロガー
+            capacity: キューの容量（記録数）
+            overflow: キューが満杯のときの動作（"block", "drop_oldest", "spill"）
+            spill_limit: "spill" の場合にメモリ上に保持する記録数の上限（容量を含む）
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than zero")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.logger = logger
+        self.capacity = capacity
+        self.overflow = overflow
+        self.spill_limit = max(capacity, spill_limit)
+        self._queue: Deque[Tuple[float, datetime]] = deque()
+        self._cond = threading.Condition()
+        self._writing = False
+        self._closed = False
+        # メトリクス（書き込んだ行数と書き出しの失敗はロガーが数える）
+        self.dropped_count = 0
+        self.spilled_count = 0
+        # ロガーが例外を送出し、失われた記録の数
+        self.error_count = 0
+        self.max_depth = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def log_file_path(self) -> str:
+        return self.logger.log_file_path
+
+    @property
+    def depth(self) -> int:
+        """キューに残っている記録数"""
+        with self._cond:
+            return len(self._queue)
+
+    def log_weight(self, weight: float, timestamp: Optional[datetime] = None) -> bool:
+        """
+        記録をキューに入れます。
+
+        Args:
+            weight: 記録する重量（グラム）
+            timestamp: 記録する日時（省略時は現在時刻）
+
+        Returns:
+            bool: キューに入れた場合True（閉じた後はFalse）
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.capacity:
+                if self.overflow == "block":
+                    while len(self._queue) >= self.capacity and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return False
+                elif self.overflow == "drop_oldest":
+                    self._drop_oldest()
+                else:
+                    if len(self._queue) >= self.spill_limit:
+                        self._drop_oldest()
+                    self.spilled_count += 1
+            self._queue.append((weight, timestamp))
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+        return True
+
+    def _drop_oldest(self) -> None:
+        weight, timestamp = self._queue.popleft()
+        self.dropped_count += 1
+        if self.dropped_count == 1 or self.dropped_count % 100 == 0:
+            print(f"\n[警告] ログの書き込みが追いつかないため記録を破棄しました（累計 {self.dropped_count} 件）")
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        キューの記録がすべて書き込まれるまで待ちます。
+
+        Args:
+            timeout: 最大待ち時間（秒）。Noneの場合は書き込まれるまで待つ
+
+        Returns:
+            bool: すべて書き込まれた場合True
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._writing, timeout
+            )
+
+    def get_log_file_size(self) -> int:
+        """ログファイルのサイズ（バイト）を返します"""
+        return self.logger.get_log_file_size()
+
+    def telemetry(self) -> Dict[str, Any]:
+        """
+        書き込みキューのメトリクスを返します。
+
+        書き込み件数はロガーが実際にファイルに書き込んだ行数で、バッファに残っている行は含みません。
+        書き出しに失敗した行はバッファに残って再試行されるため、失敗は flush_error_count に
+        書き出しの回数として数えます。
+        書き込みレイテンシは、ロガーがファイルへの書き出し・fsync・封印にかけた時間です
+        （バッファへの追加だけで戻った記録は含みません）。
+
+        Returns:
+            Dict[str, Any]: キューの深さ・書き込み件数・破棄件数・書き込みレイテンシ
+        """
+        flush = self.logger.flush_telemetry()
+        with self._cond:
+            return {
+                'depth': len(self._queue),
+                'max_depth': self.max_depth,
+                'capacity': self.capacity,
+                'overflow': self.overflow,
+                'written_count': flush['rows_written'],
+                'dropped_count': self.dropped_count,
+                'spilled_count': self.spilled_count,
+                'error_count': self.error_count,
+                'flush_count': flush['flush_count'],
+                'flush_error_count': flush['flush_error_count'],
+                'last_write_latency_s': flush['last_flush_duration_s'],
+                'max_write_latency_s': flush['max_flush_duration_s'],
+                'mean_write_latency_s': flush['mean_flush_duration_s'],
+            }
+
+    def cleanup(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        キューの記録を書き込んでから書き込みスレッドを止め、ロガーを閉じます。
+
+        Args:
+            timeout: 書き込みを待つ最大時間（秒）
+        """
+        self.drain(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._queue:
+            print(f"\n[警告] 書き込めなかった記録が {len(self._queue)} 件あります")
+        self.logger.cleanup()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                weight, timestamp = self._queue.popleft()
+                self._writing = True
+                # block の場合に待っている呼び出し側を起こす
+                self._cond.notify_all()
+            # 戻り値の False は書き出しの失敗で、行はロガーのバッファに残って再試行される
+            lost = False
+            try:
+                self.logger.log_weight(weight, timestamp)
+            except Exception as e:
+                print(f"\n[エラー] ログの書き込み中にエラーが発生しました: {e}")
+                lost = True
+            with self._cond:
+                self._writing = False
+                if lost:
+                    self.error_count += 1
+                self._cond.notify_all()
@@ -1,30 +1,161 @@
 """
 重量データのロギングを管理するモジュール
 
-CSVファイルへの重量データ記録を担当します。
+CSVファイル（または core/binary_log.py の固定長バイナリ形式）への重量データ記録を担当します。
+
+ファイルは開いたままにして、記録を行単位でバッファします。
+バッファは行数または経過時間のしきい値で書き出し、fsync は設定した方針で行います。
+記録のたびにファイルを開閉しないため、SDカードへのメタデータの書き込みが減ります。
+
+行は書き出しのたびに完全な行だけをまとめて1回で書き込みます。
+それでも電源断で最後の行が途中まで書かれた場合は、次回起動時にその行を切り捨てます。
+
+セグメントを有効にすると、ファイルがサイズまたは経過時間のしきい値に達するたびに、
+fsync してから番号付きのファイル（weight_log.000001.csv など）に名前を変えて封印し、
+新しいファイルに記録を続けます。封印したファイルにはもう書き込まないため、
+同期処理は封印済みのファイルだけを読み取り、記録中のファイルには触れません。
 """
-import csv
+import glob
 import os
+import re
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
+
+from . import binary_log
+
+# fsync の方針
+#   always:   書き出しのたびに fsync
+#   interval: 前回の fsync から fsync_interval_s 以上経っていれば fsync
+#   never:    cleanup() のときだけ fsync
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# ログの形式
+LOG_FORMATS = ("csv", "binary")
+
+# 行末は以前の csv.writer と同じ "\r\n"（既存のログファイルに追記しても改行が混在しない）
+NEWLINE = "\r\n"
+
+HEADER = "timestamp,weight_g" + NEWLINE
+
+
+def segment_path(log_file_path: str, seq: int) -> str:
+    """
+    封印したセグメントのパスを返します。
+    
+    例: waiting_log/weight_log.csv → waiting_log/weight_log.000001.csv
+    """
+    stem, ext = os.path.splitext(log_file_path)
+    return f"{stem}.{seq:06d}{ext}"
+
+
+def sealed_segments(log_file_path: str) -> List[str]:
+    """
+    封印済みのセグメントを番号順に返します。
+    
+    Args:
+        log_file_path: 記録中のログファイルのパス
+    
+    Returns:
+        List[str]: セグメントのパス（古い順）
+    """
+    stem, ext = os.path.splitext(log_file_path)
+    pattern = re.compile(re.escape(stem) + r"\.(\d{6,})" + re.escape(ext) + "$")
+    numbered = []
+    for path in glob.glob(glob.escape(stem) + ".*" + glob.escape(ext)):
+        match = pattern.match(path)
+        if match:
+            numbered.append((int(match.group(1)), path))
+    return [path for _, path in sorted(numbered)]
 
 
 class WeightLogger:
     """
     重量データをCSVファイルに記録するクラス
+    
+    書き込み先を変えるサブクラス（core/event_store.py）は、
+    _open / _encode_row / _row_size / _write_rows / _sync / _close を上書きします。
     """
     
-    def __init__(self, log_file_path: str):
+    LOG_FORMATS = LOG_FORMATS
+    
+    # 書き出しの失敗として扱う例外
+    _write_errors: tuple = (OSError,)
+    
+    def __init__(
+        self,
+        log_file_path: str,
+        flush_rows: int = 64,
+        flush_interval_s: float = 5.0,
+        fsync_policy: str = "interval",
+        fsync_interval_s: float = 60.0,
+        log_format: str = "csv",
+        segment_max_bytes: int = 0,
+        segment_max_age_s: float = 0.0,
+        clock=time.monotonic
+    ):
         """
         ロガーを初期化します。
         
         Args:
             log_file_path: ログファイルのパス
+            flush_rows: バッファがこの行数に達したら書き出す
+            flush_interval_s: 最初の行をバッファしてからこの時間（秒）で書き出す
+            fsync_policy: fsync の方針（"always", "interval", "never"）
+            fsync_interval_s: "interval" の場合の fsync の最短間隔（秒）
+            log_format: ログの形式（"csv", "binary"）
+            segment_max_bytes: ファイルがこのサイズに達したら封印する（0で無効）
+            segment_max_age_s: 最初の行を書き込んでからこの時間（秒）で封印する（0で無効）
+            clock: 単調時計
         """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync_policy}")
+        if log_format not in self.LOG_FORMATS:
+            raise ValueError(f"unknown log format: {log_format}")
         self.log_file_path = log_file_path
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval_s = flush_interval_s
+        self.fsync_policy = fsync_policy
+        self.fsync_interval_s = fsync_interval_s
+        self.log_format = log_format
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age_s = segment_max_age_s
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._rows: list = []
+        self._pending_bytes = 0
+        self._timer: Optional[threading.Timer] = None
+        self._fd: Optional[int] = None
+        self._unsynced = False
+        self._last_fsync = clock()
+        # strftime は秒が変わったときだけ呼ぶ
+        self._ts_second: Optional[datetime] = None
+        self._ts_str = ""
+        # 現在のファイルに最初の行を書き込んだ時刻（行がない場合None）
+        self._segment_started: Optional[float] = None
+        self._segment_seq = 0
+        # 書き出しのメトリクス（fsync・封印を含む所要時間）
+        self.flush_count = 0
+        self.flush_error_count = 0
+        self.rows_written = 0
+        self.last_flush_duration_s = 0.0
+        self.max_flush_duration_s = 0.0
+        self._total_flush_duration_s = 0.0
         self._ensure_log_directory()
         self._initialize_log_file()
+        if self.segmented:
+            sealed = sealed_segments(log_file_path)
+            if sealed:
+                self._segment_seq = int(sealed[-1].rsplit('.', 2)[-2])
+            if self._has_rows():
+                self._segment_started = clock()
+    
+    @property
+    def segmented(self) -> bool:
+        """セグメントの封印が有効な場合True"""
+        return self._fd is not None and (self.segment_max_bytes > 0 or self.segment_max_age_s > 0)
     
     def _ensure_log_directory(self) -> None:
         """ログディレクトリが存在することを確認します"""
@@ -33,51 +164,350 @@ class WeightLogger:
     
     def _initialize_log_file(self) -> None:
         """
-        ログファイルが存在しない場合にヘッダーを書き込みます。
+        ログファイルを開きます。
+        
+        存在しない場合はヘッダーを書き込み、途中で切れた最後の行があれば切り捨てます。
         """
-        try:
-            with open(self.log_file_path, 'x', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['timestamp', 'weight_g'])
-                print(f"ログファイル '{self.log_file_path}' を作成しました。")
-        except FileExistsError:
-            # ファイルが既に存在する場合は何もしない
+        created = self._open()
+        if created:
+            print(f"ログファイル '{self.log_file_path}' を作成しました。")
+        else:
             print(f"ログファイル '{self.log_file_path}' を使用します。")
     
+    def _open(self) -> bool:
+        """
+        ログファイルを追記用に開きます。
+        
+        Returns:
+            bool: ファイルを新しく作成した（ヘッダーを書き込んだ）場合True
+        """
+        fd = os.open(self.log_file_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if self.log_format == "binary":
+                size = self._repair_torn_record(fd, size)
+            else:
+                size = self._repair_torn_row(fd, size)
+            if size == 0:
+                if self.log_format == "binary":
+                    os.write(fd, binary_log.header_bytes())
+                else:
+                    os.write(fd, HEADER.encode('utf-8'))
+                os.fsync(fd)
+        except (OSError, ValueError):
+            os.close(fd)
+            raise
+        self._fd = fd
+        return size == 0
+    
+    def _repair_torn_row(self, fd: int, size: int) -> int:
+        """
+        最後の行が改行で終わっていない場合、その行を切り捨てます。
+        
+        行末は "\r\n" のため、"\r" で切れた行も "\n" を探して切り捨てます。
+        
+        Returns:
+            int: 修復後のファイルサイズ
+        """
+        if size == 0 or os.pread(fd, 1, size - 1) == b"\n":
+            return size
+        # 末尾から最後の改行を探す
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            chunk = os.pread(fd, end - start, start)
+            index = chunk.rfind(b"\n")
+            if index >= 0:
+                end = start + index + 1
+                break
+            end = start
+        os.ftruncate(fd, end)
+        os.fsync(fd)
+        print(f"ログファイル '{self.log_file_path}' の途中で切れた最後の行（{size - end} バイト）を削除しました。")
+        return end
+    
+    def _repair_torn_record(self, fd: int, size: int) -> int:
+        """
+        バイナリ形式で、途中で切れた最後のレコード（またはヘッダー）を切り捨てます。
+        
+        Returns:
+            int: 修復後のファイルサイズ
+        
+        Raises:
+            ValueError: 既存のファイルがバイナリログではない場合
+        """
+        if size >= binary_log.HEADER_SIZE:
+            binary_log.check_header(os.pread(fd, binary_log.HEADER_SIZE, 0), self.log_file_path)
+            records = (size - binary_log.HEADER_SIZE) // binary_log.RECORD_SIZE
+            end = binary_log.HEADER_SIZE + records * binary_log.RECORD_SIZE
+        else:
+            end = 0
+        if end == size:
+            return size
+        os.ftruncate(fd, end)
+        os.fsync(fd)
+        print(f"ログファイル '{self.log_file_path}' の途中で切れた最後のレコード（{size - end} バイト）を削除しました。")
+        return end
+    
+    def _header_size(self) -> int:
+        if self.log_format == "binary":
+            return binary_log.HEADER_SIZE
+        return len(HEADER.encode('utf-8'))
+    
+    def _has_rows(self) -> bool:
+        """現在のファイルにヘッダー以外の行がある場合True"""
+        return os.fstat(self._fd).st_size > self._header_size()
+    
+    def _segment_due(self) -> bool:
+        """現在のファイルを封印するしきい値に達している場合True"""
+        if self._segment_started is None:
+            return False
+        if self.segment_max_bytes > 0 and self.get_log_file_size() >= self.segment_max_bytes:
+            return True
+        return (
+            self.segment_max_age_s > 0
+            and self._clock() - self._segment_started >= self.segment_max_age_s
+        )
+    
+    def _seal_segment(self) -> Optional[str]:
+        """
+        現在のファイルを fsync して番号付きのファイルに名前を変え、新しいファイルを開きます。
+        
+        名前の変更はアトミックなため、同期処理からは封印前のファイルは見えません。
+        
+        Returns:
+            Optional[str]: 封印したファイルのパス（失敗した場合None）
+        """
+        sealed = segment_path(self.log_file_path, self._segment_seq + 1)
+        try:
+            os.fsync(self._fd)
+            self._unsynced = False
+            self._last_fsync = self._clock()
+            os.rename(self.log_file_path, sealed)
+            self._segment_seq += 1
+            # 名前の変更を永続化する
+            dir_fd = os.open(os.path.dirname(os.path.abspath(sealed)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError as e:
+            print(f"\n[エラー] ログファイルの封印に失敗しました: {e}")
+            return None
+        finally:
+            if not os.path.exists(self.log_file_path):
+                os.close(self._fd)
+                self._fd = None
+                self._open()
+                self._segment_started = None
+        print(f"ログファイルを '{sealed}' として封印しました。")
+        return sealed
+    
+    def _reopen_if_moved(self) -> None:
+        """同期処理でファイルが移動された場合は、新しいファイルを開き直します"""
+        try:
+            moved = os.stat(self.log_file_path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            moved = True
+        if moved:
+            os.close(self._fd)
+            self._fd = None
+            self._unsynced = False
+            self._segment_started = None
+            self._open()
+            print(f"ログファイル '{self.log_file_path}' を作成しました。")
+    
+    def _format_timestamp(self, timestamp: datetime) -> str:
+        second = timestamp.replace(microsecond=0)
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+        return self._ts_str
+    
+    def _encode_row(self, weight: float, timestamp: datetime, timestamp_str: str):
+        """1件分の行を返します"""
+        if self.log_format == "binary":
+            return binary_log.encode_record(weight, timestamp)
+        return f"{timestamp_str},{weight:.2f}{NEWLINE}".encode('utf-8')
+    
+    def _row_size(self, row) -> int:
+        """行がファイルに加えるバイト数（まだ書き出していない行のサイズの計算用）"""
+        return len(row)
+    
+    def _write_rows(self, rows: list) -> None:
+        """行をまとめてファイルに書き込みます"""
+        self._reopen_if_moved()
+        data = b"".join(rows)
+        written = os.write(self._fd, data)
+        while written < len(data):
+            written += os.write(self._fd, data[written:])
+    
+    def _sync(self) -> None:
+        """書き込んだ行をストレージに永続化します"""
+        os.fsync(self._fd)
+    
+    def _is_open(self) -> bool:
+        return self._fd is not None
+    
+    def _close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
     def log_weight(self, weight: float, timestamp: Optional[datetime] = None) -> bool:
         """
-        指定された日時と重量をCSVファイルに追記します。
+        指定された日時と重量をログファイルに追記します。
+        
+        行はバッファされ、flush_rows 行に達するか flush_interval_s が経つと書き出されます。
         
         Args:
             weight: 記録する重量（グラム）
             timestamp: 記録する日時（省略時は現在時刻）
         
         Returns:
-            bool: 記録に成功した場合True
+            bool: 記録に成功した場合True（書き出しに失敗した場合False）
         """
         if timestamp is None:
             timestamp = datetime.now()
         
-        timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        
-        try:
-            with open(self.log_file_path, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([timestamp_str, f"{weight:.2f}"])
+        with self._lock:
+            timestamp_str = self._format_timestamp(timestamp)
+            row = self._encode_row(weight, timestamp, timestamp_str)
+            self._rows.append(row)
+            self._pending_bytes += self._row_size(row)
             print(f"\n[記録] {timestamp_str}, 重量: {weight:.2f} g")
+            if len(self._rows) >= self.flush_rows:
+                return self.flush()
+            if len(self._rows) == 1:
+                # fsync 待ちのタイマーより先に、この行の書き出しを予約する
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._schedule_flush(self.flush_interval_s)
+        return True
+    
+    def _schedule_flush(self, delay_s: float) -> None:
+        self._timer = threading.Timer(delay_s, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def flush(self, fsync: bool = False) -> bool:
+        """
+        バッファした行をファイルに書き出します。
+        
+        Args:
+            fsync: 方針にかかわらず fsync する場合True
+        
+        Returns:
+            bool: 書き出しに成功した場合True
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._is_open():
+                return not self._rows
+            started = time.monotonic()
+            written = 0
+            synced = False
+            try:
+                if self._rows:
+                    self._write_rows(self._rows)
+                    written = len(self._rows)
+                    # fsync に失敗しても、書き込んだ行は再試行しないため数える
+                    self.rows_written += written
+                    self._rows.clear()
+                    self._pending_bytes = 0
+                    self._unsynced = True
+                    if self._segment_started is None:
+                        self._segment_started = self._clock()
+                if self.segmented and self._segment_due():
+                    # 封印の前に fsync する
+                    self._seal_segment()
+                    synced = True
+                elif self._unsynced and (fsync or self._should_fsync()):
+                    self._sync()
+                    self._unsynced = False
+                    self._last_fsync = self._clock()
+                    synced = True
+                if written or synced:
+                    self._record_flush(time.monotonic() - started)
+                self._schedule_pending()
+                return True
+            except self._write_errors as e:
+                # 書き出せなかった行はバッファに残し、次の書き出しで再試行する
+                self.flush_error_count += 1
+                print(f"\n[エラー] ログファイルへの書き込みに失敗しました: {e}")
+                return False
+    
+    def _record_flush(self, duration_s: float) -> None:
+        """書き出し1回分の所要時間を記録します（ロックを保持して呼び出す）"""
+        self.flush_count += 1
+        self.last_flush_duration_s = duration_s
+        self.max_flush_duration_s = max(self.max_flush_duration_s, duration_s)
+        self._total_flush_duration_s += duration_s
+    
+    def flush_telemetry(self) -> dict:
+        """
+        書き出しのメトリクスを返します。
+        
+        所要時間はファイルへの書き込み・fsync・封印を含む、実際にストレージを待った時間です。
+        
+        Returns:
+            dict: 書き出し回数・失敗した書き出しの回数・ファイルに書き込んだ行数・所要時間（秒）
+        """
+        with self._lock:
+            count = self.flush_count
+            return {
+                'flush_count': count,
+                'flush_error_count': self.flush_error_count,
+                'rows_written': self.rows_written,
+                'last_flush_duration_s': self.last_flush_duration_s,
+                'max_flush_duration_s': self.max_flush_duration_s,
+                'mean_flush_duration_s': self._total_flush_duration_s / count if count else 0.0,
+            }
+    
+    def _schedule_pending(self) -> None:
+        """記録が途絶えても、fsync と経過時間による封印が遅れないよう書き出しを予約します"""
+        delays = []
+        if self._unsynced and self.fsync_policy == "interval":
+            delays.append(self._last_fsync + self.fsync_interval_s - self._clock())
+        if self.segmented and self.segment_max_age_s > 0 and self._segment_started is not None:
+            delays.append(self._segment_started + self.segment_max_age_s - self._clock())
+        if delays:
+            self._schedule_flush(max(0.0, min(delays)))
+    
+    def _should_fsync(self) -> bool:
+        if self.fsync_policy == "always":
             return True
-        except IOError as e:
-            print(f"\n[エラー] ログファイルへの書き込みに失敗しました: {e}")
-            return False
+        if self.fsync_policy == "interval":
+            return self._clock() - self._last_fsync >= self.fsync_interval_s
+        return False
+    
+    def cleanup(self) -> None:
+        """
+        バッファを書き出して fsync し、ファイルを閉じます。
+        
+        セグメントが有効な場合は、行のあるファイルを封印してから閉じます。
+        """
+        with self._lock:
+            self.flush(fsync=True)
+            if self.segmented and self._segment_started is not None:
+                self._seal_segment()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._close()
     
     def get_log_file_size(self) -> int:
         """
         ログファイルのサイズを取得します。
         
+        まだ書き出していない行のバイト数も含みます。
+        
         Returns:
             int: ファイルサイズ（バイト）、ファイルが存在しない場合は0
         """
         try:
-            return os.path.getsize(self.log_file_path)
+            return os.path.getsize(self.log_file_path) + self._pending_bytes
         except OSError:
             return 0
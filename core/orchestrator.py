@@ -0,0 +1,394 @@
+"""
+イベント駆動の監視エンジン
+
+センサーのサンプル・タイマーの期限・サーボ動作の完了をメッセージとして
+1本のイベントキューに流し、現在の状態に応じて処理します。
+固定時間のsleepによるポーリングは行わず、イベントがない間はCPUを使いません。
+期限はステートマシンの DeadlineScheduler に登録されたもののうち、
+最も近いものだけをイベントループのタイマーで待ちます。
+
+サーボの動作はモーションエンジンの専用スレッドで再生され、
+返された MotionHandle を await して、完了するとServoDoneEventがキューに入ります。
+サーボの動作や検知状態の初期化は、ステートマシンの遷移リスナーとして行います。
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Union
+
+from utils.cancellation import CancellationToken
+
+from .settle_detector import DrinkDetector, PresenceDetector, SettleDetector
+from .state_machine import (
+    ALERT_END,
+    MONITORING_TIMEOUT,
+    HydrationState,
+    HydrationStateMachine,
+)
+from .transition_journal import TransitionRecord
+
+if TYPE_CHECKING:
+    from config.settings import MonitoringConfig
+    from controllers.async_weight_sensor import AsyncWeightSensor
+    from controllers.servo_controller import ServoController
+
+
+@dataclass(frozen=True)
+class SampleEvent:
+    """センサーのサンプル"""
+    timestamp: float
+    weight: float
+
+
+@dataclass(frozen=True)
+class TimerEvent:
+    """ステートマシンに登録した期限の到来"""
+    name: str
+
+
+@dataclass(frozen=True)
+class ServoDoneEvent:
+    """サーボ動作の完了"""
+    action: str
+    interrupted: bool = False
+
+
+Event = Union[SampleEvent, TimerEvent, ServoDoneEvent]
+
+
+class HydrationOrchestrator:
+    """
+    重量センサー・タイマー・サーボのイベントでステートマシンを進めるクラス
+
+    状態ごとの処理は次のとおりです。
+    - IDLE: コップの設置を検知し、重量が安定したら監視を開始
+    - MONITORING: 水分補給（重量の減少）を検知したらIDLEへ、
+      期限までなければ警告を開始
+    - ALERTING: 水分補給を検知するか警告時間が終わったら
+      キャンセルトークンでサーボを止め、初期位置に戻した後にIDLEへ
+
+    警告中の水分補給から回転停止までの時間は alert_stop_latencies_s に記録します。
+    """
+
+    def __init__(
+        self,
+        state_machine: HydrationStateMachine,
+        sensor: "AsyncWeightSensor",
+        servo: "ServoController",
+        monitoring: "MonitoringConfig",
+        status_interval_s: float = 1.0
+    ):
+        """
+        エンジンを初期化します。
+
+        Args:
+            state_machine: ステートマシン
+            sensor: 非同期の重量センサー
+            servo: サーボコントローラ
+            monitoring: 監視ロジック設定
+            status_interval_s: 現在の重量を表示する間隔（秒）
+        """
+        self.state_machine = state_machine
+        self.sensor = sensor
+        self.servo = servo
+        self.monitoring = monitoring
+        self.status_interval_s = status_interval_s
+
+        threshold = monitoring.WEIGHT_THRESHOLD_G
+        self._presence = PresenceDetector(
+            on_threshold_g=threshold,
+            off_threshold_g=threshold - monitoring.PRESENCE_HYSTERESIS_G
+        )
+        self._settle = SettleDetector(
+            window_s=monitoring.SETTLE_WINDOW_S,
+            tolerance_g=monitoring.SETTLE_TOLERANCE_G,
+            max_slope_g_per_s=monitoring.SETTLE_MAX_SLOPE_G_S
+        )
+        self._drink = DrinkDetector(threshold, monitoring.DRINK_CONFIRM_SAMPLES)
+        self._detected_at: Optional[float] = None
+        # 水分補給でIDLEに戻った場合は、次のコップ設置でタイマーをリセットする
+        self._after_drink = False
+        self._alert_start_weight = 0.0
+        self._last_status_ts = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake_handle: Optional[asyncio.TimerHandle] = None
+        self._wake_due: Optional[float] = None
+        self._servo_task: Optional[asyncio.Task] = None
+        self._alert_token: Optional[CancellationToken] = None
+        self._drink_at: Optional[float] = None
+        self._alert_stopped_at: Optional[float] = None
+        # 警告中の水分補給（最初にしきい値を超えたサンプル）から回転停止までの時間（秒）
+        self.alert_stop_latencies_s: List[float] = []
+
+        state_machine.add_listener(self._on_transition)
+
+    @property
+    def servo_busy(self) -> bool:
+        """サーボが動作中の場合True"""
+        return self._servo_task is not None and not self._servo_task.done()
+
+    async def run(self) -> None:
+        """
+        イベントループでエンジンを実行します。
+
+        キャンセルされるまで戻りません。
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        producer = asyncio.create_task(self._pump_samples())
+        try:
+            print("=== プログラムを開始します ===\n")
+            self._start_servo(
+                "initial", lambda: self.servo.move_to_initial_position(gradual=False)
+            )
+            self.state_machine.transition_to_idle()
+            while True:
+                event = await self._queue.get()
+                self.dispatch(event)
+                self._rearm_deadline()
+        finally:
+            producer.cancel()
+            if self._wake_handle is not None:
+                self._wake_handle.cancel()
+            if self._alert_token is not None:
+                self._alert_token.cancel()
+
+    def post(self, event: Event) -> None:
+        """イベントをキューに追加します（イベントループ上で呼び出してください）"""
+        self._queue.put_nowait(event)
+
+    async def _pump_samples(self) -> None:
+        """センサーのサンプルをイベントキューに流します"""
+        async for timestamp, weight in self.sensor:
+            self.post(SampleEvent(timestamp, weight))
+
+    def dispatch(self, event: Event) -> None:
+        """
+        イベントを現在の状態のハンドラに渡します。
+
+        Args:
+            event: 処理するイベント
+        """
+        state = self.state_machine.state
+        if isinstance(event, SampleEvent):
+            self._print_status(event)
+            if state == HydrationState.IDLE:
+                self._idle_on_sample(event)
+            elif state == HydrationState.MONITORING:
+                self._monitoring_on_sample(event)
+            elif state == HydrationState.ALERTING:
+                self._alerting_on_sample(event)
+        elif isinstance(event, TimerEvent):
+            if event.name == MONITORING_TIMEOUT and state == HydrationState.MONITORING:
+                self._monitoring_on_timeout()
+            elif event.name == ALERT_END and state == HydrationState.ALERTING:
+                self._alerting_on_alert_end()
+        elif isinstance(event, ServoDoneEvent):
+            if event.action == "alert" and state == HydrationState.ALERTING:
+                self._alerting_on_servo_done(event)
+
+    def _on_transition(self, record: TransitionRecord) -> None:
+        """ステートマシンの遷移に合わせて、検知状態の初期化とサーボの操作を行います"""
+        if record.new_state == HydrationState.IDLE.name:
+            drank = record.old_state == HydrationState.MONITORING.name
+            if drank:
+                self._start_servo(
+                    "initial", lambda: self.servo.move_to_initial_position(gradual=True)
+                )
+            self._enter_idle(after_drink=drank)
+        elif record.new_state == HydrationState.MONITORING.name:
+            self._drink.reset()
+        elif record.new_state == HydrationState.ALERTING.name:
+            self._start_alert()
+
+    # --- IDLE ---
+
+    def _enter_idle(self, after_drink: bool) -> None:
+        self._after_drink = after_drink
+        self._presence.reset()
+        self._settle.reset()
+        self._detected_at = None
+        threshold = self.monitoring.WEIGHT_THRESHOLD_G
+        print(f"コップと水を置いてください。(約{threshold}g以上のものを検知します)")
+
+    def _idle_on_sample(self, event: SampleEvent) -> None:
+        if self.servo_busy:
+            # サーボが初期位置に戻るまでは重量が安定しないため判定しない
+            self._settle.reset()
+            return
+
+        if not self._presence.update(event.weight):
+            if self._detected_at is not None:
+                print("\nコップが取り除かれました。")
+            self._detected_at = None
+            self._settle.reset()
+            # 空の間はゼロ点の自動追従を行う
+            self.sensor.sensor.set_zero_tracking(True)
+            return
+
+        if self._detected_at is None:
+            print(f"\nコップを検知しました。初期重量: {event.weight:.2f} g")
+            self._detected_at = event.timestamp
+            self.sensor.sensor.set_zero_tracking(False)
+
+        settled = self._settle.update(event.timestamp, event.weight)
+        waited = event.timestamp - self._detected_at
+        if not settled and waited < self.monitoring.SETTLE_TIMEOUT_S:
+            return
+
+        stable_weight = self._settle.mean
+        if settled:
+            print(f"\n安定後の初期重量: {stable_weight:.2f} g（検知から {waited:.1f} 秒）")
+        else:
+            print(f"\n重量が安定しないため平均値を使用します: {stable_weight:.2f} g")
+
+        if self._after_drink:
+            self.state_machine.reset_monitoring_timer(stable_weight)
+        else:
+            self.state_machine.transition_to_monitoring(stable_weight)
+
+    # --- MONITORING ---
+
+    def _monitoring_on_sample(self, event: SampleEvent) -> None:
+        baseline = self.state_machine.last_significant_weight
+        if not self._drink.update(event.timestamp, baseline, event.weight):
+            return
+        print(f"\n水分補給を検知しました！ 重量変化: {self._drink.weight_diff:.2f} g")
+        self.state_machine.transition_to_idle()
+
+    def _monitoring_on_timeout(self) -> None:
+        duration_min = self.monitoring.MONITORING_DURATION_S / 60
+        print(f"\n{duration_min:.0f}分間、規定の重量変化がありませんでした。")
+        self.state_machine.transition_to_alerting()
+
+    # --- ALERTING ---
+
+    def _start_alert(self) -> None:
+        latest = self.sensor.latest
+        if latest is not None:
+            self._alert_start_weight = latest[1]
+        else:
+            self._alert_start_weight = self.state_machine.last_significant_weight
+        self._drink.reset()
+        self._drink_at = None
+        self._alert_stopped_at = None
+        self._alert_token = CancellationToken()
+        self._start_servo("alert", self._run_alert)
+
+    def _alerting_on_sample(self, event: SampleEvent) -> None:
+        if self._alert_token is None or self._alert_token.cancelled:
+            return
+        if self._drink.update(event.timestamp, self._alert_start_weight, event.weight):
+            # サーボのスレッドはトークンの待機から即座に戻る
+            self._alert_token.cancel()
+            self._drink_at = self._drink.first_crossed_at
+            print("\n警告中に水分補給を検知しました！")
+
+    def _alerting_on_alert_end(self) -> None:
+        # 回転が警告時間を超えて続いている場合は止める
+        if self._alert_token is not None and not self._alert_token.cancelled:
+            self._alert_token.cancel()
+
+    def _alerting_on_servo_done(self, event: ServoDoneEvent) -> None:
+        if self._drink_at is None:
+            print("\n警告動作が完了しました。")
+        elif self._alert_stopped_at is not None:
+            latency = self._alert_stopped_at - self._drink_at
+            reaction = self._alert_stopped_at - self._alert_token.cancelled_at
+            self.alert_stop_latencies_s.append(latency)
+            print(
+                f"[計測] 水分補給からサーボ停止まで {latency * 1000:.1f} ms"
+                f"（検知から {reaction * 1000:.1f} ms）"
+            )
+        self._alert_token = None
+        self.state_machine.transition_to_idle()
+
+    # --- 期限 ---
+
+    def _rearm_deadline(self) -> None:
+        """最も近い期限が変わっていれば、イベントループのタイマーを張り直します"""
+        deadlines = self.state_machine.deadlines
+        due = deadlines.next_due()
+        if due == self._wake_due:
+            return
+        if self._wake_handle is not None:
+            self._wake_handle.cancel()
+            self._wake_handle = None
+        self._wake_due = due
+        if due is not None:
+            self._wake_handle = self._loop.call_later(
+                deadlines.time_until_next(), self._on_deadline
+            )
+
+    def _on_deadline(self) -> None:
+        """期限を過ぎたものをTimerEventとしてキューに入れます"""
+        self._wake_handle = None
+        self._wake_due = None
+        for name in self.state_machine.pop_due_deadlines():
+            self.post(TimerEvent(name))
+        self._rearm_deadline()
+
+    # --- サーボ ---
+
+    def _start_servo(
+        self,
+        action: str,
+        operation: Callable[[], Awaitable[Optional[bool]]]
+    ) -> None:
+        """
+        サーボ操作を開始し、完了したらServoDoneEventを発行します。
+
+        前の操作が終わっていない場合は、その完了後に開始します。
+        """
+        previous = self._servo_task
+        self._servo_task = self._loop.create_task(self._servo_job(action, operation, previous))
+
+    async def _servo_job(
+        self,
+        action: str,
+        operation: Callable[[], Awaitable[Optional[bool]]],
+        previous: Optional[asyncio.Task]
+    ) -> None:
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        interrupted = False
+        try:
+            interrupted = bool(await operation())
+        except Exception as e:
+            print(f"\nサーボの操作中にエラーが発生しました: {e}")
+        self.post(ServoDoneEvent(action, interrupted))
+
+    async def _run_alert(self) -> bool:
+        """
+        警告としてサーボを回転させ、終わったら初期位置に戻します。
+
+        Returns:
+            bool: 水分補給で中断した場合True
+        """
+        sweep = self.servo.alert_sweep(
+            self.monitoring.ALERT_DURATION_S,
+            self._alert_token,
+            on_step=lambda angle: print(f"\rサーボ回転中... 角度: {angle}度", end="")
+        )
+        interrupted = await sweep
+        self._alert_stopped_at = sweep.finished_at
+        await self.servo.move_to_initial_position(gradual=False)
+        return interrupted
+
+    def _print_status(self, event: SampleEvent) -> None:
+        """現在の重量を status_interval_s ごとに表示します"""
+        if event.timestamp - self._last_status_ts < self.status_interval_s:
+            return
+        self._last_status_ts = event.timestamp
+        if self.state_machine.state == HydrationState.MONITORING:
+            elapsed = self.state_machine.get_elapsed_monitoring_time()
+            remaining = self.state_machine.get_remaining_monitoring_time()
+            print(
+                f"\r現在の重量: {event.weight:.2f} g | "
+                f"経過: {elapsed:.0f}秒 | "
+                f"残り: {remaining:.0f}秒",
+                end=""
+            )
+        elif self.state_machine.state == HydrationState.IDLE:
+            print(f"\r現在の重量: {event.weight:.2f} g", end="")
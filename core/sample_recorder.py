@@ -0,0 +1,369 @@
+"""
+HX711の生値の記録（RawSampleRecorder）
+
+誤警告の調査やフィルタの調整のため、HX711の生値をすべて、その時点の状態・
+キャリブレーション（オフセット・参照単位）とともに記録します。
+
+サンプリングスレッドでは配列への追加だけを行い、
+エンコード・圧縮・書き込みは専用の書き込みスレッドで行うため、読み取りは遅れません。
+
+ファイルは日付ごと（raw_YYYYMMDD.hxr）で、チャンクを順に並べたものです。
+チャンクは同じ状態・キャリブレーションの連続したサンプルで、次の形式です。
+
+    ヘッダー: マジック b"HXRC", バージョン, 状態名の長さ, サンプル数, ペイロード長, CRC32,
+              先頭の時刻（UNIX時間のミリ秒）, オフセット, 参照単位
+    状態名（UTF-8）
+    ペイロード（zlib）: 時刻の差分の列と生値の差分の列。差分は zigzag 符号化した varint
+
+読み取りは read_chunks() / iter_samples() でファイルを先頭から順に読むだけなので、
+再生（リプレイ）にそのまま使えます。途中で切れた最後のチャンクは読み飛ばします。
+"""
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from utils.sample_stats import to_weights
+
+MAGIC = b"HXRC"
+VERSION = 1
+CHUNK_HEADER = struct.Struct("<4sHHIIIqdd")
+
+# サンプリングスレッドから書き込みスレッドへ渡す封印済みのチャンク
+_Sealed = Tuple[str, float, float, array, array]
+
+
+def _put_deltas(out: bytearray, values: Iterable[int]) -> None:
+    """値の差分を zigzag 符号化した varint で追加します"""
+    previous = 0
+    for value in values:
+        delta = value - previous
+        previous = value
+        z = delta << 1 if delta >= 0 else ((-delta) << 1) - 1
+        while z >= 0x80:
+            out.append((z & 0x7F) | 0x80)
+            z >>= 7
+        out.append(z)
+
+
+def _get_deltas(data: bytes, pos: int, count: int, typecode: str) -> Tuple[array, int]:
+    """_put_deltas() で追加した count 個の値を復元します"""
+    values = array(typecode)
+    previous = 0
+    for _ in range(count):
+        z = 0
+        shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            z |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        previous += (z >> 1) ^ -(z & 1)
+        values.append(previous)
+    return values, pos
+
+
+def encode_chunk(
+    state: str,
+    offset: float,
+    reference_unit: float,
+    timestamps_ms: array,
+    raw: array,
+    level: int = 6
+) -> bytes:
+    """
+    チャンク1つをバイト列にします。
+
+    Args:
+        state: 記録時の状態名
+        offset: オフセット
+        reference_unit: 参照単位
+        timestamps_ms: 時刻（UNIX時間のミリ秒）
+        raw: 生値
+        level: zlib の圧縮レベル
+
+    Returns:
+        bytes: チャンク
+    """
+    base = timestamps_ms[0]
+    payload = bytearray()
+    _put_deltas(payload, (t - base for t in timestamps_ms))
+    _put_deltas(payload, raw)
+    payload = zlib.compress(bytes(payload), level)
+    state_bytes = state.encode('utf-8')
+    header = CHUNK_HEADER.pack(
+        MAGIC, VERSION, len(state_bytes), len(raw), len(payload),
+        zlib.crc32(payload, zlib.crc32(state_bytes)),
+        base, offset, reference_unit
+    )
+    return header + state_bytes + payload
+
+
+@dataclass
+class RawChunk:
+    """
+    読み取ったチャンク
+
+    timestamps_ms は UNIX時間のミリ秒、raw は HX711 の生値です。
+    """
+    state: str
+    offset: float
+    reference_unit: float
+    timestamps_ms: array
+    raw: array
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def weights(self):
+        """
+        生値を記録時のキャリブレーションで重量（グラム）に換算します。
+
+        Returns:
+            numpy.ndarray: 重量（グラム）の配列（float64）
+        """
+        return to_weights(self.raw, self.offset, self.reference_unit)
+
+
+def _read_chunk(f) -> Optional[RawChunk]:
+    """
+    ファイルの現在位置からチャンクを1つ読み取ります。
+
+    Returns:
+        Optional[RawChunk]: ファイルの終わり、または途中で切れている・壊れている場合None
+    """
+    header = f.read(CHUNK_HEADER.size)
+    if len(header) < CHUNK_HEADER.size:
+        return None
+    magic, version, state_len, count, payload_len, crc, base, offset, reference_unit = \
+        CHUNK_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    state_bytes = f.read(state_len)
+    payload = f.read(payload_len)
+    if len(state_bytes) < state_len or len(payload) < payload_len:
+        return None
+    if zlib.crc32(payload, zlib.crc32(state_bytes)) != crc:
+        return None
+    data = zlib.decompress(payload)
+    deltas, pos = _get_deltas(data, 0, count, 'q')
+    timestamps_ms = array('q', (base + d for d in deltas))
+    raw, _ = _get_deltas(data, pos, count, 'i')
+    return RawChunk(state_bytes.decode('utf-8'), offset, reference_unit, timestamps_ms, raw)
+
+
+def read_chunks(paths: Union[str, Iterable[str]]) -> Iterator[RawChunk]:
+    """
+    記録ファイルのチャンクを順に返します（ストリーミング）。
+
+    Args:
+        paths: 記録ファイルのパス、またはパスの列（指定した順に読みます）
+
+    Yields:
+        RawChunk: チャンク
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = _read_chunk(f)
+                if chunk is None:
+                    break
+                yield chunk
+
+
+def iter_samples(paths: Union[str, Iterable[str]]) -> Iterator[Tuple[float, int, str]]:
+    """
+    記録したサンプルを1件ずつ返します（リプレイ用）。
+
+    Yields:
+        Tuple[float, int, str]: (UNIX時間の秒, 生値, 状態名)
+    """
+    for chunk in read_chunks(paths):
+        state = chunk.state
+        for ts_ms, value in zip(chunk.timestamps_ms, chunk.raw):
+            yield ts_ms / 1000.0, value, state
+
+
+def _valid_length(path: str) -> int:
+    """ファイル先頭から読み取れるチャンクの合計バイト数を返します"""
+    with open(path, 'rb') as f:
+        end = 0
+        while _read_chunk(f) is not None:
+            end = f.tell()
+    return end
+
+
+class RawSampleRecorder:
+    """
+    WeightSampler のリスナーとして生値を記録するクラス
+
+    chunk_samples 件、chunk_seconds 秒、または状態・キャリブレーションが変わった時点で
+    チャンクを封印し、書き込みスレッドに渡します。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        chunk_samples: int = 600,
+        chunk_seconds: float = 60.0,
+        context: Optional[Callable[[], Tuple[float, float]]] = None,
+        fsync: bool = True,
+        wall_clock: Callable[[], float] = time.time,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        レコーダーを初期化し、書き込みスレッドを開始します。
+
+        Args:
+            directory: 記録ファイルの保存先ディレクトリ
+            chunk_samples: 1チャンクの最大サンプル数
+            chunk_seconds: 1チャンクの最大時間（秒）。電源断で失う記録の上限になります
+            context: (オフセット, 参照単位) を返す関数
+            fsync: チャンクを書き込むたびに fsync する場合True
+            wall_clock: UNIX時間を返す関数
+            clock: サンプルのタイムスタンプと同じ単調時計
+        """
+        self.directory = directory
+        self.chunk_samples = max(1, chunk_samples)
+        self.chunk_ms = round(chunk_seconds * 1000)
+        self.fsync = fsync
+        self._context = context or (lambda: (0.0, 1.0))
+        # 単調時計 → UNIX時間（ミリ秒）の変換
+        self._wall_offset_ms = (wall_clock() - clock()) * 1000.0
+        self.state = ""
+        self._current = (self.state,) + tuple(self._context())
+        self._timestamps = array('q')
+        self._raw = array('i')
+        self._lock = threading.Lock()
+        # 封印したチャンク、flush() の完了通知、終了（None）
+        self._queue: "queue.Queue[Union[_Sealed, threading.Event, None]]" = queue.Queue()
+        self._file = None
+        self._file_path: Optional[str] = None
+        self.sample_count = 0
+        self.chunk_count = 0
+        self.bytes_written = 0
+        self.error_count = 0
+        self._closed = False
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="raw-recorder", daemon=True)
+        self._thread.start()
+
+    def attach(self, sampler) -> None:
+        """サンプラーのチャンネルAに登録します"""
+        sampler.add_listener(self.on_sample)
+
+    def detach(self, sampler) -> None:
+        """サンプラーから登録を解除します"""
+        sampler.remove_listener(self.on_sample)
+
+    def set_state(self, state: str) -> None:
+        """記録する状態名を設定します（次のサンプルから新しいチャンクになります）"""
+        self.state = state
+
+    def on_sample(self, timestamp: float, value: int) -> None:
+        """
+        サンプリングスレッドから (タイムスタンプ, 生値) を受け取ります。
+
+        配列への追加だけを行い、チャンクがいっぱいになったら書き込みスレッドに渡します。
+        """
+        ts_ms = round(timestamp * 1000.0 + self._wall_offset_ms)
+        current = (self.state,) + tuple(self._context())
+        with self._lock:
+            if self._closed:
+                return
+            if self._raw and (
+                current != self._current
+                or len(self._raw) >= self.chunk_samples
+                or ts_ms - self._timestamps[0] >= self.chunk_ms
+            ):
+                self._seal()
+            self._current = current
+            self._timestamps.append(ts_ms)
+            self._raw.append(value)
+            self.sample_count += 1
+
+    def _seal(self) -> None:
+        """現在のチャンクを書き込みスレッドに渡します（ロックを保持して呼び出す）"""
+        state, offset, reference_unit = self._current
+        self._queue.put((state, offset, reference_unit, self._timestamps, self._raw))
+        self._timestamps = array('q')
+        self._raw = array('i')
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """記録中のチャンクを封印し、書き込みが終わるまで待ちます"""
+        with self._lock:
+            if self._closed:
+                return
+            if self._raw:
+                self._seal()
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """残りのサンプルを書き込み、書き込みスレッドを止めてファイルを閉じます"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._raw:
+                self._seal()
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _path_for(self, ts_ms: int) -> str:
+        day = datetime.fromtimestamp(ts_ms / 1000).strftime('%Y%m%d')
+        return os.path.join(self.directory, f"raw_{day}.hxr")
+
+    def _open(self, path: str) -> None:
+        if self._file is not None:
+            self._file.close()
+        if os.path.exists(path):
+            # 電源断で途中まで書かれたチャンクがあれば切り捨てる
+            end = _valid_length(path)
+            if end != os.path.getsize(path):
+                os.truncate(path, end)
+                print(f"記録ファイル '{path}' の途中で切れたチャンクを削除しました。")
+        self._file = open(path, 'ab')
+        self._file_path = path
+
+    def _write(self, sealed: _Sealed) -> None:
+        state, offset, reference_unit, timestamps_ms, raw = sealed
+        data = encode_chunk(state, offset, reference_unit, timestamps_ms, raw)
+        path = self._path_for(timestamps_ms[0])
+        if path != self._file_path:
+            self._open(path)
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.chunk_count += 1
+        self.bytes_written += len(data)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._write(item)
+            except Exception as e:
+                self.error_count += 1
+                print(f"\n[エラー] 生値の記録に失敗しました: {e}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
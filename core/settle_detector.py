@@ -0,0 +1,224 @@
+"""
+重量の整定判定モジュール
+
+コップを置いた直後の揺れが収まったかを、直近の重量の
+ばらつき（標準偏差）と傾き（最小二乗法）から逐次的に判定します。
+コップの有無はヒステリシス付きのしきい値で判定し、
+しきい値付近で検知・未検知がばたつかないようにします。
+水分補給は、しきい値を超えた減少が連続した場合にのみ検知します。
+"""
+import math
+from collections import deque
+from typing import Optional
+
+
+class SettleDetector:
+    """
+    直近window_s秒の重量が安定したかを判定するクラス
+
+    ウィンドウ内の和・二乗和などを逐次更新するため、
+    サンプルの追加は O(1)（ウィンドウから外れる分を除く）です。
+    """
+
+    def __init__(
+        self,
+        window_s: float = 1.0,
+        tolerance_g: float = 2.0,
+        max_slope_g_per_s: float = 2.0,
+        min_samples: int = 3
+    ):
+        """
+        判定器を初期化します。
+
+        Args:
+            window_s: 判定に使う時間窓（秒）
+            tolerance_g: 安定とみなす標準偏差の上限（グラム）
+            max_slope_g_per_s: 安定とみなす傾きの上限（グラム/秒）
+            min_samples: 判定に必要な最小サンプル数
+        """
+        if window_s <= 0:
+            raise ValueError("window_s must be greater than zero")
+        if min_samples < 2:
+            raise ValueError("min_samples must be at least 2")
+        self.window_s = window_s
+        self.tolerance_g = tolerance_g
+        self.max_slope_g_per_s = max_slope_g_per_s
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self) -> None:
+        """蓄積したサンプルを破棄します"""
+        self._samples: deque = deque()
+        self._first_ts: Optional[float] = None
+        # 桁落ちを避けるため、最初のサンプルからの差分で和を取る
+        self._t0 = 0.0
+        self._w0 = 0.0
+        self._sum_t = 0.0
+        self._sum_w = 0.0
+        self._sum_tt = 0.0
+        self._sum_tw = 0.0
+        self._sum_ww = 0.0
+        self.settled = False
+
+    def update(self, timestamp: float, weight: float) -> bool:
+        """
+        サンプルを1件追加し、安定したかを返します。
+
+        Args:
+            timestamp: 測定時刻（time.monotonic()など、単調増加する秒）
+            weight: 重量（グラム）
+
+        Returns:
+            bool: 直近window_s秒の重量が安定している場合True
+        """
+        if self._first_ts is None:
+            self._first_ts = timestamp
+            self._t0 = timestamp
+            self._w0 = weight
+        self._add(timestamp - self._t0, weight - self._w0, 1)
+        self._samples.append((timestamp, weight))
+
+        while self._samples[0][0] < timestamp - self.window_s:
+            old_ts, old_weight = self._samples.popleft()
+            self._add(old_ts - self._t0, old_weight - self._w0, -1)
+
+        self.settled = (
+            timestamp - self._first_ts >= self.window_s
+            and len(self._samples) >= self.min_samples
+            and self.stddev <= self.tolerance_g
+            and abs(self.slope) <= self.max_slope_g_per_s
+        )
+        return self.settled
+
+    def _add(self, t: float, w: float, sign: int) -> None:
+        self._sum_t += sign * t
+        self._sum_w += sign * w
+        self._sum_tt += sign * t * t
+        self._sum_tw += sign * t * w
+        self._sum_ww += sign * w * w
+
+    @property
+    def count(self) -> int:
+        """ウィンドウ内のサンプル数"""
+        return len(self._samples)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """ウィンドウ内の平均重量（サンプルがない場合None）"""
+        n = len(self._samples)
+        if n == 0:
+            return None
+        return self._w0 + self._sum_w / n
+
+    @property
+    def stddev(self) -> float:
+        """ウィンドウ内の重量の標準偏差"""
+        n = len(self._samples)
+        if n < 2:
+            return 0.0
+        variance = (self._sum_ww - self._sum_w * self._sum_w / n) / n
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def slope(self) -> float:
+        """ウィンドウ内の重量の傾き（グラム/秒）"""
+        n = len(self._samples)
+        denominator = n * self._sum_tt - self._sum_t * self._sum_t
+        if n < 2 or denominator <= 0:
+            return 0.0
+        return (n * self._sum_tw - self._sum_t * self._sum_w) / denominator
+
+
+class PresenceDetector:
+    """
+    ヒステリシス付きでコップの有無を判定するクラス
+
+    on_threshold_g 以上で「あり」、off_threshold_g 未満で「なし」に切り替わり、
+    その間の重量では直前の判定を維持します。
+    """
+
+    def __init__(self, on_threshold_g: float, off_threshold_g: float):
+        """
+        判定器を初期化します。
+
+        Args:
+            on_threshold_g: 「あり」に切り替わる重量（グラム）
+            off_threshold_g: 「なし」に切り替わる重量（グラム）
+        """
+        if off_threshold_g > on_threshold_g:
+            raise ValueError("off_threshold_g must not exceed on_threshold_g")
+        self.on_threshold_g = on_threshold_g
+        self.off_threshold_g = off_threshold_g
+        self.present = False
+
+    def update(self, weight: float) -> bool:
+        """
+        重量を1件与え、コップがあるかを返します。
+
+        Args:
+            weight: 重量（グラム）
+
+        Returns:
+            bool: コップがあると判定した場合True
+        """
+        if self.present:
+            if weight < self.off_threshold_g:
+                self.present = False
+        elif weight >= self.on_threshold_g:
+            self.present = True
+        return self.present
+
+    def reset(self) -> None:
+        """判定を「なし」に戻します"""
+        self.present = False
+
+
+class DrinkDetector:
+    """
+    水分補給（基準重量からの減少）を検知するクラス
+
+    減少量が threshold_g 以上のサンプルが confirm_samples 回続いた場合に検知します。
+    1サンプルだけのノイズでは検知しません。
+    """
+
+    def __init__(self, threshold_g: float, confirm_samples: int = 3):
+        """
+        検知器を初期化します。
+
+        Args:
+            threshold_g: 水分補給とみなす重量の減少量（グラム）
+            confirm_samples: 検知に必要な連続サンプル数
+        """
+        if confirm_samples <= 0:
+            raise ValueError("confirm_samples must be greater than zero")
+        self.threshold_g = threshold_g
+        self.confirm_samples = confirm_samples
+        self.reset()
+
+    def reset(self) -> None:
+        """連続回数をリセットします"""
+        self._count = 0
+        self.first_crossed_at: Optional[float] = None
+        self.weight_diff = 0.0
+
+    def update(self, timestamp: float, baseline_g: float, weight: float) -> bool:
+        """
+        サンプルを1件与え、水分補給を検知したかを返します。
+
+        Args:
+            timestamp: 測定時刻（単調増加する秒）
+            baseline_g: 基準重量（グラム）
+            weight: 現在の重量（グラム）
+
+        Returns:
+            bool: 検知した場合True。first_crossed_at に最初に減少した時刻が入ります
+        """
+        self.weight_diff = baseline_g - weight
+        if self.weight_diff < self.threshold_g:
+            self._count = 0
+            self.first_crossed_at = None
+            return False
+        if self._count == 0:
+            self.first_crossed_at = timestamp
+        self._count += 1
+        return self._count >= self.confirm_samples
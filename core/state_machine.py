@@ -2,11 +2,22 @@
 水分補給監視システムの状態管理モジュール
 
 ステートマシンパターンを使用してシステムの状態遷移を管理します。
+
+遷移は (現在の状態, きっかけ) をキーとする遷移表で定義し、
+表にない遷移やガード条件を満たさない遷移は InvalidTransitionError になります。
+遷移のたびに TransitionJournal へ記録し、登録されたリスナーに通知します。
 """
 from enum import Enum, auto
-from typing import Optional
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import time
 
+from .timers import Clock, DeadlineScheduler
+from .transition_journal import TransitionJournal, TransitionRecord
+
+# 期限の名前
+MONITORING_TIMEOUT = "monitoring_timeout"
+ALERT_END = "alert_end"
+
 
 class HydrationState(Enum):
     """
@@ -17,24 +28,76 @@ class HydrationState(Enum):
     ALERTING = auto()       # 警告状態（サーボ動作中）
 
 
+class Trigger(Enum):
+    """
+    状態遷移のきっかけを表す列挙型
+    """
+    START_MONITORING = auto()   # コップが置かれ、監視を開始
+    RESET_MONITORING = auto()   # 水分補給後にコップが戻され、タイマーをリセット
+    TIMEOUT = auto()            # 監視時間内に水分補給がなかった
+    STOP = auto()               # 水分補給・警告終了などで準備状態に戻る
+
+
+class InvalidTransitionError(RuntimeError):
+    """遷移表にない、またはガード条件を満たさない遷移"""
+
+
+# 遷移のたびに呼び出されるリスナー
+TransitionListener = Callable[[TransitionRecord], None]
+
+
+class _Transition(NamedTuple):
+    target: HydrationState
+    guard: Optional[Callable[["HydrationStateMachine", Optional[float]], Optional[str]]]
+    action: Callable[["HydrationStateMachine", Optional[float]], None]
+
+
 class HydrationStateMachine:
     """
     水分補給監視システムの状態を管理するクラス
     
     状態遷移のロジックを集約し、各状態での動作を管理します。
+    
+    時刻は差し替え可能な単調時計（既定は time.monotonic）から取得し、
+    監視のタイムアウトと警告の終了は deadlines に期限として登録します。
+    呼び出し側は deadlines.next_due() まで待ち、pop_due_deadlines() で
+    期限を過ぎたものを受け取ります。
+    
+    ロガーやサーボなど遷移に反応する処理は add_listener() で登録します。
     """
     
-    def __init__(self, monitoring_duration_s: int):
+    def __init__(
+        self,
+        monitoring_duration_s: int,
+        alert_duration_s: Optional[float] = None,
+        clock: Clock = time.monotonic,
+        journal_capacity: int = 4096,
+        wall_clock: Clock = time.time
+    ):
         """
         ステートマシンを初期化します。
         
         Args:
             monitoring_duration_s: 監視時間（秒）
+            alert_duration_s: 警告時間（秒）。指定すると警告開始時に ALERT_END を登録します
+            clock: 現在時刻を返す単調時計（テストでは VirtualClock など）
+            journal_capacity: 遷移の記録を保持する件数
+            wall_clock: 遷移の記録に添えるUNIX時間を返す関数
         """
         self._state = HydrationState.IDLE
         self._monitoring_duration_s = monitoring_duration_s
+        self._alert_duration_s = alert_duration_s
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.deadlines = DeadlineScheduler(clock)
         self._monitoring_start_time: Optional[float] = None
         self._last_significant_weight: float = 0.0
+        self._listeners: List[TransitionListener] = []
+        self.journal = TransitionJournal(
+            tuple(s.name for s in HydrationState),
+            tuple(t.name for t in Trigger),
+            capacity=journal_capacity
+        )
     
     @property
     def state(self) -> HydrationState:
@@ -46,6 +109,88 @@ class HydrationStateMachine:
         """最後に記録された有意な重量を取得します"""
         return self._last_significant_weight
     
+    @property
+    def monitoring_duration_s(self) -> int:
+        """監視時間（秒）"""
+        return self._monitoring_duration_s
+    
+    def add_listener(self, listener: TransitionListener) -> None:
+        """
+        遷移のたびに呼び出すリスナーを登録します。
+        
+        リスナーは遷移が完了した後に TransitionRecord を引数に呼ばれます。
+        
+        Args:
+            listener: コールバック関数
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: TransitionListener) -> None:
+        """登録済みのリスナーを解除します"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def can_fire(self, trigger: Trigger, weight: Optional[float] = None) -> bool:
+        """
+        現在の状態でtriggerによる遷移ができるかを返します。
+        
+        Args:
+            trigger: 遷移のきっかけ
+            weight: 遷移に伴う重量（グラム）
+        
+        Returns:
+            bool: 遷移できる場合True
+        """
+        transition = self._TRANSITIONS.get((self._state, trigger))
+        if transition is None:
+            return False
+        return transition.guard is None or transition.guard(self, weight) is None
+    
+    def fire(self, trigger: Trigger, weight: Optional[float] = None) -> TransitionRecord:
+        """
+        遷移表に従って状態を遷移させます。
+        
+        Args:
+            trigger: 遷移のきっかけ
+            weight: 遷移に伴う重量（グラム）
+        
+        Returns:
+            TransitionRecord: 記録した遷移
+        
+        Raises:
+            InvalidTransitionError: 遷移表にない、またはガード条件を満たさない場合
+        """
+        old_state = self._state
+        transition = self._TRANSITIONS.get((old_state, trigger))
+        if transition is None:
+            raise InvalidTransitionError(
+                f"{old_state.name} では {trigger.name} による遷移はできません"
+            )
+        if transition.guard is not None:
+            reason = transition.guard(self, weight)
+            if reason is not None:
+                raise InvalidTransitionError(
+                    f"{old_state.name} -> {transition.target.name} ({trigger.name}): {reason}"
+                )
+        
+        self._state = transition.target
+        transition.action(self, weight)
+        
+        timestamp = self._clock()
+        wall_time = self._wall_clock()
+        self.journal.append(
+            timestamp, old_state.name, transition.target.name, trigger.name, weight, wall_time
+        )
+        record = TransitionRecord(
+            timestamp, old_state.name, transition.target.name, trigger.name, weight, wall_time
+        )
+        for listener in tuple(self._listeners):
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"状態遷移のリスナーでエラーが発生しました: {e}")
+        return record
+    
     def transition_to_monitoring(self, initial_weight: float) -> None:
         """
         監視状態に遷移します。
@@ -53,24 +198,15 @@ class HydrationStateMachine:
         Args:
             initial_weight: 初期重量（グラム）
         """
-        self._state = HydrationState.MONITORING
-        self._last_significant_weight = initial_weight
-        self._monitoring_start_time = time.time()
-        print(f"\n--- 監視フェーズ ---")
-        print(f"{self._monitoring_duration_s / 60:.0f}分間の監視を開始します。")
-        print(f"[デバッグ] 状態: MONITORING, 基準重量: {initial_weight:.2f}g")
+        self.fire(Trigger.START_MONITORING, initial_weight)
     
     def transition_to_alerting(self) -> None:
         """警告状態に遷移します"""
-        self._state = HydrationState.ALERTING
-        self._monitoring_start_time = None
-        print("\n--- 警告フェーズ ---")
+        self.fire(Trigger.TIMEOUT)
     
     def transition_to_idle(self) -> None:
         """アイドル状態に遷移します"""
-        self._state = HydrationState.IDLE
-        self._monitoring_start_time = None
-        print("\n--- 準備フェーズ ---")
+        self.fire(Trigger.STOP)
     
     def reset_monitoring_timer(self, new_weight: float) -> None:
         """
@@ -79,11 +215,88 @@ class HydrationStateMachine:
         Args:
             new_weight: 新しい基準重量（グラム）
         """
-        self._state = HydrationState.MONITORING
-        self._monitoring_start_time = time.time()
-        self._last_significant_weight = new_weight
-        print("\nタイマーをリセットしました。監視を継続します。")
-        print(f"[デバッグ] 状態: MONITORING (リセット), 基準重量: {new_weight:.2f}g, 監視時間: {self._monitoring_duration_s}秒")
+        self.fire(Trigger.RESET_MONITORING, new_weight)
+    
+    # --- ガード条件（満たさない場合は理由を返す） ---
+    
+    def _guard_weight(self, weight: Optional[float]) -> Optional[str]:
+        if weight is None:
+            return "基準重量が必要です"
+        return None
+    
+    def _guard_timeout(self, weight: Optional[float]) -> Optional[str]:
+        if not self.is_monitoring_timeout():
+            return f"監視時間が終わっていません（残り {self.get_remaining_monitoring_time():.1f} 秒）"
+        return None
+    
+    # --- 遷移時の処理 ---
+    
+    def _start_monitoring(self, weight: Optional[float]) -> None:
+        self._last_significant_weight = weight
+        self._start_monitoring_timer()
+    
+    def _start_alerting(self, weight: Optional[float]) -> None:
+        self._monitoring_start_time = None
+        self.deadlines.cancel(MONITORING_TIMEOUT)
+        if self._alert_duration_s is not None:
+            self.deadlines.schedule_in(ALERT_END, self._alert_duration_s)
+    
+    def _stop(self, weight: Optional[float]) -> None:
+        self._monitoring_start_time = None
+        self.deadlines.cancel_all()
+    
+    # (現在の状態, きっかけ) -> 遷移
+    _TRANSITIONS: Dict[Tuple[HydrationState, Trigger], _Transition] = {
+        (HydrationState.IDLE, Trigger.START_MONITORING):
+            _Transition(HydrationState.MONITORING, _guard_weight, _start_monitoring),
+        (HydrationState.IDLE, Trigger.RESET_MONITORING):
+            _Transition(HydrationState.MONITORING, _guard_weight, _start_monitoring),
+        (HydrationState.MONITORING, Trigger.RESET_MONITORING):
+            _Transition(HydrationState.MONITORING, _guard_weight, _start_monitoring),
+        (HydrationState.MONITORING, Trigger.TIMEOUT):
+            _Transition(HydrationState.ALERTING, _guard_timeout, _start_alerting),
+        (HydrationState.IDLE, Trigger.STOP):
+            _Transition(HydrationState.IDLE, None, _stop),
+        (HydrationState.MONITORING, Trigger.STOP):
+            _Transition(HydrationState.IDLE, None, _stop),
+        (HydrationState.ALERTING, Trigger.STOP):
+            _Transition(HydrationState.IDLE, None, _stop),
+    }
+    
+    def print_transition(self, record: TransitionRecord) -> None:
+        """
+        遷移をコンソールに表示するリスナー
+        
+        add_listener(state_machine.print_transition) で登録してください。
+        """
+        if record.trigger == Trigger.START_MONITORING.name:
+            print(f"\n--- 監視フェーズ ---")
+            print(f"{self._monitoring_duration_s / 60:.0f}分間の監視を開始します。")
+            print(f"[デバッグ] 状態: MONITORING, 基準重量: {record.weight:.2f}g")
+        elif record.trigger == Trigger.RESET_MONITORING.name:
+            print("\nタイマーをリセットしました。監視を継続します。")
+            print(f"[デバッグ] 状態: MONITORING (リセット), 基準重量: {record.weight:.2f}g, 監視時間: {self._monitoring_duration_s}秒")
+        elif record.trigger == Trigger.TIMEOUT.name:
+            print("\n--- 警告フェーズ ---")
+        elif record.trigger == Trigger.STOP.name:
+            print("\n--- 準備フェーズ ---")
+    
+    def _start_monitoring_timer(self) -> None:
+        """監視開始時刻を記録し、監視のタイムアウトを登録します"""
+        self._monitoring_start_time = self._clock()
+        self.deadlines.cancel(ALERT_END)
+        self.deadlines.schedule_at(
+            MONITORING_TIMEOUT, self._monitoring_start_time + self._monitoring_duration_s
+        )
+    
+    def pop_due_deadlines(self) -> List[str]:
+        """
+        期限を過ぎたものを取り出します。
+        
+        Returns:
+            List[str]: 期限を過ぎた名前（MONITORING_TIMEOUT, ALERT_END）
+        """
+        return self.deadlines.pop_due()
     
     def get_elapsed_monitoring_time(self) -> float:
         """
@@ -94,7 +307,7 @@ class HydrationStateMachine:
         """
         if self._state != HydrationState.MONITORING or self._monitoring_start_time is None:
             return 0.0
-        return time.time() - self._monitoring_start_time
+        return self._clock() - self._monitoring_start_time
     
     def is_monitoring_timeout(self) -> bool:
         """
@@ -103,13 +316,10 @@ class HydrationStateMachine:
         Returns:
             bool: タイムアウトした場合True
         """
-        if self._state != HydrationState.MONITORING:
+        if self._state != HydrationState.MONITORING or self._monitoring_start_time is None:
             return False
-        elapsed = self.get_elapsed_monitoring_time()
-        is_timeout = elapsed >= self._monitoring_duration_s
-        if is_timeout:
-            print(f"\n[デバッグ] タイムアウト検知: {elapsed:.1f}秒 >= {self._monitoring_duration_s}秒")
-        return is_timeout
+        # 登録した期限と同じ式で比較し、期限ちょうどの時刻でも丸め誤差で外れないようにする
+        return self._clock() >= self._monitoring_start_time + self._monitoring_duration_s
     
     def get_remaining_monitoring_time(self) -> float:
         """
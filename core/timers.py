@@ -0,0 +1,173 @@
+"""
+時計と期限管理モジュール
+
+状態管理の時刻は差し替え可能な単調時計から取得します。
+既定は time.monotonic で、NTPによる時刻合わせの影響を受けません。
+テストでは VirtualClock を使うと、25分の監視サイクルを一瞬で進められます。
+
+期限（監視のタイムアウト、警告の終了など）は名前付きでヒープに登録し、
+次に来る期限だけを待てば済むようにします。
+"""
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 秒単位の単調増加する時刻を返す関数
+Clock = Callable[[], float]
+
+
+class VirtualClock:
+    """
+    手動で進める時計（テスト・シミュレーション用）
+
+    Clockとして呼び出すと現在の仮想時刻を返します。
+    """
+
+    def __init__(self, start: float = 0.0):
+        """
+        時計を初期化します。
+
+        Args:
+            start: 開始時刻（秒）
+        """
+        self._now = start
+
+    def __call__(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> float:
+        """
+        時刻を進めます。
+
+        Args:
+            seconds: 進める時間（秒）
+
+        Returns:
+            float: 進めた後の時刻
+        """
+        if seconds < 0:
+            raise ValueError("seconds must not be negative")
+        self._now += seconds
+        return self._now
+
+
+class DeadlineScheduler:
+    """
+    名前付きの期限を管理する最小ヒープ
+
+    同じ名前で登録し直すと前の期限は取り消されます。
+    取り消した期限はヒープから遅延削除するため、登録・取り消しは O(log n) です。
+    """
+
+    def __init__(self, clock: Clock = time.monotonic):
+        """
+        スケジューラを初期化します。
+
+        Args:
+            clock: 現在時刻を返す関数
+        """
+        self.clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        # 名前 -> 有効なエントリの通し番号
+        self._active: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def schedule_at(self, name: str, due: float) -> None:
+        """
+        期限を時刻で登録します。
+
+        Args:
+            name: 期限の名前
+            due: 期限の時刻（clockと同じ基準の秒）
+        """
+        seq = next(self._counter)
+        self._active[name] = seq
+        heapq.heappush(self._heap, (due, seq, name))
+
+    def schedule_in(self, name: str, delay_s: float) -> float:
+        """
+        期限を現在からの経過時間で登録します。
+
+        Args:
+            name: 期限の名前
+            delay_s: 現在からの時間（秒）
+
+        Returns:
+            float: 登録した期限の時刻
+        """
+        due = self.clock() + delay_s
+        self.schedule_at(name, due)
+        return due
+
+    def cancel(self, name: str) -> bool:
+        """
+        期限を取り消します。
+
+        Returns:
+            bool: 登録されていた場合True
+        """
+        return self._active.pop(name, None) is not None
+
+    def cancel_all(self) -> None:
+        """すべての期限を取り消します"""
+        self._active.clear()
+        self._heap.clear()
+
+    def due_time(self, name: str) -> Optional[float]:
+        """
+        名前付きの期限の時刻を返します（登録されていない場合None）
+        """
+        seq = self._active.get(name)
+        if seq is None:
+            return None
+        for due, entry_seq, _ in self._heap:
+            if entry_seq == seq:
+                return due
+        return None
+
+    def next_due(self) -> Optional[float]:
+        """
+        最も近い期限の時刻を返します。
+
+        Returns:
+            Optional[float]: 期限の時刻。期限がない場合None
+        """
+        self._discard_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def time_until_next(self) -> Optional[float]:
+        """
+        最も近い期限までの時間を返します。
+
+        Returns:
+            Optional[float]: 残り時間（秒、過ぎている場合は0）。期限がない場合None
+        """
+        due = self.next_due()
+        if due is None:
+            return None
+        return max(0.0, due - self.clock())
+
+    def pop_due(self) -> List[str]:
+        """
+        期限を過ぎたものを取り出します。
+
+        Returns:
+            List[str]: 期限を過ぎた名前（期限の早い順）
+        """
+        now = self.clock()
+        fired = []
+        while True:
+            self._discard_cancelled()
+            if not self._heap or self._heap[0][0] > now:
+                return fired
+            _, seq, name = heapq.heappop(self._heap)
+            del self._active[name]
+            fired.append(name)
+
+    def _discard_cancelled(self) -> None:
+        while self._heap and self._active.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._active)
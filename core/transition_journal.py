@@ -0,0 +1,194 @@
+"""
+状態遷移の記録モジュール
+
+すべての状態遷移を、時刻・遷移前後の状態・きっかけ・重量の組として
+固定長のリングバッファに記録します。
+各列は array に格納するため、1件あたり23バイトで、
+1日分の遷移を保持してもメモリをほとんど使いません。
+
+時刻は単調時計（期限の計算用）とUNIX時間（再起動後に1日の流れを復元する用）の両方を記録し、
+persist() でまだ保存していない記録をCSVファイルに追記します。
+"""
+import math
+import os
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class TransitionRecord(NamedTuple):
+    """状態遷移1件"""
+    timestamp: float          # 遷移した時刻（ステートマシンの単調時計）
+    old_state: str
+    new_state: str
+    trigger: str
+    weight: Optional[float]   # 遷移に伴う重量（グラム）。ない場合None
+    wall_time: Optional[float] = None   # 遷移した時刻（UNIX時間）。ない場合None
+
+
+class TransitionJournal:
+    """
+    状態遷移を記録する固定長のリングバッファ
+
+    状態ときっかけは名前の一覧に対する番号で保持します。
+    容量を超えると古い記録から上書きします。
+    """
+
+    __slots__ = (
+        'capacity', '_states', '_triggers', '_state_index', '_trigger_index',
+        '_timestamps', '_old', '_new', '_trigger', '_weights', '_wall_times', '_next', '_total',
+        '_persisted_total',
+    )
+
+    def __init__(self, states: Tuple[str, ...], triggers: Tuple[str, ...], capacity: int = 4096):
+        """
+        記録を初期化します。
+
+        Args:
+            states: 状態名の一覧
+            triggers: きっかけの名前の一覧
+            capacity: 保持する遷移の件数
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than zero")
+        if len(states) > 255 or len(triggers) > 255:
+            raise ValueError("too many states or triggers")
+        self.capacity = capacity
+        self._states = states
+        self._triggers = triggers
+        self._state_index = {name: i for i, name in enumerate(states)}
+        self._trigger_index = {name: i for i, name in enumerate(triggers)}
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._old = array('B', bytes(capacity))
+        self._new = array('B', bytes(capacity))
+        self._trigger = array('B', bytes(capacity))
+        self._weights = array('f', bytes(4 * capacity))
+        self._wall_times = array('d', bytes(8 * capacity))
+        self._next = 0
+        self._total = 0
+        self._persisted_total = 0
+
+    def append(
+        self,
+        timestamp: float,
+        old_state: str,
+        new_state: str,
+        trigger: str,
+        weight: Optional[float] = None,
+        wall_time: Optional[float] = None
+    ) -> None:
+        """
+        遷移を1件記録します。
+
+        Args:
+            timestamp: 遷移した時刻
+            old_state: 遷移前の状態名
+            new_state: 遷移後の状態名
+            trigger: きっかけの名前
+            weight: 遷移に伴う重量（グラム）
+            wall_time: 遷移した時刻（UNIX時間）
+        """
+        i = self._next
+        self._timestamps[i] = timestamp
+        self._old[i] = self._state_index[old_state]
+        self._new[i] = self._state_index[new_state]
+        self._trigger[i] = self._trigger_index[trigger]
+        self._weights[i] = math.nan if weight is None else weight
+        self._wall_times[i] = math.nan if wall_time is None else wall_time
+        self._next = (i + 1) % self.capacity
+        self._total += 1
+
+    @property
+    def total(self) -> int:
+        """これまでに記録した件数（上書きされたものを含む）"""
+        return self._total
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
+
+    def _record(self, i: int) -> TransitionRecord:
+        weight = self._weights[i]
+        wall_time = self._wall_times[i]
+        return TransitionRecord(
+            self._timestamps[i],
+            self._states[self._old[i]],
+            self._states[self._new[i]],
+            self._triggers[self._trigger[i]],
+            None if math.isnan(weight) else weight,
+            None if math.isnan(wall_time) else wall_time,
+        )
+
+    def records(self, n: Optional[int] = None) -> List[TransitionRecord]:
+        """
+        記録を古い順に返します。
+
+        Args:
+            n: 返す件数（最新n件）。省略時はすべて
+
+        Returns:
+            List[TransitionRecord]: 遷移の記録
+        """
+        count = len(self)
+        if n is not None:
+            count = min(n, count)
+        start = (self._next - count) % self.capacity
+        return [self._record((start + k) % self.capacity) for k in range(count)]
+
+    def last(self) -> Optional[TransitionRecord]:
+        """最新の記録（ない場合None）"""
+        if self._total == 0:
+            return None
+        return self._record((self._next - 1) % self.capacity)
+
+    def counts(self) -> Dict[Tuple[str, str], int]:
+        """
+        保持している記録の遷移ごとの件数を返します。
+
+        Returns:
+            Dict[Tuple[str, str], int]: (遷移前, 遷移後) -> 件数
+        """
+        result: Dict[Tuple[str, str], int] = {}
+        for k in range(len(self)):
+            key = (self._states[self._old[k]], self._states[self._new[k]])
+            result[key] = result.get(key, 0) + 1
+        return result
+
+    def persist(self, path: str) -> int:
+        """
+        まだ保存していない記録をCSVファイルに追記します。
+
+        前回の保存から容量を超えて上書きされた記録は保存できません。
+
+        Args:
+            path: 保存先のCSVファイルのパス（なければヘッダー付きで作成します）
+
+        Returns:
+            int: 追記した件数
+        """
+        pending = min(self._total - self._persisted_total, len(self))
+        if pending <= 0:
+            return 0
+        records = self.records(pending)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            if new_file:
+                f.write("wall_time,monotonic,old_state,new_state,trigger,weight_g\n")
+            for r in records:
+                wall = "" if r.wall_time is None else \
+                    datetime.fromtimestamp(r.wall_time).isoformat(timespec='milliseconds')
+                weight = "" if r.weight is None else f"{r.weight:.2f}"
+                f.write(
+                    f"{wall},{r.timestamp:.3f},{r.old_state},{r.new_state},{r.trigger},{weight}\n"
+                )
+            f.flush()
+            os.fsync(f.fileno())
+        self._persisted_total = self._total
+        return len(records)
+
+    def clear(self) -> None:
+        """記録をすべて破棄します"""
+        self._next = 0
+        self._total = 0
+        self._persisted_total = 0
@@ -0,0 +1,110 @@
+"""
+ゼロ点の自動追従モジュール
+
+温度変化などによるHX711のゼロ点のずれを、何も載っていない状態が
+長く安定して続いている間だけ、少しずつ補正します。
+風袋引きのように測定を止めることはありません。
+"""
+from typing import Any, Dict, Optional
+
+from .settle_detector import SettleDetector
+
+
+class ZeroTracker:
+    """
+    空の状態の重量からゼロ点の補正量を求めるクラス
+
+    直近window_s秒の重量が安定していて、平均がゼロ付近（zero_band_g以内）の場合に、
+    平均値を max_step_g で制限した補正量を返します。
+    補正はmin_interval_sに1回までです。
+    """
+
+    def __init__(
+        self,
+        window_s: float = 30.0,
+        zero_band_g: float = 10.0,
+        tolerance_g: float = 1.0,
+        max_step_g: float = 0.5,
+        min_interval_s: float = 60.0
+    ):
+        """
+        追従器を初期化します。
+
+        Args:
+            window_s: 安定を判定する時間窓（秒）
+            zero_band_g: 補正の対象とするゼロ付近の範囲（グラム）
+            tolerance_g: 安定とみなす標準偏差の上限（グラム）
+            max_step_g: 1回の補正量の上限（グラム）
+            min_interval_s: 補正の最小間隔（秒）
+        """
+        if max_step_g <= 0:
+            raise ValueError("max_step_g must be greater than zero")
+        self.zero_band_g = zero_band_g
+        self.max_step_g = max_step_g
+        self.min_interval_s = min_interval_s
+        # 時間窓全体で tolerance_g 分以上動くような傾きは安定とみなさない
+        self._detector = SettleDetector(
+            window_s=window_s,
+            tolerance_g=tolerance_g,
+            max_slope_g_per_s=tolerance_g / window_s
+        )
+        self._last_correction_ts: Optional[float] = None
+
+        # テレメトリ
+        self.correction_count = 0
+        self.total_correction_g = 0.0
+        self.last_correction_g = 0.0
+        self.last_correction_ts: Optional[float] = None
+
+    def reset(self) -> None:
+        """蓄積したサンプルを破棄します（補正の履歴は残します）"""
+        self._detector.reset()
+
+    def update(self, timestamp: float, weight: float) -> Optional[float]:
+        """
+        空の状態の重量を1件与え、必要ならゼロ点の補正量を返します。
+
+        Args:
+            timestamp: 測定時刻（単調増加する秒）
+            weight: 現在のゼロ点で換算した重量（グラム）
+
+        Returns:
+            Optional[float]: 重量から差し引くべき補正量（グラム）。補正しない場合None
+        """
+        if abs(weight) > self.zero_band_g:
+            # コップなどが載っている間の値は判定に混ぜない
+            self._detector.reset()
+            return None
+        if not self._detector.update(timestamp, weight):
+            return None
+        if (self._last_correction_ts is not None
+                and timestamp - self._last_correction_ts < self.min_interval_s):
+            return None
+
+        mean = self._detector.mean
+        step = max(-self.max_step_g, min(self.max_step_g, mean))
+        if step == 0.0:
+            return None
+
+        self._last_correction_ts = timestamp
+        self.correction_count += 1
+        self.total_correction_g += step
+        self.last_correction_g = step
+        self.last_correction_ts = timestamp
+        # 補正後は重量の基準が変わるため、ウィンドウを取り直す
+        self._detector.reset()
+        return step
+
+    def telemetry(self) -> Dict[str, Any]:
+        """
+        補正の履歴を返します。
+
+        Returns:
+            Dict[str, Any]: 補正回数・累積補正量・直近の補正量と時刻
+        """
+        return {
+            'correction_count': self.correction_count,
+            'total_correction_g': self.total_correction_g,
+            'last_correction_g': self.last_correction_g,
+            'last_correction_ts': self.last_correction_ts,
+        }
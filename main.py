@@ -4,14 +4,21 @@
 コップの重量を監視し、一定時間水分補給がない場合に
 サーボモータでコップを傾けて警告を発します。
 """
-import time
-import RPi.GPIO as GPIO
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from config.settings import settings
-from controllers.servo_controller import ServoController
-from controllers.weight_sensor import WeightSensor
+from core.log_writer import QueuedWeightLogger
 from core.logger import WeightLogger
+from core.orchestrator import HydrationOrchestrator
 from core.state_machine import HydrationState, HydrationStateMachine
+from core.transition_journal import TransitionRecord
+from utils.startup_profiler import StartupProfiler
+
+# RPi.GPIO・gpiozero・コントローラ群は各コンポーネントの初期化時にインポートします。
+# 起動時間の内訳は STARTUP_PROFILE=1 python main.py で確認できます。
 
 
 class HydrationMonitor:
@@ -22,191 +29,226 @@ class HydrationMonitor:
     重量センサーとサーボモーターを制御します。
     """
     
-    def __init__(self):
-        """各コンポーネントを初期化します"""
+    def __init__(self, profiler: Optional[StartupProfiler] = None):
+        """
+        各コンポーネントを初期化します。
+        
+        ロガー・センサー・サーボは互いに独立しているため並行して初期化します。
+        
+        Args:
+            profiler: 起動時間の計測に使うプロファイラ
+        """
         print("=== 水分補給促進デバイスを初期化中 ===\n")
         
         # 設定の読み込み
         self.settings = settings
+        self.profiler = profiler or StartupProfiler()
         
-        # ロガーの初期化
-        self.logger = WeightLogger(self.settings.log_file_path)
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="init") as executor:
+            futures = {
+                'logger': executor.submit(self._timed, "ロガー初期化", self._create_logger),
+                'sensor': executor.submit(self._timed, "センサー初期化", self._create_sensor),
+                'servo': executor.submit(self._timed, "サーボ初期化", self._create_servo),
+            }
         
-        # センサーの初期化
-        self.sensor = WeightSensor(
-            data_pin=self.settings.gpio.HX711_DATA,
-            clk_pin=self.settings.gpio.HX711_CLK,
-            reference_unit=self.settings.sensor.REFERENCE_UNIT
-        )
+        # いずれかの初期化に失敗した場合は、成功したものを片付けてから例外を送出する
+        errors = [f.exception() for f in futures.values() if f.exception() is not None]
+        if errors:
+            for name in ('servo', 'sensor', 'logger'):
+                future = futures[name]
+                if future.exception() is None:
+                    future.result().cleanup()
+            raise errors[0]
         
-        # サーボコントローラの初期化
-        self.servo = ServoController(
-            pin=self.settings.gpio.SERVO,
-            min_angle=self.settings.servo.MIN_ANGLE,
-            max_angle=self.settings.servo.MAX_ANGLE,
-            min_pulse_width=self.settings.servo.MIN_PULSE_WIDTH,
-            max_pulse_width=self.settings.servo.MAX_PULSE_WIDTH
-        )
+        self.logger = futures['logger'].result()
+        self.sensor = futures['sensor'].result()
+        self.servo = futures['servo'].result()
         
         # ステートマシンの初期化
         self.state_machine = HydrationStateMachine(
-            monitoring_duration_s=self.settings.monitoring.MONITORING_DURATION_S
+            monitoring_duration_s=self.settings.monitoring.MONITORING_DURATION_S,
+            alert_duration_s=self.settings.monitoring.ALERT_DURATION_S
         )
+        self.state_machine.add_listener(self.state_machine.print_transition)
+        self.state_machine.add_listener(self._log_baseline)
         
-        print("\n初期化完了！\n")
-
-    def wait_for_cup(self) -> float:
-        """
-        コップが置かれる（一定以上の重量が検知される）まで待機します。
+        self.recorder = self._create_recorder()
         
-        Returns:
-            float: 検知された安定後の重量（グラム）
-        """
-        self.state_machine.transition_to_idle()
-        threshold = self.settings.monitoring.WEIGHT_THRESHOLD_G
-        read_times = self.settings.sensor.READ_TIMES
-        
-        print(f"コップと水を置いてください。(約{threshold}g以上のものを検知します)")
-        
-        while True:
-            weight = self.sensor.get_weight(read_times)
-            print(f"\r現在の重量: {weight:.2f} g", end="")
-            
-            if weight >= threshold:
-                print(f"\nコップを検知しました。初期重量: {weight:.2f} g")
-                time.sleep(2)
-                
-                # 安定後の重量を再測定
-                stable_weight = self.sensor.get_weight(read_times)
-                print(f"安定後の初期重量: {stable_weight:.2f} g")
-                
-                # ログに記録
-                self.logger.log_weight(stable_weight)
-                
-                return stable_weight
-            
-            time.sleep(1)
+        print("\n初期化完了！\n")
     
-    def monitor_drinking(self) -> bool:
-        """
-        設定された時間、水分補給（重量変化）を監視します。
-        
-        Returns:
-            bool: タイムアウトした場合False、水分補給があった場合はループ継続
-        """
-        threshold = self.settings.monitoring.WEIGHT_THRESHOLD_G
-        read_times = self.settings.sensor.READ_TIMES
-        
-        print(f"[デバッグ] monitor_drinking開始 - 状態: {self.state_machine.state.name}")
-        
-        while not self.state_machine.is_monitoring_timeout():
-            current_weight = self.sensor.get_weight(read_times)
-            elapsed_time = self.state_machine.get_elapsed_monitoring_time()
-            remaining_time = self.state_machine.get_remaining_monitoring_time()
-            
-            print(
-                f"\r現在の重量: {current_weight:.2f} g | "
-                f"経過: {elapsed_time:.0f}秒 | "
-                f"残り: {remaining_time:.0f}秒",
-                end=""
+    def _timed(self, name: str, factory):
+        """初期化処理の所要時間をプロファイラに記録します"""
+        with self.profiler.phase(name):
+            return factory()
+    
+    def _create_logger(self) -> QueuedWeightLogger:
+        """ロガーを初期化します（書き込みは専用スレッドで行います）"""
+        logging = self.settings.logging
+        options = dict(
+            flush_rows=logging.FLUSH_ROWS,
+            flush_interval_s=logging.FLUSH_INTERVAL_S,
+            fsync_policy=logging.FSYNC_POLICY,
+            fsync_interval_s=logging.FSYNC_INTERVAL_S
+        )
+        if logging.LOG_FORMAT == "sqlite":
+            from core.event_store import SqliteWeightLogger
+            logger = SqliteWeightLogger(self.settings.log_file_path, **options)
+        else:
+            logger = WeightLogger(
+                self.settings.log_file_path,
+                log_format=logging.LOG_FORMAT,
+                segment_max_bytes=logging.SEGMENT_MAX_BYTES,
+                segment_max_age_s=logging.SEGMENT_MAX_AGE_S,
+                **options
             )
-            
-            # 重量変化を確認
-            weight_diff = self.state_machine.last_significant_weight - current_weight
-            
-            if weight_diff >= threshold:
-                print(f"\n水分補給を検知しました！ 重量変化: {weight_diff:.2f} g")
-                
-                # サーボを初期位置に戻す
-                self.servo.move_to_initial_position(gradual=True)
-                
-                # コップが置かれるまで待機
-                new_weight = self.wait_for_cup()
-                
-                # タイマーをリセット（状態もMONITORINGに戻る）
-                self.state_machine.reset_monitoring_timer(new_weight)
-                print(f"[デバッグ] タイマーリセット後 - 状態: {self.state_machine.state.name}")
-            
-            time.sleep(1)
-        
-        duration_min = self.settings.monitoring.MONITORING_DURATION_S / 60
-        print(f"\n{duration_min:.0f}分間、規定の重量変化がありませんでした。")
-        print(f"[デバッグ] タイムアウト検知 - 警告動作に移行します")
-        return False
+        return QueuedWeightLogger(
+            logger,
+            capacity=logging.QUEUE_CAPACITY,
+            overflow=logging.QUEUE_OVERFLOW,
+            spill_limit=logging.QUEUE_SPILL_LIMIT
+        )
     
-    def trigger_alert(self) -> None:
-        """
-        警告としてサーボモーターを回転させます。
-        回転中に水分補給があれば中断します。
-        """
-        self.state_machine.transition_to_alerting()
+    def _create_recorder(self):
+        """生値の記録を開始します（LoggingConfig.RAW_RECORDING が有効な場合）"""
+        logging = self.settings.logging
+        if not logging.RAW_RECORDING:
+            return None
+        if self.sensor.sampler is None:
+            print("生値の記録には SensorConfig.CONTINUOUS_SAMPLING = True が必要です。記録しません。")
+            return None
+        from core.sample_recorder import RawSampleRecorder
+        
+        hx = self.sensor.hx
+        recorder = RawSampleRecorder(
+            logging.RAW_LOG_DIR,
+            chunk_samples=logging.RAW_CHUNK_SAMPLES,
+            chunk_seconds=logging.RAW_CHUNK_SECONDS,
+            context=lambda: (hx.get_offset_A(), hx.get_reference_unit_A())
+        )
+        recorder.set_state(self.state_machine.state.name)
+        self.state_machine.add_listener(lambda record: recorder.set_state(record.new_state))
+        recorder.attach(self.sensor.sampler)
+        print(f"生値を '{logging.RAW_LOG_DIR}' に記録します。")
+        return recorder
+    
+    def _create_sensor(self):
+        """重量センサーを初期化します"""
+        from controllers.weight_sensor import WeightSensor
+        from core.calibration import CalibrationStore
+        from core.zero_tracker import ZeroTracker
+        from utils.filters import build_filter_chain
         
-        threshold = self.settings.monitoring.WEIGHT_THRESHOLD_G
-        alert_duration = self.settings.monitoring.ALERT_DURATION_S
+        calibration = self.settings.calibration
+        zero_tracker = None
+        if calibration.AUTO_ZERO:
+            zero_tracker = ZeroTracker(
+                window_s=calibration.AUTO_ZERO_WINDOW_S,
+                zero_band_g=calibration.AUTO_ZERO_BAND_G,
+                tolerance_g=calibration.AUTO_ZERO_TOLERANCE_G,
+                max_step_g=calibration.AUTO_ZERO_MAX_STEP_G,
+                min_interval_s=calibration.AUTO_ZERO_INTERVAL_S
+            )
         
-        # 警告開始時の重量を取得
-        alert_start_weight = self.sensor.get_weight(
-            self.settings.sensor.READ_TIMES
+        return WeightSensor(
+            data_pin=self.settings.gpio.HX711_DATA,
+            clk_pin=self.settings.gpio.HX711_CLK,
+            reference_unit=self.settings.sensor.REFERENCE_UNIT,
+            use_interrupt=self.settings.sensor.USE_INTERRUPT,
+            read_timeout_s=self.settings.sensor.READ_TIMEOUT_S,
+            continuous=self.settings.sensor.CONTINUOUS_SAMPLING,
+            buffer_size=self.settings.sensor.SAMPLE_BUFFER_SIZE,
+            sample_filter=build_filter_chain(self.settings.sensor),
+            reference_unit_b=self.settings.sensor.REFERENCE_UNIT_B,
+            channel_burst=self.settings.sensor.CHANNEL_BURST,
+            channel_switch_discard=self.settings.sensor.CHANNEL_SWITCH_DISCARD,
+            calibration_store=CalibrationStore(calibration.FILE_PATH),
+            drift_threshold_g=calibration.DRIFT_THRESHOLD_G,
+            drift_check_samples=calibration.DRIFT_CHECK_SAMPLES,
+            load_present_g=calibration.LOAD_PRESENT_G,
+            zero_tracker=zero_tracker,
+            calibration_save_delay_s=calibration.AUTO_ZERO_SAVE_DELAY_S
         )
+    
+    def _create_servo(self):
+        """サーボコントローラを初期化します"""
+        from controllers.servo_controller import ServoController
         
-        # ゆっくり回転
-        for angle in self.servo.rotate_slowly(alert_duration):
-            print(f"\rサーボ回転中... 角度: {angle}度", end="")
-            
-            # 重量変化を確認（高速チェックのため1回のみ測定）
-            current_weight = self.sensor.get_weight(1)
-            weight_diff = alert_start_weight - current_weight
-            
-            if weight_diff >= threshold:
-                print("\n警告中に水分補給を検知しました！")
-                self.servo.move_to_initial_position(gradual=False)
-                return
-        
-        print("\n警告動作が完了しました。")
-        self.servo.move_to_initial_position(gradual=False)
+        return ServoController(
+            pin=self.settings.gpio.SERVO,
+            min_angle=self.settings.servo.MIN_ANGLE,
+            max_angle=self.settings.servo.MAX_ANGLE,
+            min_pulse_width=self.settings.servo.MIN_PULSE_WIDTH,
+            max_pulse_width=self.settings.servo.MAX_PULSE_WIDTH,
+            motion_rate_hz=self.settings.servo.MOTION_RATE_HZ,
+            step_hold_s=self.settings.servo.STEP_HOLD_S,
+            gradual_move_s=self.settings.servo.GRADUAL_MOVE_S,
+            backend=self.settings.servo.BACKEND,
+            pwm_chip=self.settings.servo.PWM_CHIP
+        )
     
     def run(self) -> None:
         """
         プログラムのメインループを実行します。
         
+        センサーのサンプル・監視タイマー・サーボ動作の完了をイベントとして処理し、
         1. サーボを初期位置に移動
-        2. コップの設置を待機
-        3. 水分補給を監視
-        4. タイムアウト時に警告を発動
-        5. 2に戻る
+        2. コップの設置を検知し、重量が安定したら監視を開始
+        3. 水分補給を検知したら2に戻る
+        4. 期限までに水分補給がなければ警告を発動し、2に戻る
+        
+        Raises:
+            RuntimeError: 連続サンプリングが無効な場合
         """
-        print("=== プログラムを開始します ===\n")
-        
-        # サーボを初期位置に移動
-        self.servo.move_to_initial_position(gradual=False)
-        
-        # 最初のコップ設置を待機
-        initial_weight = self.wait_for_cup()
-        
-        # 監視状態に遷移
-        self.state_machine.transition_to_monitoring(initial_weight)
-        
-        # メインループ
-        while True:
-            # 水分補給を監視
-            print("[デバッグ] 監視フェーズ開始")
-            self.monitor_drinking()
-            
-            # 警告を発動
-            print("[デバッグ] 警告フェーズ開始")
-            self.trigger_alert()
-            
-            # 次のコップ設置を待機
-            new_weight = self.wait_for_cup()
-            
-            # 監視を再開
-            self.state_machine.transition_to_monitoring(new_weight)
+        asyncio.run(self._run_async())
+    
+    def _log_baseline(self, record: TransitionRecord) -> None:
+        """監視の開始・リセット時の基準重量をログに記録します"""
+        if record.new_state == HydrationState.MONITORING.name:
+            self.logger.log_weight(record.weight)
+    
+    async def _run_async(self) -> None:
+        """イベントループ上で監視エンジンを実行します"""
+        from controllers.async_weight_sensor import AsyncWeightSensor
+        
+        if self.sensor.sampler is None:
+            raise RuntimeError(
+                "イベント駆動の監視には SensorConfig.CONTINUOUS_SAMPLING = True が必要です"
+            )
+        async_sensor = AsyncWeightSensor(self.sensor)
+        orchestrator = HydrationOrchestrator(
+            state_machine=self.state_machine,
+            sensor=async_sensor,
+            servo=self.servo,
+            monitoring=self.settings.monitoring
+        )
+        try:
+            await orchestrator.run()
+        finally:
+            async_sensor.close()
+    
+    def _persist_transitions(self) -> None:
+        """状態遷移の記録をファイルに追記します（再起動後に1日の流れを復元するため）"""
+        logging = self.settings.logging
+        path = os.path.join(logging.LOG_DIR, logging.TRANSITION_LOG_FILENAME)
+        try:
+            count = self.state_machine.journal.persist(path)
+        except OSError as e:
+            print(f"状態遷移の記録の保存に失敗しました: {e}")
+            return
+        if count:
+            print(f"状態遷移 {count} 件を '{path}' に保存しました。")
     
     def cleanup(self) -> None:
         """リソースをクリーンアップします"""
         print("\nクリーンアップ中...")
         self.servo.cleanup()
         self.sensor.cleanup()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.logger.cleanup()
+        self._persist_transitions()
+        
+        import RPi.GPIO as GPIO
         GPIO.cleanup()
         print("クリーンアップ完了。")
 
@@ -214,8 +256,15 @@ class HydrationMonitor:
 def main():
     """メインエントリポイント"""
     monitor = None
+    profiler = StartupProfiler()
+    show_report = bool(os.getenv("STARTUP_PROFILE"))
+    if show_report:
+        profiler.track_imports()
     try:
-        monitor = HydrationMonitor()
+        monitor = HydrationMonitor(profiler)
+        if show_report:
+            profiler.stop_tracking_imports()
+            print(profiler.report())
         monitor.run()
     except (KeyboardInterrupt, SystemExit):
         print("\n\nプログラムを終了します。")
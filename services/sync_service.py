@@ -1,17 +1,28 @@
 """
 Supabase同期サービスモジュール
 
-ローカルのCSVログファイルからデータを読み取り、
+ローカルのログファイル（CSV・バイナリ形式・SQLite）からデータを読み取り、
 Supabaseデータベースに同期します。
 """
 import csv
 import os
+import sqlite3
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, List, Dict, Optional, Any, Tuple
 from dotenv import load_dotenv
 
+from core.binary_log import is_binary_log, read_binary_log
+from core.event_store import WeightEventStore, is_sqlite_log
+from core.logger import sealed_segments
+
+if TYPE_CHECKING:
+    # supabaseはhttpx/pydantic/websocketsなどを読み込むため、接続時までインポートしない
+    from supabase import Client
+
+# CSVのログと同じ時刻の形式
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 
 class SupabaseSyncService:
     """
@@ -23,7 +34,8 @@ class SupabaseSyncService:
         log_file_path: str,
         processed_logs_dir: str,
         cup_weight_g: int = 205,
-        gram_to_ml: float = 1.0
+        gram_to_ml: float = 1.0,
+        segmented: bool = False
     ):
         """
         同期サービスを初期化します。
@@ -33,6 +45,8 @@ class SupabaseSyncService:
             processed_logs_dir: 処理済みログファイルの保存先ディレクトリ
             cup_weight_g: コップの重量（グラム）
             gram_to_ml: グラムからミリリットルへの変換係数
+            segmented: ロガーがセグメントを封印する場合True。
+                       記録中のファイルには触れず、封印済みのセグメントだけを処理します
         """
         load_dotenv()
         
@@ -40,13 +54,23 @@ class SupabaseSyncService:
         self.processed_logs_dir = processed_logs_dir
         self.cup_weight_g = cup_weight_g
         self.gram_to_ml = gram_to_ml
+        self.segmented = segmented
+        
+        # calculate_intake_events() で読み取り、アーカイブの対象になるファイル
+        self._source_paths: List[str] = []
+        
+        # 前回のバッチの最後の記録を引き継ぐ場合、今回のバッチの最後の記録（アーカイブ時に保存する）
+        self._last_row: Optional[Tuple[datetime, float]] = None
         
         # 環境変数から設定を読み込み
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_KEY")
         self.user_id = os.getenv("USER_ID")
         
-        self.supabase_client: Optional[Client] = None
+        self.supabase_client: Optional["Client"] = None
+        
+        # SQLiteの場合、calculate_intake_events() で読み取った未同期の行の最大ID
+        self._unsynced_max_id = 0
     
     def _validate_config(self) -> bool:
         """
@@ -76,6 +100,7 @@ class SupabaseSyncService:
             return False
         
         try:
+            from supabase import create_client
             self.supabase_client = create_client(self.supabase_url, self.supabase_key)
             print("Supabaseへの接続に成功しました。")
             return True
@@ -83,21 +108,106 @@ class SupabaseSyncService:
             print(f"Supabaseへの接続に失敗しました: {e}")
             return False
     
-    def calculate_intake_events(self) -> List[Dict[str, Any]]:
+    def calculate_intake_events(self, carry_over: bool = False) -> List[Dict[str, Any]]:
         """
-        CSVファイルから水分摂取イベントを計算します。
+        ログファイルから水分摂取イベントを計算します。
+        
+        Args:
+            carry_over: セグメントの場合に、前回アーカイブしたバッチの最後の記録を先頭に加える場合True。
+                        バッチの境目をまたいだ摂取も計算されます（run_sync() が使用します）
         
         Returns:
             List[Dict]: 摂取イベントのリスト
         """
-        if not os.path.exists(self.log_file_path):
+        self._source_paths = []
+        self._unsynced_max_id = 0
+        self._last_row = None
+        if is_sqlite_log(self.log_file_path):
+            return self._calculate_intake_events_sqlite()
+        
+        if self.segmented:
+            paths = sealed_segments(self.log_file_path)
+            if not paths:
+                print(f"'{self.log_file_path}' の封印済みのセグメントはありません。")
+                return []
+        elif os.path.exists(self.log_file_path):
+            paths = [self.log_file_path]
+        else:
             print(f"エラー: ログファイル '{self.log_file_path}' が見つかりません。")
             return []
+        self._source_paths = paths
+        carry_over = carry_over and self.segmented
+        seed_row = self._load_last_row() if carry_over else None
+        
+        if is_binary_log(paths[0]):
+            return self._calculate_intake_events_binary(paths, seed_row, carry_over)
+        
+        events = []
+        for path in paths:
+            rows = self._read_csv_events(path)
+            if rows is None:
+                # 読み取れなかったファイルはアーカイブしない
+                self._source_paths = []
+                return []
+            events.extend(rows)
+        
+        if carry_over and events:
+            events.sort(key=lambda x: x['timestamp'])
+            self._last_row = (events[-1]['timestamp'], events[-1]['weight'])
+            if seed_row is not None and seed_row[0] <= events[0]['timestamp']:
+                events.insert(0, {'timestamp': seed_row[0], 'weight': seed_row[1]})
+        
+        return self._intake_from_events(events)
+    
+    @property
+    def last_row_path(self) -> str:
+        """前回アーカイブしたバッチの最後の記録を保存するファイルのパス"""
+        stem = os.path.splitext(os.path.basename(self.log_file_path))[0]
+        return os.path.join(self.processed_logs_dir, f"{stem}.last_row")
+    
+    def _load_last_row(self) -> Optional[Tuple[datetime, float]]:
+        """
+        前回アーカイブしたバッチの最後の記録を読み取ります。
+        
+        Returns:
+            Optional[Tuple[datetime, float]]: (日時, 重量)。ない場合・読み取れない場合None
+        """
+        try:
+            with open(self.last_row_path, 'r', encoding='utf-8') as f:
+                timestamp, weight = f.read().strip().split(',')
+            return datetime.strptime(timestamp, TIMESTAMP_FORMAT), float(weight)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"'{self.last_row_path}' を読み取れませんでした: {e}")
+            return None
+    
+    def _save_last_row(self) -> None:
+        """今回のバッチの最後の記録を、次のバッチの比較の起点として保存します"""
+        if self._last_row is None:
+            return
+        timestamp, weight = self._last_row
+        tmp_path = self.last_row_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(f"{timestamp.strftime(TIMESTAMP_FORMAT)},{weight:.2f}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.last_row_path)
+        except OSError as e:
+            print(f"'{self.last_row_path}' の保存中にエラーが発生しました: {e}")
+    
+    def _read_csv_events(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        CSVのログから重量の記録を読み取ります。
         
+        Returns:
+            Optional[List[Dict]]: 重量の記録のリスト（読み取りに失敗した場合None）
+        """
         events = []
         
         try:
-            with open(self.log_file_path, 'r', newline='', encoding='utf-8') as f:
+            with open(path, 'r', newline='', encoding='utf-8') as f:
                 reader = csv.reader(f)
                 
                 # ヘッダーをスキップ
@@ -111,15 +221,27 @@ class SupabaseSyncService:
                 for row in reader:
                     try:
                         events.append({
-                            'timestamp': datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S'),
+                            'timestamp': datetime.strptime(row[0], TIMESTAMP_FORMAT),
                             'weight': float(row[1])
                         })
                     except (ValueError, IndexError) as e:
-                        print(f"'{self.log_file_path}'の行'{row}'をスキップしました: {e}")
+                        print(f"'{path}'の行'{row}'をスキップしました: {e}")
         except IOError as e:
             print(f"ログファイルの読み取り中にエラーが発生しました: {e}")
-            return []
+            return None
         
+        return events
+    
+    def _intake_from_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        重量の記録（timestamp・weight）から摂取イベントを計算します。
+        
+        Args:
+            events: 重量の記録のリスト
+        
+        Returns:
+            List[Dict]: 摂取イベントのリスト
+        """
         # タイムスタンプ順にソート
         events.sort(key=lambda x: x['timestamp'])
         
@@ -148,6 +270,113 @@ class SupabaseSyncService:
         
         return intake_events
     
+    def _calculate_intake_events_sqlite(self) -> List[Dict[str, Any]]:
+        """
+        SQLiteのログの未同期の行から水分摂取イベントを計算します。
+        
+        直前に同期した行を先頭に加えるため、同期の間に飲んだ分も計算されます。
+        
+        Returns:
+            List[Dict]: 摂取イベントのリスト
+        """
+        try:
+            store = WeightEventStore(self.log_file_path)
+            try:
+                rows, previous, self._unsynced_max_id = store.unsynced()
+            finally:
+                store.close()
+        except sqlite3.Error as e:
+            print(f"ログファイルの読み取り中にエラーが発生しました: {e}")
+            return []
+        if previous is not None:
+            rows.insert(0, previous)
+        # CSVと同じく秒単位の時刻・小数点以下2桁の重量として扱う
+        events = [
+            {'timestamp': datetime.fromtimestamp(ts_ms // 1000), 'weight': round(weight, 2)}
+            for ts_ms, weight in rows
+        ]
+        return self._intake_from_events(events)
+    
+    def mark_synced(self) -> bool:
+        """
+        SQLiteのログで、同期した行を同期済みにします。
+        
+        Returns:
+            bool: 成功した場合True
+        """
+        try:
+            store = WeightEventStore(self.log_file_path)
+            try:
+                count = store.mark_synced(self._unsynced_max_id)
+            finally:
+                store.close()
+            print(f"{count}件の記録を同期済みにしました。")
+            return True
+        except sqlite3.Error as e:
+            print(f"同期済みの記録の更新中にエラーが発生しました: {e}")
+            return False
+    
+    def _calculate_intake_events_binary(
+        self,
+        paths: List[str],
+        seed_row: Optional[Tuple[datetime, float]] = None,
+        carry_over: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        バイナリ形式のログから、CSVと同じ規則で水分摂取イベントを計算します。
+        
+        ファイルは mmap で読み取り、差分の計算は NumPy でまとめて行います。
+        
+        Args:
+            paths: ログファイル（セグメント）のパス
+            seed_row: 先頭に加える前回のバッチの最後の記録
+            carry_over: 今回のバッチの最後の記録をアーカイブ時に保存する場合True
+        
+        Returns:
+            List[Dict]: 摂取イベントのリスト
+        """
+        import numpy as np
+        
+        try:
+            parts = [read_binary_log(path) for path in paths]
+            records = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        except (OSError, ValueError) as e:
+            print(f"ログファイルの読み取り中にエラーが発生しました: {e}")
+            self._source_paths = []
+            return []
+        if len(records) < (1 if carry_over else 2):
+            return []
+        
+        # CSVと同じく秒単位の時刻・小数点以下2桁の重量として扱う
+        seconds = records['ts_ms'] // 1000
+        order = np.argsort(seconds, kind='stable')
+        seconds = seconds[order]
+        weights = np.round(records['weight'][order].astype(np.float64), 2)
+        
+        if carry_over:
+            self._last_row = (datetime.fromtimestamp(int(seconds[-1])), float(weights[-1]))
+            if seed_row is not None and int(seed_row[0].timestamp()) <= seconds[0]:
+                seconds = np.concatenate(([int(seed_row[0].timestamp())], seconds))
+                weights = np.concatenate(([seed_row[1]], weights))
+            if len(weights) < 2:
+                return []
+        
+        prev_weights = weights[:-1]
+        weight_diff = prev_weights - weights[1:]
+        drank = weight_diff > 0
+        # 減少した場合は減少量、大幅に増加した場合（水の補充）は補充前の水の量
+        amounts = np.where(
+            drank,
+            np.trunc(weight_diff * self.gram_to_ml),
+            np.trunc(prev_weights - self.cup_weight_g)
+        )
+        keep = drank | ((weight_diff < -10) & (amounts > 0))
+        
+        return [
+            {'time': datetime.fromtimestamp(second), 'amount': int(amount)}
+            for second, amount in zip(seconds[1:][keep].tolist(), amounts[keep].tolist())
+        ]
+    
     def sync_to_supabase(self, intake_events: List[Dict[str, Any]]) -> bool:
         """
         計算された摂取イベントをSupabaseに同期します。
@@ -193,26 +422,47 @@ class SupabaseSyncService:
         """
         処理済みログファイルをアーカイブします。
         
+        セグメントの場合は、calculate_intake_events() で読み取った封印済みのセグメントだけを移動します。
+        ファイルごとに移動するため、1つの移動に失敗しても残りは移動し、
+        すでに移動済みのファイルは読み飛ばします（失敗した後に呼び直しても安全です）。
+        calculate_intake_events(carry_over=True) で読み取った場合は、すべて移動できた後に
+        バッチの最後の記録を次のバッチの比較の起点として保存します。
+        
         Returns:
-            bool: アーカイブに成功した場合True
+            bool: すべてのファイルのアーカイブに成功した場合True
         """
         # 処理済みログディレクトリを作成
         Path(self.processed_logs_dir).mkdir(parents=True, exist_ok=True)
         
-        try:
-            base_filename = os.path.basename(self.log_file_path)
-            timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+        failed = []
+        for path in self._source_paths or [self.log_file_path]:
+            if not os.path.exists(path):
+                print(f"'{path}'はすでに移動されています。")
+                continue
+            try:
+                new_path = self._archive_path(timestamp_str, os.path.basename(path))
+                os.rename(path, new_path)
+                print(f"'{path}'を'{new_path}'に移動しました。")
+            except OSError as e:
+                print(f"'{path}'の移動中にエラーが発生しました: {e}")
+                failed.append(path)
+        if failed:
+            print(f"{len(failed)}件のファイルを移動できませんでした。次回の同期で再試行します。")
+            return False
+        self._save_last_row()
+        return True
+    
+    def _archive_path(self, timestamp_str: str, base_filename: str) -> str:
+        """処理済みのファイルの移動先を返します（既存のファイルは上書きしない）"""
+        new_path = os.path.join(self.processed_logs_dir, f"{timestamp_str}_{base_filename}")
+        n = 1
+        while os.path.exists(new_path):
             new_path = os.path.join(
-                self.processed_logs_dir,
-                f"{timestamp_str}_{base_filename}"
+                self.processed_logs_dir, f"{timestamp_str}_{n}_{base_filename}"
             )
-            
-            os.rename(self.log_file_path, new_path)
-            print(f"'{self.log_file_path}'を'{new_path}'に移動しました。")
-            return True
-        except OSError as e:
-            print(f"'{self.log_file_path}'の移動中にエラーが発生しました: {e}")
-            return False
+            n += 1
+        return new_path
     
     def run_sync(self) -> bool:
         """
@@ -224,21 +474,27 @@ class SupabaseSyncService:
         print(f"--- {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
         
         # 摂取イベントを計算
-        intake_events = self.calculate_intake_events()
-        if not intake_events:
+        intake_events = self.calculate_intake_events(carry_over=True)
+        if intake_events:
+            # Supabaseに接続
+            if not self.connect():
+                return False
+            
+            # データを同期
+            if not self.sync_to_supabase(intake_events):
+                return False
+        elif self._source_paths or self._unsynced_max_id:
+            # 飲まなかった間の記録も処理済みにし、次回の読み取りの対象から外す
+            print("ログファイルからイベントが検出されませんでした。読み取った記録を処理済みにします。")
+        else:
             print("ログファイルからイベントが検出されませんでした。処理を終了します。")
             return False
         
-        # Supabaseに接続
-        if not self.connect():
-            return False
-        
-        # データを同期
-        if not self.sync_to_supabase(intake_events):
-            return False
-        
-        # ログファイルをアーカイブ
-        if not self.archive_log_file():
+        # SQLiteは同期済みの印を付け、それ以外はログファイルをアーカイブ
+        if is_sqlite_log(self.log_file_path):
+            if not self.mark_synced():
+                return False
+        elif not self.archive_log_file():
             return False
         
         print("処理が完了しました。")
@@ -272,9 +528,12 @@ def calculate_intake_from_csv(
 
 def main():
     """メイン関数（スタンドアロン実行用）"""
+    from config.settings import settings
+    
     service = SupabaseSyncService(
-        log_file_path="./waiting_log/weight_log.csv",
-        processed_logs_dir="./processed_logs"
+        log_file_path=settings.log_file_path,
+        processed_logs_dir=settings.logging.PROCESSED_LOG_DIR,
+        segmented=settings.segmented_log
     )
     service.run_sync()
 
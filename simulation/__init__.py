@@ -0,0 +1,15 @@
+"""
+シミュレーションモジュール
+"""
+from .fleet_simulator import (
+    DrinkingPattern,
+    DrinkSchedule,
+    FleetReport,
+    FleetSimulator,
+    generate_schedule,
+)
+
+__all__ = [
+    'DrinkingPattern', 'DrinkSchedule', 'FleetReport', 'FleetSimulator',
+    'generate_schedule',
+]
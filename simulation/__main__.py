@@ -0,0 +1,7 @@
+"""
+python -m simulation でフリートシミュレーションを実行します
+"""
+from .fleet_simulator import main
+
+if __name__ == '__main__':
+    main()
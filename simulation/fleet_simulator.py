@@ -0,0 +1,464 @@
+"""
+多数の仮想ステーションによるフリートシミュレータ
+
+MONITORING_DURATION_S・ALERT_DURATION_S・WEIGHT_THRESHOLD_G などを
+全台で変更する前に、その影響（警告の回数、水分補給の検知遅れ）を確認するためのものです。
+
+HydrationStateMachine と監視エンジン（core/orchestrator.py）の遷移規則を、
+状態・基準重量・期限を NumPy 配列で持つ N 台分に対して一斉に適用します。
+時刻を刻みで進めるのではなく、各反復で全ステーションがそれぞれの
+次のイベント（コップを取る・置く・整定・期限）まで進むため、
+1万台・1週間分でも1コアで数秒で終わります。
+
+実機との違い:
+    - サンプルは sample_interval_s ごとの格子（ステーションごとに位相が異なる）でのみ観測します
+    - 整定は重量のばらつきを見ず、検知から SETTLE_WINDOW_S 後に完了するものとします
+    - サーボの動作時間（初期位置へ戻る間の判定停止など）は考慮しません
+    - 警告中の水分補給は、警告開始時の重量ではなく基準重量からの減少で判定します
+
+使い方:
+    python -m simulation [監視時間(秒)] [警告時間(秒)] [しきい値(g)]
+"""
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+import numpy as np
+
+from config.settings import MonitoringConfig, settings
+from core.state_machine import HydrationState, Trigger
+from core.transition_journal import TransitionRecord
+
+DAY_S = 86400.0
+
+# 配列上の状態ときっかけの番号（列挙の定義順）
+_STATES = tuple(HydrationState)
+_TRIGGERS = tuple(Trigger)
+IDLE = _STATES.index(HydrationState.IDLE)
+MONITORING = _STATES.index(HydrationState.MONITORING)
+ALERTING = _STATES.index(HydrationState.ALERTING)
+START_MONITORING = _TRIGGERS.index(Trigger.START_MONITORING)
+RESET_MONITORING = _TRIGGERS.index(Trigger.RESET_MONITORING)
+TIMEOUT = _TRIGGERS.index(Trigger.TIMEOUT)
+STOP = _TRIGGERS.index(Trigger.STOP)
+
+# イベントの種類（同時刻の場合はこの順に処理）
+_REMOVE, _PLACE, _SETTLE, _DEADLINE = range(4)
+
+
+@dataclass(frozen=True)
+class DrinkingPattern:
+    """合成する水分補給パターン"""
+    # 起床・就寝の時刻（時）。起床時に満水のコップを置き、就寝時に片付ける
+    wake_hour: float = 7.0
+    sleep_hour: float = 23.0
+    # 起床・就寝時刻の日ごとのばらつき（標準偏差、時）
+    day_jitter_h: float = 0.5
+    # 水分補給の平均間隔（秒）。間隔は指数分布
+    mean_drink_interval_s: float = 2400.0
+    # コップを持ち上げている時間の範囲（秒）。一様分布
+    min_lift_s: float = 5.0
+    max_lift_s: float = 40.0
+    # 1回に飲む量（グラム）の平均と標準偏差
+    sip_mean_g: float = 60.0
+    sip_std_g: float = 20.0
+    # コップの重さと満水時の水の量（グラム）
+    cup_g: float = 205.0
+    full_water_g: float = 300.0
+    # 残りがこれを下回ったら、持ち上げている間に満水まで注ぎ足す（グラム）
+    refill_below_g: float = 50.0
+
+
+@dataclass
+class DrinkSchedule:
+    """
+    ステーションごとのコップの設置区間
+
+    各行が1台で、区間 j の間 [place_at, remove_at) は重量 weight_g のコップが載っています。
+    is_drink は区間の終わりが水分補給（Falseは就寝時の片付け）かどうかです。
+    使わない区間は place_at が inf です。
+    """
+    place_at: np.ndarray
+    remove_at: np.ndarray
+    weight_g: np.ndarray
+    is_drink: np.ndarray
+
+    @property
+    def n_stations(self) -> int:
+        return self.place_at.shape[0]
+
+
+@dataclass
+class FleetReport:
+    """シミュレーション結果"""
+    n_stations: int
+    days: float
+    # ステーションごとの件数
+    alerts: np.ndarray
+    drinks: np.ndarray
+    detected_drinks: np.ndarray
+    missed_drinks: np.ndarray
+    # コップを持ち上げてから水分補給を検知するまでの時間（秒）
+    detection_latency_s: np.ndarray
+    # 警告開始から水分補給で警告が止まるまでの時間（秒）
+    alert_response_s: np.ndarray
+    # 水分補給がないまま警告時間が終わった回数
+    unanswered_alerts: int
+    iterations: int
+    elapsed_s: float
+    transitions: Optional[List[List[TransitionRecord]]] = field(default=None, repr=False)
+
+    @property
+    def alerts_per_station_day(self) -> float:
+        """1台1日あたりの警告回数"""
+        return float(self.alerts.sum()) / (self.n_stations * self.days)
+
+    @property
+    def detection_rate(self) -> float:
+        """水分補給のうち検知できた割合"""
+        total = int(self.drinks.sum())
+        return float(self.detected_drinks.sum()) / total if total else 0.0
+
+    def summary(self) -> str:
+        """結果を表示用の文字列にまとめます"""
+        lines = [
+            f"ステーション数: {self.n_stations}, 期間: {self.days:g} 日"
+            f"（{self.elapsed_s:.2f} 秒, {self.iterations} 反復）",
+            f"警告: {int(self.alerts.sum())} 回（1台1日あたり {self.alerts_per_station_day:.2f} 回、"
+            f"うち水分補給なしで終了 {self.unanswered_alerts} 回）",
+            f"水分補給: {int(self.drinks.sum())} 回, 検知率 {self.detection_rate * 100:.1f}%"
+            f"（未検知 {int(self.missed_drinks.sum())} 回）",
+        ]
+        for label, values in (
+            ("検知遅れ", self.detection_latency_s),
+            ("警告から水分補給まで", self.alert_response_s),
+        ):
+            if len(values) == 0:
+                lines.append(f"{label}: データなし")
+                continue
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            lines.append(
+                f"{label}: p50 {p50:.2f} 秒, p90 {p90:.2f} 秒, p99 {p99:.2f} 秒, "
+                f"最大 {values.max():.2f} 秒"
+            )
+        return "\n".join(lines)
+
+
+def generate_schedule(
+    n_stations: int,
+    days: int,
+    pattern: DrinkingPattern = DrinkingPattern(),
+    rng: Optional[np.random.Generator] = None
+) -> DrinkSchedule:
+    """
+    合成の水分補給パターンからコップの設置区間を生成します。
+
+    Args:
+        n_stations: ステーション数
+        days: 日数
+        pattern: 水分補給パターン
+        rng: 乱数生成器
+
+    Returns:
+        DrinkSchedule: 設置区間
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    p = pattern
+    shape = (n_stations, days)
+    day_start = np.arange(days) * DAY_S
+    wake = day_start + p.wake_hour * 3600 + rng.normal(0.0, p.day_jitter_h * 3600, shape)
+    sleep = day_start + p.sleep_hour * 3600 + rng.normal(0.0, p.day_jitter_h * 3600, shape)
+
+    # 1日の起きている時間に収まる回数の上限（平均の2倍と余裕）
+    awake_s = (p.sleep_hour - p.wake_hour + 4 * p.day_jitter_h) * 3600
+    max_drinks = int(np.ceil(2 * awake_s / p.mean_drink_interval_s)) + 8
+
+    lift_at = wake[..., None] + np.cumsum(
+        rng.exponential(p.mean_drink_interval_s, shape + (max_drinks,)), axis=2
+    )
+    returned_at = lift_at + rng.uniform(p.min_lift_s, p.max_lift_s, shape + (max_drinks,))
+    # 就寝までに戻せた水分補給だけを使う（先頭から連続する分）
+    valid = np.cumprod(returned_at < sleep[..., None], axis=2).astype(bool)
+    count = valid.sum(axis=2)
+
+    # 飲んだ後の重量（残りが少なければ注ぎ足す）
+    sips = np.clip(rng.normal(p.sip_mean_g, p.sip_std_g, shape + (max_drinks,)), 1.0, None)
+    water = np.full(shape, p.full_water_g)
+    weight = np.empty(shape + (max_drinks + 1,))
+    weight[..., 0] = p.cup_g + water
+    for j in range(max_drinks):
+        water = np.maximum(water - sips[..., j], 0.0)
+        water = np.where(water < p.refill_below_g, p.full_water_g, water)
+        weight[..., j + 1] = p.cup_g + water
+
+    # 区間 j は (j-1)回目の水分補給で戻してから j 回目に持ち上げるまで
+    slots = np.arange(max_drinks + 1)
+    place_at = np.concatenate([wake[..., None], returned_at], axis=2)
+    remove_at = np.concatenate([lift_at, np.full(shape + (1,), np.inf)], axis=2)
+    last = slots == count[..., None]
+    remove_at = np.where(last, sleep[..., None], remove_at)
+    is_drink = slots < count[..., None]
+    place_at = np.where(slots <= count[..., None], place_at, np.inf)
+
+    # ステーションごとに時刻順に並べ、使わない区間を後ろに詰める
+    place_at = place_at.reshape(n_stations, -1)
+    order = np.argsort(place_at, axis=1, kind='stable')
+    width = int((count + 1).sum(axis=1).max())
+    order = order[:, :width]
+
+    def take(values: np.ndarray) -> np.ndarray:
+        return np.take_along_axis(values.reshape(n_stations, -1), order, axis=1)
+
+    return DrinkSchedule(
+        place_at=take(place_at),
+        remove_at=take(remove_at),
+        weight_g=take(weight),
+        is_drink=take(is_drink),
+    )
+
+
+class FleetSimulator:
+    """
+    N台のステーションを一斉にシミュレートするクラス
+
+    各ステーションは core/orchestrator.py と同じ規則で遷移します。
+        - IDLE: しきい値以上のコップが置かれ、整定したら監視を開始
+          （水分補給の直後は RESET_MONITORING、それ以外は START_MONITORING）
+        - MONITORING: コップが持ち上げられたら水分補給として IDLE へ、
+          監視時間が過ぎたら ALERTING へ
+        - ALERTING: 水分補給または警告時間の終了で IDLE へ
+    """
+
+    def __init__(
+        self,
+        n_stations: int,
+        monitoring: MonitoringConfig = settings.monitoring,
+        pattern: DrinkingPattern = DrinkingPattern(),
+        sample_interval_s: float = 0.1,
+        seed: Optional[int] = None,
+        trace: bool = False
+    ):
+        """
+        シミュレータを初期化します。
+
+        Args:
+            n_stations: ステーション数
+            monitoring: 監視設定（dataclasses.replace で変更したものを渡す）
+            pattern: 水分補給パターン
+            sample_interval_s: 重量サンプルの間隔（秒）。HX711の10SPSで0.1秒
+            seed: 乱数のシード
+            trace: Trueの場合、ステーションごとの遷移を FleetReport.transitions に残す（少数台向け）
+        """
+        detect_delay = monitoring.DRINK_CONFIRM_SAMPLES * sample_interval_s
+        if pattern.min_lift_s <= detect_delay:
+            raise ValueError("min_lift_s must be longer than the drink detection delay")
+        self.n_stations = n_stations
+        self.monitoring = monitoring
+        self.pattern = pattern
+        self.sample_interval_s = sample_interval_s
+        self.trace = trace
+        self._rng = np.random.default_rng(seed)
+        # ステーションごとのサンプル格子の位相
+        self.sample_phase = self._rng.uniform(0.0, sample_interval_s, n_stations)
+        self.schedule: Optional[DrinkSchedule] = None
+
+    def next_sample(self, t: np.ndarray, phase: np.ndarray) -> np.ndarray:
+        """時刻 t 以降で最初のサンプルの時刻を返します"""
+        interval = self.sample_interval_s
+        return phase + np.ceil((t - phase) / interval) * interval
+
+    def run(self, days: int = 7, schedule: Optional[DrinkSchedule] = None) -> FleetReport:
+        """
+        シミュレーションを実行します。
+
+        Args:
+            days: シミュレートする日数
+            schedule: コップの設置区間（省略時は pattern から生成）
+
+        Returns:
+            FleetReport: 結果
+        """
+        started = time.perf_counter()
+        if schedule is None:
+            schedule = generate_schedule(self.n_stations, days, self.pattern, self._rng)
+        self.schedule = schedule
+        cfg = self.monitoring
+        n = self.n_stations
+        horizon = days * DAY_S
+        interval = self.sample_interval_s
+        confirm_delay = (cfg.DRINK_CONFIRM_SAMPLES - 1) * interval
+        settle_s = cfg.SETTLE_WINDOW_S
+        threshold = cfg.WEIGHT_THRESHOLD_G
+
+        # 末尾に番兵の区間を足し、すべての区間を使い切ったステーションは進まないようにする
+        pad = np.full((n, 1), np.inf)
+        width = schedule.place_at.shape[1] + 1
+        place_flat = np.hstack([schedule.place_at, pad]).ravel()
+        remove_flat = np.hstack([schedule.remove_at, pad]).ravel()
+        weight_flat = np.hstack([schedule.weight_g, np.zeros((n, 1))]).ravel()
+        drink_flat = np.hstack([schedule.is_drink, np.zeros((n, 1), dtype=bool)]).ravel()
+
+        rows = np.arange(n)
+        phase = self.sample_phase
+        state = np.full(n, IDLE, dtype=np.uint8)
+        slot = np.zeros(n, dtype=np.int64)
+        after_drink = np.zeros(n, dtype=bool)
+        baseline = np.zeros(n)
+        alert_start = np.zeros(n)
+        # 現在（または次）の区間の値
+        cur_remove = remove_flat[rows * width]
+        cur_weight = weight_flat[rows * width]
+        cur_drink = drink_flat[rows * width]
+
+        # 種類ごとの次のイベント時刻。行はビューとして更新する
+        events = np.full((4, n), np.inf)
+        t_remove, t_place, settle_at, deadline = events
+        t_place[:] = place_flat[rows * width]
+
+        alerts = np.zeros(n, dtype=np.int64)
+        drinks = np.zeros(n, dtype=np.int64)
+        detected = np.zeros(n, dtype=np.int64)
+        missed = np.zeros(n, dtype=np.int64)
+        latencies: List[np.ndarray] = []
+        responses: List[np.ndarray] = []
+        unanswered = 0
+        trace: List[tuple] = []
+
+        def record(index, t, old, new, trigger, weight=None):
+            if self.trace and len(index):
+                trace.append((
+                    index, t[index], old[index], new, trigger,
+                    None if weight is None else weight[index]
+                ))
+
+        iterations = 0
+        while True:
+            t = events.min(axis=0)
+            pending = t <= horizon
+            if not pending.any():
+                break
+            iterations += 1
+            old = state.copy()
+            # 同時刻のイベントは REMOVE, PLACE, SETTLE, DEADLINE の順に1つだけ処理する
+            selected = []
+            for row in events:
+                mask = pending & (row == t)
+                pending &= ~mask
+                selected.append(np.flatnonzero(mask))
+            remove, place, settle, expire = selected
+
+            # コップが持ち上げられた（水分補給・就寝時の片付け）
+            if len(remove):
+                i = remove
+                drink = cur_drink[i]
+                watching = old[i] != IDLE
+                drinks[i[drink]] += 1
+                detected[i[watching & drink]] += 1
+                missed[i[~watching & drink]] += 1
+                latencies.append(t[i[watching & drink]] - cur_remove[i[watching & drink]])
+                answered = i[(old[i] == ALERTING) & drink]
+                responses.append(t[answered] - alert_start[answered])
+                stopped = i[watching]
+                record(stopped, t, old, IDLE, STOP)
+                state[stopped] = IDLE
+                # 警告中の水分補給では、次の設置で監視を新しく始める
+                after_drink[stopped] = old[stopped] == MONITORING
+                deadline[stopped] = np.inf
+                settle_at[i] = np.inf
+                t_remove[i] = np.inf
+                slot[i] = np.minimum(slot[i] + 1, width - 1)
+                flat = i * width + slot[i]
+                t_place[i] = place_flat[flat]
+                cur_remove[i] = remove_flat[flat]
+                cur_weight[i] = weight_flat[flat]
+                cur_drink[i] = drink_flat[flat]
+
+            # コップが置かれた（IDLEのみ）
+            if len(place):
+                i = place
+                t_place[i] = np.inf
+                t_remove[i] = self.next_sample(cur_remove[i], phase[i]) + confirm_delay
+                heavy = i[cur_weight[i] >= threshold]
+                settle_at[heavy] = self.next_sample(t[heavy], phase[heavy]) + settle_s
+
+            # 整定して監視を開始
+            if len(settle):
+                i = settle
+                record(i[after_drink[i]], t, old, MONITORING, RESET_MONITORING, cur_weight)
+                record(i[~after_drink[i]], t, old, MONITORING, START_MONITORING, cur_weight)
+                state[i] = MONITORING
+                baseline[i] = cur_weight[i]
+                deadline[i] = t[i] + cfg.MONITORING_DURATION_S
+                settle_at[i] = np.inf
+
+            # 期限（監視のタイムアウト・警告の終了）
+            if len(expire):
+                timeout = expire[old[expire] == MONITORING]
+                record(timeout, t, old, ALERTING, TIMEOUT)
+                state[timeout] = ALERTING
+                alerts[timeout] += 1
+                alert_start[timeout] = t[timeout]
+                deadline[timeout] = t[timeout] + cfg.ALERT_DURATION_S
+
+                ended = expire[old[expire] == ALERTING]
+                unanswered += len(ended)
+                record(ended, t, old, IDLE, STOP)
+                state[ended] = IDLE
+                after_drink[ended] = False
+                deadline[ended] = np.inf
+                # コップは載ったままなので、整定を待って監視をやり直す
+                heavy = ended[baseline[ended] >= threshold]
+                settle_at[heavy] = self.next_sample(t[heavy], phase[heavy]) + settle_s
+
+        return FleetReport(
+            n_stations=n,
+            days=days,
+            alerts=alerts,
+            drinks=drinks,
+            detected_drinks=detected,
+            missed_drinks=missed,
+            detection_latency_s=np.concatenate(latencies) if latencies else np.empty(0),
+            alert_response_s=np.concatenate(responses) if responses else np.empty(0),
+            unanswered_alerts=unanswered,
+            iterations=iterations,
+            elapsed_s=time.perf_counter() - started,
+            transitions=self._build_transitions(trace) if self.trace else None,
+        )
+
+    def _build_transitions(self, trace: List[tuple]) -> List[List[TransitionRecord]]:
+        """記録した遷移をステーションごとの TransitionRecord に並べ直します"""
+        result: List[List[TransitionRecord]] = [[] for _ in range(self.n_stations)]
+        for stations, times, olds, new, trigger, weights in trace:
+            for i, station in enumerate(stations):
+                result[station].append(TransitionRecord(
+                    float(times[i]),
+                    _STATES[olds[i]].name,
+                    _STATES[new].name,
+                    _TRIGGERS[trigger].name,
+                    None if weights is None else float(weights[i]),
+                ))
+        return result
+
+
+# コマンドラインで省略した場合の値（config/settings.py に記載の本番の値）
+PRODUCTION_MONITORING_DURATION_S = 1500
+PRODUCTION_ALERT_DURATION_S = 300
+
+
+def main(argv: Optional[List[str]] = None):
+    """1万台・1週間をシミュレートし、結果を表示します"""
+    args = sys.argv[1:] if argv is None else argv
+    monitoring = replace(
+        settings.monitoring,
+        MONITORING_DURATION_S=int(args[0]) if len(args) > 0 else PRODUCTION_MONITORING_DURATION_S,
+        ALERT_DURATION_S=int(args[1]) if len(args) > 1 else PRODUCTION_ALERT_DURATION_S,
+        WEIGHT_THRESHOLD_G=int(args[2]) if len(args) > 2 else settings.monitoring.WEIGHT_THRESHOLD_G,
+    )
+    print(
+        f"監視時間 {monitoring.MONITORING_DURATION_S} 秒, "
+        f"警告時間 {monitoring.ALERT_DURATION_S} 秒, "
+        f"しきい値 {monitoring.WEIGHT_THRESHOLD_G} g"
+    )
+    report = FleetSimulator(10_000, monitoring, seed=0).run(days=7)
+    print(report.summary())
@@ -0,0 +1,58 @@
+"""
+HX711読み取りのCPU使用率ベンチマーク
+
+シミュレーションGPIO上で、ビジーウェイト（ポーリング）と
+DOUTエッジ検出による読み取りのCPU時間を比較します。
+
+    python tests/bench_acquisition.py [読み取り回数] [SPS]
+"""
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from utils.hx711 import HX711
+
+DOUT_PIN = 5
+SCK_PIN = 6
+
+
+def run(mode: str, reads: int, rate: float) -> None:
+    fake_gpio.reset(GPIO)
+    GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=rate, value_source=lambda ch: 123456)
+    hx = HX711(DOUT_PIN, SCK_PIN)
+    if mode == 'edge':
+        hx.enable_interrupt_mode(timeout=1.0)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(reads):
+        hx.read_long()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    hx.disable_interrupt_mode()
+    print(
+        f"{mode:>5}: {reads}回 {wall:.2f}秒, CPU {cpu:.2f}秒 "
+        f"(使用率 {100.0 * cpu / wall:5.1f}%, {1000.0 * wall / reads:.1f} ms/回)"
+    )
+
+
+def main():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    print(f"シミュレーションHX711: {rate:g} SPS")
+    run('poll', reads, rate)
+    run('edge', reads, rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+HX711フレームデコーダのマイクロベンチマーク
+
+従来の readNextBit/readNextByte による読み取りと、
+テーブル駆動の readRawFrame + decodeFrame の1フレームあたりの時間（ns）を比較します。
+GPIO呼び出しは何もしないフェイクに置き換えて、デコーダ自体のコストを測定します。
+
+    python tests/bench_decoder.py [フレーム数]
+"""
+import itertools
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from utils.hx711 import HX711
+
+DOUT_PIN = 5
+SCK_PIN = 6
+FORMATS = [('MSB', 'MSB'), ('LSB', 'MSB'), ('MSB', 'LSB'), ('LSB', 'LSB')]
+
+
+def legacy_read_long(hx: HX711) -> int:
+    """変更前の read_long と同じ手順（ビットごとのメソッド呼び出しとリスト）"""
+    with hx.readLock:
+        while not hx.is_ready():
+            pass
+        first = hx.readNextByte()
+        second = hx.readNextByte()
+        third = hx.readNextByte()
+        for _ in range(hx.GAIN):
+            hx.readNextBit()
+    if hx.byte_format == 'LSB':
+        data = [third, second, first]
+    else:
+        data = [first, second, third]
+    value = (data[0] << 16) | (data[1] << 8) | data[2]
+    return int(hx.convertFromTwosComplement24bit(value))
+
+
+def check_equivalence() -> None:
+    """シミュレーションHX711で新旧の読み取り結果が一致することを確認します"""
+    values = [0, 1, -1, 123456, -123456, 0x7fffff, -0x800000, 0x5a5a5a]
+    for byte_format, bit_format in FORMATS:
+        results = []
+        for read in (HX711.read_long, legacy_read_long):
+            fake_gpio.reset(GPIO)
+            source = itertools.cycle(values)
+            GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=2000, value_source=lambda ch: next(source))
+            hx = HX711(DOUT_PIN, SCK_PIN)
+            hx.set_reading_format(byte_format, bit_format)
+            results.append([read(hx) for _ in values])
+        assert results[0] == results[1], (byte_format, bit_format, results)
+    print("新旧デコーダの結果は全フォーマットで一致しました。")
+
+
+def bench(frames: int) -> None:
+    fake_gpio.reset(GPIO)
+    hx = HX711(DOUT_PIN, SCK_PIN)
+
+    # DOUTに固定パターンを返し、PD_SCKへの出力は捨てるGPIO
+    original_input, original_output = GPIO.input, GPIO.output
+    bits = itertools.cycle([0, 1, 1, 0, 1, 0, 0, 1, 0, 0, 0])
+    GPIO.input = lambda pin: next(bits)
+    GPIO.output = lambda pin, value: None
+    try:
+        for byte_format, bit_format in FORMATS:
+            hx.set_reading_format(byte_format, bit_format)
+            legacy = _time_per_frame(lambda: legacy_read_long(hx), frames)
+            table = _time_per_frame(hx.read_long, frames)
+            print(
+                f"{byte_format}/{bit_format}: 従来 {legacy:7.0f} ns/frame, "
+                f"テーブル駆動 {table:7.0f} ns/frame ({legacy / table:.2f}x)"
+            )
+    finally:
+        GPIO.input, GPIO.output = original_input, original_output
+
+
+def _time_per_frame(read, frames: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(frames):
+        read()
+    return (time.perf_counter_ns() - start) / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    check_equivalence()
+    bench(frames)
+
+
+if __name__ == '__main__':
+    main()
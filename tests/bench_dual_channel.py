@@ -0,0 +1,83 @@
+"""
+HX711 A/Bチャンネル読み取りのスループット比較
+
+シミュレーションGPIO上で、従来の get_value_A / get_value_B の交互呼び出し
+（チャンネルBの読み取りごとに set_gain で2回読み捨て）と、
+DualChannelSampler による交互読み取りの実効サンプル数/秒を比較します。
+
+    python tests/bench_dual_channel.py [秒数] [SPS]
+"""
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from controllers.weight_sampler import DualChannelSampler
+from utils.hx711 import HX711
+
+DOUT_PIN = 5
+SCK_PIN = 6
+RAW = {'A128': 300000, 'A64': 150000, 'B32': -40000}
+
+
+def _setup(rate: float) -> HX711:
+    fake_gpio.reset(GPIO)
+    GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=rate, value_source=lambda ch: RAW[ch])
+    hx = HX711(DOUT_PIN, SCK_PIN)
+    hx.enable_interrupt_mode(timeout=1.0)
+    hx.set_offset_A(0)
+    hx.set_offset_B(0)
+    return hx
+
+
+def bench_legacy(seconds: float, rate: float) -> None:
+    hx = _setup(rate)
+    counts = {'A': 0, 'B': 0}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        assert hx.get_value_A(1) == RAW['A128']
+        counts['A'] += 1
+        assert hx.get_value_B(1) == RAW['B32']
+        counts['B'] += 1
+    hx.disable_interrupt_mode()
+    _report("従来 (set_gain)", counts, seconds)
+
+
+def bench_interleaved(seconds: float, rate: float) -> None:
+    hx = _setup(rate)
+    sampler = DualChannelSampler(hx)
+    sampler.start()
+    time.sleep(seconds)
+    sampler.stop()
+    hx.disable_interrupt_mode()
+    assert set(sampler.buffer.latest(sampler.buffer.capacity)) == {RAW['A128']}
+    assert set(sampler.buffer_b.latest(sampler.buffer_b.capacity)) == {RAW['B32']}
+    counts = {'A': sampler.buffer.total, 'B': sampler.buffer_b.total}
+    _report("交互読み取り", counts, seconds)
+
+
+def _report(name: str, counts, seconds: float) -> None:
+    print(
+        f"{name:>16}: A {counts['A'] / seconds:5.1f} サンプル/秒, "
+        f"B {counts['B'] / seconds:5.1f} サンプル/秒"
+    )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 80.0
+    print(f"シミュレーションHX711: {rate:g} SPS, {seconds:g}秒")
+    bench_legacy(seconds, rate)
+    bench_interleaved(seconds, rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+重量ログの形式ごとのファイルサイズ・読み取り時間のベンチマーク
+
+1分ごとに1件、1年分の記録を CSV とバイナリ形式で書き出し、
+ファイルサイズと、同期処理と同じ読み取り（CSV: strptime と float、バイナリ: mmap）の時間を比較します。
+
+    python tests/bench_log_format.py [日数]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core import binary_log
+
+START = datetime(2026, 1, 1)
+
+
+def _write_logs(root: str, count: int):
+    """CSVとバイナリのログを同じ内容で書き出します"""
+    csv_path = os.path.join(root, "weight_log.csv")
+    bin_path = os.path.join(root, "weight_log.bin")
+    random.seed(1)
+    with open(csv_path, 'w', encoding='utf-8') as c, open(bin_path, 'wb') as b:
+        c.write("timestamp,weight_g\n")
+        b.write(binary_log.header_bytes())
+        for i in range(count):
+            timestamp = START + timedelta(minutes=i)
+            weight = round(random.uniform(205.0, 1800.0), 2)
+            c.write(f"{timestamp.strftime('%Y-%m-%d %H:%M:%S')},{weight:.2f}\n")
+            b.write(binary_log.encode_record(weight, timestamp))
+    return csv_path, bin_path
+
+
+def parse_csv(path: str) -> list:
+    """SupabaseSyncService.calculate_intake_events と同じ読み取り"""
+    events = []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            events.append({
+                'timestamp': datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S'),
+                'weight': float(row[1])
+            })
+    return events
+
+
+def parse_binary(path: str):
+    records = binary_log.read_binary_log(path)
+    # 列を一度は読み切る（mmap のページを実際に読み込む）
+    return records, float(records['weight'].sum()), int(records['ts_ms'][-1])
+
+
+def _time_ms(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    days = float(sys.argv[1]) if len(sys.argv) > 1 else 365
+    count = int(days * 24 * 60)
+    with tempfile.TemporaryDirectory() as root:
+        csv_path, bin_path = _write_logs(root, count)
+        csv_size = os.path.getsize(csv_path)
+        bin_size = os.path.getsize(bin_path)
+        print(f"{count} 件（{days:g} 日分、1分ごと）")
+        print(f"  サイズ: CSV {csv_size / 1e6:6.2f} MB, バイナリ {bin_size / 1e6:6.2f} MB "
+              f"({csv_size / bin_size:.2f}x 小さい)")
+        csv_ms = _time_ms(lambda: parse_csv(csv_path), 1)
+        bin_ms = _time_ms(lambda: parse_binary(bin_path), 5)
+        print(f"  読み取り: CSV {csv_ms:9.1f} ms, バイナリ {bin_ms:7.2f} ms ({csv_ms / bin_ms:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
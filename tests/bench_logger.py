@@ -0,0 +1,63 @@
+"""
+CSVロガーの書き込みベンチマーク
+
+記録のたびにファイルを開閉する変更前の方式と、ファイルを開いたままバッファする
+WeightLogger の records/sec を fsync の方針ごとに比較します。
+書き込み先は一時ディレクトリです（SDカードで測る場合は引数でディレクトリを指定してください）。
+
+    python tests/bench_logger.py [件数] [ディレクトリ]
+"""
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.logger import WeightLogger
+
+
+def legacy_log_weight(log_file_path: str, weight: float) -> None:
+    """変更前の log_weight と同じ処理（表示を除く）"""
+    timestamp_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with open(log_file_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([timestamp_str, f"{weight:.2f}"])
+
+
+def _rate(func, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        func(300.0 + i % 100)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    base = sys.argv[2] if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory(dir=base) as root:
+        path = os.path.join(root, "legacy.csv")
+        legacy = _rate(lambda w: legacy_log_weight(path, w), count)
+        print(f"{'変更前（記録ごとに開閉）':>28}: {legacy:10.0f} records/s")
+
+        for policy, rows in (("never", 64), ("interval", 64), ("always", 64), ("always", 1)):
+            path = os.path.join(root, f"{policy}_{rows}.csv")
+            # 記録ごとの表示は計測から除く
+            with contextlib.redirect_stdout(io.StringIO()):
+                logger = WeightLogger(path, flush_rows=rows, fsync_policy=policy)
+                rate = _rate(logger.log_weight, count)
+                logger.cleanup()
+            label = f"fsync={policy}, {rows}行ごと"
+            print(f"{label:>28}: {rate:10.0f} records/s ({rate / legacy:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
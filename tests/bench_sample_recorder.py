@@ -0,0 +1,81 @@
+"""
+生値レコーダーのベンチマーク
+
+10 SPS で1日分（86万サンプル）の生値を記録し、ファイルサイズと、
+サンプリングスレッド側の処理時間（on_sample 1回あたり）、読み取りの速さを測ります。
+生値はコップの載せ降ろしと飲水を含む合成データ（ノイズ ±800 カウント）です。
+
+    python tests/bench_sample_recorder.py [SPS] [時間]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.sample_recorder import RawSampleRecorder, iter_samples
+
+OFFSET = 84210
+REFERENCE_UNIT = 717
+STATES = ("WAITING_FOR_CUP", "MONITORING")
+
+
+def synthetic_day(sps: float, hours: float):
+    """(時刻, 生値, 状態) を返します。25分ごとにコップの重量が少し減ります"""
+    random.seed(7)
+    count = int(sps * hours * 3600)
+    weight = 1500.0
+    for i in range(count):
+        t = i / sps + random.uniform(-0.002, 0.002)
+        minute = int(t // 60) % 25
+        if minute == 0 and i % int(sps * 60) == 0:
+            weight = max(300.0, weight - random.uniform(0, 200))
+        on_scale = minute != 24
+        grams = weight if on_scale else 0.0
+        raw = OFFSET + int(grams * REFERENCE_UNIT) + random.randint(-800, 800)
+        yield t, raw, STATES[on_scale]
+
+
+def main():
+    sps = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24.0
+    samples = list(synthetic_day(sps, hours))
+    with tempfile.TemporaryDirectory() as root:
+        recorder = RawSampleRecorder(
+            root, context=lambda: (OFFSET, REFERENCE_UNIT), fsync=False,
+            wall_clock=lambda: 1767355200.0 - 12 * 3600, clock=lambda: 0.0
+        )
+        state = None
+        start = time.perf_counter()
+        for t, raw, sample_state in samples:
+            if sample_state != state:
+                state = sample_state
+                recorder.set_state(state)
+            recorder.on_sample(t, raw)
+        listener_s = time.perf_counter() - start
+        recorder.close(timeout=None)
+        total_s = time.perf_counter() - start
+
+        paths = sorted(str(p) for p in Path(root).glob("raw_*.hxr"))
+        size = sum(os.path.getsize(p) for p in paths)
+        start = time.perf_counter()
+        read = sum(1 for _ in iter_samples(paths))
+        read_s = time.perf_counter() - start
+
+    count = len(samples)
+    print(f"{count} サンプル（{sps:g} SPS × {hours:g} 時間）, チャンク {recorder.chunk_count} 個")
+    print(f"  ファイルサイズ: {size / 1e6:.2f} MB ({size / count:.2f} バイト/サンプル, "
+          f"そのまま保存した場合 {count * 12 / 1e6:.2f} MB)")
+    print(f"  on_sample: {listener_s / count * 1e6:.2f} µs/サンプル（サンプリングスレッド側）")
+    print(f"  エンコード・圧縮・書き込み込み: {total_s:.2f} 秒")
+    print(f"  読み取り: {read} サンプル, {read_s:.2f} 秒 ({read / read_s / 1e3:.0f} k サンプル/秒)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+バッチ統計処理のベンチマーク
+
+数百サンプルの中央値・トリム平均について、
+従来のリスト追記＋ソート方式と array('i') ベースの処理時間を比較します。
+
+    python tests/bench_sample_stats.py [サンプル数]
+"""
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+# utils パッケージが RPi.GPIO をインポートするため差し替えておく
+fake_gpio.install()
+
+from utils.sample_stats import median, to_weight, trimmed_mean
+
+OFFSET = 84210
+REFERENCE_UNIT = 717
+
+
+def legacy_trimmed_mean(samples) -> float:
+    """変更前の read_average と同じ処理"""
+    valueList = []
+    for value in samples:
+        valueList += [value]
+    valueList.sort()
+    trimAmount = int(len(valueList) * 0.2)
+    valueList = valueList[trimAmount:-trimAmount]
+    return sum(valueList) / len(valueList)
+
+
+def legacy_median(samples) -> float:
+    """変更前の read_median（奇数件の経路）と同じ処理"""
+    valueList = []
+    for value in samples:
+        valueList += [value]
+    valueList.sort()
+    return valueList[len(valueList) // 2]
+
+
+def _time_us(func, repeat: int = 2000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 501
+    raw = [OFFSET + REFERENCE_UNIT * 300 + random.randint(-800, 800) for _ in range(count)]
+    samples = array('i', raw)
+
+    cases = [
+        ("トリム平均", lambda: legacy_trimmed_mean(raw), lambda: trimmed_mean(samples, 0.2)),
+        ("中央値", lambda: legacy_median(raw), lambda: median(samples)),
+    ]
+    print(f"{count}サンプル")
+    for name, legacy, batched in cases:
+        assert abs(legacy() - batched()) < 1e-9
+        old_us = _time_us(legacy)
+        new_us = _time_us(batched)
+        grams = to_weight(batched(), OFFSET, REFERENCE_UNIT)
+        print(f"{name}: 従来 {old_us:7.1f} us, バッチ {new_us:7.1f} us ({grams:.2f} g)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+サーボ出力バックエンドのジッタ・CPU使用率ベンチマーク
+
+モーションエンジンで50Hzの軌道を再生し、各点を出力した時刻の予定からの遅れ（ジッタ）、
+1回の出力にかかる時間、CPU使用率をバックエンドごとに比較します。
+シミュレーションGPIO上のHX711をビットバンギングで読み続ける負荷をかけた場合も測ります。
+
+実機は不要です。
+    - hardware_pwm: 一時ディレクトリに作った sysfs の PWM ツリーに書き込みます
+    - gpiozero: gpiozero がインストールされていれば MockFactory（MockPWMPin）を使います
+    - lgpio: lgpio が使える環境（Raspberry Pi）でのみ測ります
+
+ここで測れるのはPythonからの出力タイミングと出力処理の負荷です。
+ソフトウェアPWMのパルス幅自体の揺れはロジックアナライザで確認してください
+（ハードウェアPWMではパルスをPWMペリフェラルが生成するため、CPU負荷の影響を受けません）。
+
+    python tests/bench_servo_backends.py [秒数] [SPS]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from controllers.motion_engine import MotionEngine
+from controllers.servo_backends import GpiozeroBackend, HardwarePwmBackend, LgpioBackend
+from controllers.weight_sampler import WeightSampler
+from utils.hx711 import HX711
+from utils.motion_profile import trapezoidal
+
+SERVO_PIN = 12
+DOUT_PIN = 5
+SCK_PIN = 6
+SERVO_ARGS = (SERVO_PIN, -90, 90, 0.5 / 1000, 2.4 / 1000)
+
+
+def _fake_sysfs(root: str) -> None:
+    """エクスポート済みの pwmchip0/pwm0 を作ります"""
+    pwm_dir = os.path.join(root, "pwmchip0", "pwm0")
+    os.makedirs(pwm_dir)
+    for name in ("export", "unexport"):
+        open(os.path.join(root, "pwmchip0", name), "w").close()
+    for name in ("period", "duty_cycle", "enable"):
+        open(os.path.join(pwm_dir, name), "w").close()
+
+
+def _backends(sysfs_root: str):
+    """使用できるバックエンドを (名前, 作成関数) で返します"""
+    result = [(
+        "hardware_pwm (sysfs)",
+        lambda: HardwarePwmBackend(*SERVO_ARGS, sysfs_root=sysfs_root),
+    )]
+    try:
+        from gpiozero.pins.mock import MockFactory, MockPWMPin
+        factory = MockFactory(pin_class=MockPWMPin)
+        result.append((
+            "gpiozero (MockFactory)",
+            lambda: GpiozeroBackend(*SERVO_ARGS, pin_factory=factory),
+        ))
+    except ImportError:
+        print("gpiozero がないため gpiozero バックエンドは測りません")
+    try:
+        import lgpio
+        lgpio.gpiochip_close(lgpio.gpiochip_open(0))
+        result.append(("lgpio", lambda: LgpioBackend(*SERVO_ARGS)))
+    except Exception:
+        print("lgpio を使えないため lgpio バックエンドは測りません")
+    return result
+
+
+def _start_load(rate: float) -> WeightSampler:
+    """HX711のビットバンギングによる読み取りをバックグラウンドで始めます"""
+    fake_gpio.reset(GPIO)
+    GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=rate, value_source=lambda ch: 123456)
+    hx = HX711(DOUT_PIN, SCK_PIN)
+    sampler = WeightSampler(hx)
+    sampler.start()
+    return sampler
+
+
+def run(name: str, factory, seconds: float, load_rate: float = 0.0) -> None:
+    backend = factory()
+    writes = []
+
+    def write(angle):
+        started = time.monotonic()
+        backend.write(angle)
+        writes.append((started, time.monotonic() - started))
+
+    engine = MotionEngine(write, backend.detach)
+    sampler = _start_load(load_rate) if load_rate > 0 else None
+    profile = trapezoidal(90, -90, seconds, accel_fraction=0.2, rate_hz=50)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    handle = engine.play(profile)
+    handle.wait()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    if sampler is not None:
+        sampler.stop()
+    engine.close()
+    backend.close()
+
+    lateness_ms = sorted(
+        1000.0 * (t - handle.started_at - scheduled)
+        for (t, _), scheduled in zip(writes, profile.times)
+    )
+    call_us = [1e6 * d for _, d in writes]
+    p99 = lateness_ms[int(0.99 * (len(lateness_ms) - 1))]
+    label = f"{name}{' + HX711' if sampler else ''}"
+    print(
+        f"{label:>32}: 遅れ 中央値 {statistics.median(lateness_ms):5.2f} ms, "
+        f"p99 {p99:5.2f} ms, 最大 {lateness_ms[-1]:5.2f} ms | "
+        f"出力 {statistics.mean(call_us):6.1f} µs/回 | CPU {100.0 * cpu / wall:5.1f}%"
+    )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 80.0
+    print(f"50Hzの軌道 {seconds:g}秒, 負荷: シミュレーションHX711 {rate:g} SPS（ポーリング）")
+    with tempfile.TemporaryDirectory() as root:
+        _fake_sysfs(root)
+        for name, factory in _backends(root):
+            run(name, factory, seconds)
+            run(name, factory, seconds, load_rate=rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""
+RPi.GPIO互換のシミュレーションモジュール
+
+Raspberry Pi 以外の環境でHX711ドライバを動かすためのものです。
+ベンチマークや故障注入テストで使用します。
+
+使い方:
+    from tests import fake_gpio
+    GPIO = fake_gpio.install()          # RPi.GPIO を差し替え
+    chip = GPIO.attach_hx711(5, 6, rate=80)
+    from utils.hx711 import HX711       # 差し替え後にインポートする
+"""
+import sys
+import threading
+import time
+import types
+from typing import Callable, Dict, List, Optional
+
+# HX711のPD_SCKをこの時間以上Highに保つとパワーダウンする
+POWER_DOWN_S = 60e-6
+
+# 24ビット後の追加クロック数と次の変換チャンネルの対応
+_CHANNEL_BY_PULSES = {25: 'A128', 26: 'B32', 27: 'A64'}
+
+
+class SimulatedHX711:
+    """
+    ビットバンギングに応答するHX711のソフトウェアモデル
+
+    一定レート（rate SPS）で変換が完了し、DOUTがLowになります。
+    PD_SCKの立ち上がりごとに24ビットのデータをMSBから出力し、
+    25〜27パルス目で次の変換のチャンネル/ゲインを決定します。
+    """
+
+    def __init__(
+        self,
+        dout: int,
+        pd_sck: int,
+        rate: float = 80.0,
+        value_source: Optional[Callable[[str], int]] = None,
+        settle_periods: int = 4
+    ):
+        self.dout = dout
+        self.pd_sck = pd_sck
+        self.period = 1.0 / rate
+        self.settle_periods = settle_periods
+        self.value_source = value_source or (lambda channel: 0)
+
+        # 故障注入用: TrueにするとDOUTがHighのまま変化しなくなる
+        self.dout_stuck_high = False
+
+        # 統計情報
+        self.frames = 0
+        self.frames_by_channel: Dict[str, int] = {}
+        self.power_cycles = 0
+        self.max_sck_high_s = 0.0
+        self.long_pulses = 0
+
+        self._cond = threading.Condition()
+        self._sck = False
+        self._sck_rise = 0.0
+        self._pulses = 0
+        self._word = 0
+        self._channel = 'A128'
+        self._next_channel = 'A128'
+        self._epoch = time.monotonic()
+        self._ready_at = self._epoch + self.period
+        self._signalled_ready_at = 0.0
+        self._callbacks: List[Callable[[int], None]] = []
+        self._waiters = 0
+        self._watcher: Optional[threading.Thread] = None
+
+    # --- ピンレベルのインターフェース ---------------------------------
+
+    def read_dout(self) -> int:
+        now = time.monotonic()
+        with self._cond:
+            self._advance(now)
+            return self._dout_level(now)
+
+    def write_sck(self, value) -> None:
+        now = time.monotonic()
+        with self._cond:
+            self._advance(now)
+            if value and not self._sck:
+                self._sck = True
+                self._sck_rise = now
+                self._rising_edge(now)
+            elif not value and self._sck:
+                self._sck = False
+                high = now - self._sck_rise
+                self.max_sck_high_s = max(self.max_sck_high_s, high)
+                if high > POWER_DOWN_S:
+                    if 1 < self._pulses < 25:
+                        # 読み出し途中の長いパルス（実機ではデータ破損の恐れ）
+                        self.long_pulses += 1
+                    else:
+                        self._power_cycle(now)
+                        self._cond.notify_all()
+
+    # --- 内部状態 -------------------------------------------------------
+
+    def _dout_level(self, now: float) -> int:
+        if self.dout_stuck_high:
+            return 1
+        if self._sck and now - self._sck_rise > POWER_DOWN_S and self._pulses in (0, 1):
+            return 1
+        if 1 <= self._pulses <= 24:
+            return (self._word >> (24 - self._pulses)) & 1
+        if self._pulses >= 25:
+            return 1
+        return 0 if now >= self._ready_at else 1
+
+    def _rising_edge(self, now: float) -> None:
+        if self._pulses == 0:
+            if self.dout_stuck_high or now < self._ready_at:
+                return
+            self._word = int(self.value_source(self._channel)) & 0xFFFFFF
+        self._pulses += 1
+        if self._pulses >= 25:
+            self._next_channel = _CHANNEL_BY_PULSES.get(min(self._pulses, 27), 'A128')
+            self._ready_at = self._next_grid(now)
+            if self._pulses == 25:
+                # 次の変換完了時刻が決まったので監視スレッドを起こす
+                self._cond.notify_all()
+
+    def _advance(self, now: float) -> None:
+        """完了したフレームを確定し、次の変換待ち状態にします"""
+        if self._pulses >= 25 and not self._sck and now >= self._ready_at:
+            self.frames += 1
+            self.frames_by_channel[self._channel] = (
+                self.frames_by_channel.get(self._channel, 0) + 1
+            )
+            self._channel = self._next_channel
+            self._pulses = 0
+
+    def _next_grid(self, now: float) -> float:
+        n = int((now - self._epoch) / self.period) + 1
+        return self._epoch + n * self.period
+
+    def _power_cycle(self, now: float) -> None:
+        self.power_cycles += 1
+        self._pulses = 0
+        self._channel = 'A128'
+        self._next_channel = 'A128'
+        self._epoch = now
+        self._ready_at = now + self.period * self.settle_periods
+
+    # --- エッジ検出 -----------------------------------------------------
+
+    def add_callback(self, callback: Callable[[int], None]) -> None:
+        with self._cond:
+            self._callbacks.append(callback)
+        self._ensure_watcher()
+
+    def clear_callbacks(self) -> None:
+        with self._cond:
+            self._callbacks.clear()
+
+    def wait_for_falling_edge(self, timeout: Optional[float]) -> bool:
+        self._ensure_watcher()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            start = self._signalled_ready_at
+            self._waiters += 1
+            self._cond.notify_all()
+            try:
+                while self._signalled_ready_at == start:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._waiters -= 1
+
+    def _ensure_watcher(self) -> None:
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, daemon=True)
+            self._watcher.start()
+
+    def _watch(self) -> None:
+        """変換完了（DOUTの立ち下がり）を検出してコールバックを呼び出します"""
+        while True:
+            callbacks = []
+            with self._cond:
+                now = time.monotonic()
+                self._advance(now)
+                idle = not self._callbacks and not self._waiters
+                if idle or self.dout_stuck_high:
+                    self._cond.wait(0.05)
+                    continue
+                if now < self._ready_at:
+                    self._cond.wait(self._ready_at - now)
+                    continue
+                if self._pulses != 0:
+                    # 読み出し中は次のフレーム確定まで待つ
+                    self._cond.wait(self.period)
+                    continue
+                if self._signalled_ready_at != self._ready_at:
+                    self._signalled_ready_at = self._ready_at
+                    callbacks = list(self._callbacks)
+                    self._cond.notify_all()
+                else:
+                    self._cond.wait(self.period)
+            for callback in callbacks:
+                callback(self.dout)
+
+
+class FakeGPIO(types.ModuleType):
+    """RPi.GPIO モジュールの代替"""
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        super().__init__('RPi.GPIO')
+        self.mode: Optional[int] = None
+        self.levels: Dict[int, int] = {}
+        self.devices_by_dout: Dict[int, SimulatedHX711] = {}
+        self.devices_by_sck: Dict[int, SimulatedHX711] = {}
+        self.edge_detect: Dict[int, Callable] = {}
+
+    def attach_hx711(self, dout: int, pd_sck: int, **kwargs) -> SimulatedHX711:
+        """指定ピンにシミュレーションHX711を接続します"""
+        device = SimulatedHX711(dout, pd_sck, **kwargs)
+        self.devices_by_dout[dout] = device
+        self.devices_by_sck[pd_sck] = device
+        return device
+
+    def setmode(self, mode: int) -> None:
+        self.mode = mode
+
+    def getmode(self) -> Optional[int]:
+        return self.mode
+
+    def setwarnings(self, flag: bool) -> None:
+        pass
+
+    def setup(self, pin: int, direction: int, pull_up_down: int = PUD_OFF, initial: int = LOW) -> None:
+        self.levels.setdefault(pin, initial)
+
+    def output(self, pin: int, value) -> None:
+        device = self.devices_by_sck.get(pin)
+        if device is not None:
+            device.write_sck(value)
+        self.levels[pin] = 1 if value else 0
+
+    def input(self, pin: int) -> int:
+        device = self.devices_by_dout.get(pin)
+        if device is not None:
+            return device.read_dout()
+        return self.levels.get(pin, 0)
+
+    def add_event_detect(self, pin: int, edge: int, callback=None, bouncetime=None) -> None:
+        if pin in self.edge_detect:
+            raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+        self.edge_detect[pin] = edge
+        if callback is not None:
+            self.add_event_callback(pin, callback)
+
+    def add_event_callback(self, pin: int, callback) -> None:
+        if pin not in self.edge_detect:
+            raise RuntimeError("Add event detection using add_event_detect first before adding a callback")
+        device = self.devices_by_dout.get(pin)
+        if device is not None:
+            device.add_callback(callback)
+
+    def remove_event_detect(self, pin: int) -> None:
+        self.edge_detect.pop(pin, None)
+        device = self.devices_by_dout.get(pin)
+        if device is not None:
+            device.clear_callbacks()
+
+    def wait_for_edge(self, pin: int, edge: int, bouncetime=None, timeout=None) -> Optional[int]:
+        if pin in self.edge_detect:
+            raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+        device = self.devices_by_dout.get(pin)
+        if device is None:
+            time.sleep((timeout or 0) / 1000.0)
+            return None
+        fired = device.wait_for_falling_edge(None if timeout is None else timeout / 1000.0)
+        return pin if fired else None
+
+    def cleanup(self, pin=None) -> None:
+        for dout in list(self.edge_detect):
+            if pin is None or pin == dout:
+                self.remove_event_detect(dout)
+
+
+def install() -> FakeGPIO:
+    """
+    sys.modules の RPi.GPIO を FakeGPIO に差し替えます。
+
+    何度呼び出しても同じインスタンスを返します。
+    """
+    existing = sys.modules.get('RPi.GPIO')
+    if isinstance(existing, FakeGPIO):
+        return existing
+    gpio = FakeGPIO()
+    package = types.ModuleType('RPi')
+    package.GPIO = gpio
+    sys.modules['RPi'] = package
+    sys.modules['RPi.GPIO'] = gpio
+    return gpio
+
+
+def reset(gpio: FakeGPIO) -> None:
+    """接続済みのデバイスとエッジ検出設定をすべて取り外します"""
+    gpio.cleanup()
+    gpio.devices_by_dout.clear()
+    gpio.devices_by_sck.clear()
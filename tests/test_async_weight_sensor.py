@@ -0,0 +1,130 @@
+"""
+asyncio用の重量センサー（AsyncWeightSensor）のテスト
+
+WeightSensor を重量リスナーだけを持つ偽のセンサーに置き換え、
+別スレッドから届くサンプルで wait_until() が条件を満たした時点で戻ること、
+タイムアウト・終了の扱いと、イベントループが止まっている間に
+あふれたサンプルを数えることを確認します。
+
+    python -m pytest tests/test_async_weight_sensor.py
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+fake_gpio.install()
+
+from controllers.async_weight_sensor import AsyncWeightSensor
+
+
+class FakeSensor:
+    """重量リスナーだけを持つ WeightSensor の代わり"""
+
+    read_timeout_s = 0.1
+
+    def __init__(self):
+        self.listeners = []
+
+    def add_weight_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_weight_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def push(self, weight):
+        for listener in list(self.listeners):
+            listener(time.monotonic(), weight)
+
+
+def _feed_in_thread(sensor, weights, interval_s=0.005):
+    """サンプリングスレッドの代わりに別スレッドから重量を送ります"""
+    def run():
+        for weight in weights:
+            time.sleep(interval_s)
+            sensor.push(weight)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_wait_until_returns_first_matching_weight():
+    async def main():
+        fake = FakeSensor()
+        sensor = AsyncWeightSensor(fake)
+        thread = _feed_in_thread(fake, [300.0, 290.0, 250.0, 240.0, 100.0])
+        weight = await sensor.wait_until(lambda w: w < 260.0, timeout=1.0)
+        thread.join()
+        sensor.close()
+        return weight, fake.listeners
+
+    weight, listeners = asyncio.run(main())
+    assert weight == 250.0
+    assert listeners == []
+
+
+def test_wait_until_uses_fresh_latest_and_times_out():
+    async def main():
+        fake = FakeSensor()
+        sensor = AsyncWeightSensor(fake)
+        fake.push(120.0)
+        await asyncio.sleep(0)
+        immediate = await sensor.wait_until(lambda w: w > 100.0, timeout=0.0)
+        started = time.monotonic()
+        timed_out = await sensor.wait_until(lambda w: w > 500.0, timeout=0.05)
+        elapsed = time.monotonic() - started
+        sensor.close()
+        return immediate, timed_out, elapsed
+
+    immediate, timed_out, elapsed = asyncio.run(main())
+    assert immediate == 120.0
+    assert timed_out is None
+    assert elapsed < 0.5
+
+
+def test_close_cancels_waiters_and_predicate_errors_propagate():
+    async def main():
+        fake = FakeSensor()
+        sensor = AsyncWeightSensor(fake)
+        waiter = asyncio.ensure_future(sensor.wait_until(lambda w: False))
+        failing = asyncio.ensure_future(sensor.wait_until(lambda w: 1 / 0))
+        await asyncio.sleep(0)
+        fake.push(10.0)
+        with pytest.raises(ZeroDivisionError):
+            await failing
+        sensor.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        with pytest.raises(RuntimeError):
+            await sensor.wait_until(lambda w: True)
+
+    asyncio.run(main())
+
+
+def test_samples_dropped_before_the_loop_are_counted():
+    async def main():
+        fake = FakeSensor()
+        sensor = AsyncWeightSensor(fake, queue_size=8)
+        # イベントループを止めたまま、保持数を超えるサンプルを送る
+        thread = _feed_in_thread(fake, [float(i) for i in range(20)], interval_s=0.0)
+        thread.join()
+        pending = [weight for _, weight in sensor._pending]
+        await asyncio.sleep(0)
+        latest = sensor.latest
+        sensor.close()
+        return sensor.pending_dropped_count, pending, latest
+
+    dropped, pending, latest = asyncio.run(main())
+    assert dropped == 12
+    assert pending == [float(i) for i in range(12, 20)]
+    assert latest[1] == 19.0
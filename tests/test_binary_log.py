@@ -0,0 +1,100 @@
+"""
+重量ログのバイナリ形式のテスト
+
+    python -m pytest tests/test_binary_log.py
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core import binary_log
+from core.logger import WeightLogger
+
+START = datetime(2026, 1, 2, 3, 4, 5)
+WEIGHTS = [1502.54, 1480.1, 1480.1, 1710.0, 1650.25, 205.0]
+
+
+def _write(path, log_format):
+    logger = WeightLogger(str(path), flush_rows=1000, log_format=log_format)
+    for i, weight in enumerate(WEIGHTS):
+        logger.log_weight(weight, START + timedelta(minutes=25 * i, microseconds=1000 * i))
+    logger.cleanup()
+
+
+def test_reader_maps_records_without_copying(tmp_path):
+    path = tmp_path / "log.bin"
+    _write(path, "binary")
+    records = binary_log.read_binary_log(str(path))
+    assert path.stat().st_size == binary_log.HEADER_SIZE + len(WEIGHTS) * binary_log.RECORD_SIZE
+    assert not records.flags.owndata
+    assert not records.flags.writeable
+    assert records['weight'].tolist() == pytest.approx(WEIGHTS, abs=1e-3)
+    assert records['ts_ms'][0] == round(START.timestamp() * 1000)
+    assert records['ts_ms'][1] - records['ts_ms'][0] == 25 * 60 * 1000 + 1
+
+
+def test_torn_record_is_removed_on_open(tmp_path):
+    path = tmp_path / "log.bin"
+    _write(path, "binary")
+    with open(path, 'ab') as f:
+        f.write(b"\x01\x02\x03")
+    assert len(binary_log.read_binary_log(str(path))) == len(WEIGHTS)
+    WeightLogger(str(path), log_format="binary").cleanup()
+    assert path.stat().st_size == binary_log.HEADER_SIZE + len(WEIGHTS) * binary_log.RECORD_SIZE
+
+
+def test_rejects_csv_file(tmp_path):
+    path = tmp_path / "log.csv"
+    _write(path, "csv")
+    with pytest.raises(ValueError):
+        binary_log.read_binary_log(str(path))
+    with pytest.raises(ValueError):
+        WeightLogger(str(path), log_format="binary")
+
+
+def test_empty_log(tmp_path):
+    path = tmp_path / "log.bin"
+    WeightLogger(str(path), log_format="binary").cleanup()
+    assert len(binary_log.read_binary_log(str(path))) == 0
+
+
+def test_export_matches_csv_logger(tmp_path):
+    _write(tmp_path / "log.csv", "csv")
+    _write(tmp_path / "log.bin", "binary")
+    count = binary_log.export_csv(str(tmp_path / "log.bin"), str(tmp_path / "export.csv"))
+    assert count == len(WEIGHTS)
+    assert (tmp_path / "export.csv").read_text() == (tmp_path / "log.csv").read_text()
+
+
+def test_sync_service_reads_binary_like_csv(tmp_path):
+    pytest.importorskip("dotenv")
+    from services.sync_service import calculate_intake_from_csv
+
+    _write(tmp_path / "log.csv", "csv")
+    _write(tmp_path / "log.bin", "binary")
+    from_csv = calculate_intake_from_csv(str(tmp_path / "log.csv"))
+    assert from_csv
+    assert calculate_intake_from_csv(str(tmp_path / "log.bin")) == from_csv
+
+
+def test_intake_helper_ignores_carried_over_row(tmp_path, monkeypatch):
+    pytest.importorskip("dotenv")
+    from services.sync_service import calculate_intake_from_csv
+
+    _write(tmp_path / "log.csv", "csv")
+    _write(tmp_path / "log.bin", "binary")
+    from_csv = calculate_intake_from_csv(str(tmp_path / "log.csv"))
+    # 同期サービスが前回の最後の記録を残していても、同じファイルからは同じ結果になる
+    monkeypatch.chdir(tmp_path)
+    processed = tmp_path / "processed_logs"
+    processed.mkdir()
+    (processed / "log.last_row").write_text("2000-01-01 00:00:00,5000.00\n", encoding='utf-8')
+    assert calculate_intake_from_csv(str(tmp_path / "log.csv")) == from_csv
+    assert calculate_intake_from_csv(str(tmp_path / "log.bin")) == from_csv
@@ -0,0 +1,62 @@
+"""
+キャリブレーションの保存・読み込みのテスト
+
+バージョンの異なるファイル・壊れたファイルを使わないことと、
+保存が途中で失敗しても既存のファイルが壊れないことを確認します。
+
+    python -m pytest tests/test_calibration.py
+"""
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import core.calibration
+from core.calibration import CALIBRATION_VERSION, CalibrationData, CalibrationStore
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = CalibrationStore(str(tmp_path / "data" / "calibration.json"))
+    data = CalibrationData(offset=84210.5, reference_unit=717.0, gain=64,
+                           offset_b=1200.0, reference_unit_b=180.0)
+    assert store.save(data)
+    loaded = store.load()
+    assert loaded == data
+    assert loaded.saved_at
+    assert not Path(store.file_path + ".tmp").exists()
+
+
+def test_version_mismatch_is_ignored(tmp_path):
+    path = tmp_path / "calibration.json"
+    path.write_text(json.dumps({
+        'version': CALIBRATION_VERSION + 1, 'offset': 1.0, 'reference_unit': 2.0
+    }), encoding='utf-8')
+    assert CalibrationStore(str(path)).load() is None
+
+
+def test_missing_or_broken_file_is_ignored(tmp_path):
+    path = tmp_path / "calibration.json"
+    assert CalibrationStore(str(path)).load() is None
+    path.write_text('{"version": 1, "offset": ', encoding='utf-8')
+    assert CalibrationStore(str(path)).load() is None
+    path.write_text(json.dumps({'version': CALIBRATION_VERSION, 'offset': 1.0}), encoding='utf-8')
+    assert CalibrationStore(str(path)).load() is None
+
+
+def test_failed_save_keeps_previous_file(tmp_path, monkeypatch):
+    store = CalibrationStore(str(tmp_path / "calibration.json"))
+    assert store.save(CalibrationData(offset=100.0, reference_unit=700.0))
+    before = Path(store.file_path).read_bytes()
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    # 一時ファイルへの書き込みの途中で失敗させる
+    monkeypatch.setattr(core.calibration.os, "fsync", failing_fsync)
+    assert not store.save(CalibrationData(offset=999.0, reference_unit=1.0))
+    assert Path(store.file_path).read_bytes() == before
+    assert store.load().offset == 100.0
@@ -0,0 +1,102 @@
+"""
+HX711のチャンネルA/B交互読み取り（DualChannelSampler）のテスト
+
+シミュレーションGPIO上で、各フレームが正しいチャンネルのバッファに入ることと、
+チャンネルを切り替えても変換を読み捨てないこと（読み捨てを指定した分を除く）を確認します。
+
+    python -m pytest tests/test_dual_channel.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from controllers.weight_sampler import DualChannelSampler
+from utils.hx711 import HX711
+
+DOUT_PIN = 5
+SCK_PIN = 6
+RATE_SPS = 80.0
+RAW = {'A128': 300000, 'A64': 150000, 'B32': -40000}
+
+
+@pytest.fixture(autouse=True)
+def no_power_down(monkeypatch):
+    """
+    スレッドの切り替えでSCKのHighが延びても電源断とみなさないようにします。
+
+    60 us を超えるHighでシミュレーションのHX711がチャンネルAに戻ると、
+    ここで確かめたいチャンネルの振り分けと関係なく結果が変わるためです。
+    """
+    monkeypatch.setattr(fake_gpio, "POWER_DOWN_S", 1.0)
+
+
+def _run(seconds=0.5, gain=128, **kwargs):
+    fake_gpio.reset(GPIO)
+    chip = GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=RATE_SPS, value_source=lambda ch: RAW[ch])
+    hx = HX711(DOUT_PIN, SCK_PIN, gain=gain, startup_delay=0)
+    hx.enable_interrupt_mode(timeout=0.5)
+    sampler = DualChannelSampler(hx, capacity=1024, **kwargs)
+    frames_before = _counted_frames(chip)
+    sampler.start()
+    time.sleep(seconds)
+    sampler.stop()
+    hx.disable_interrupt_mode()
+    return sampler, _counted_frames(chip) - frames_before
+
+
+def _counted_frames(chip):
+    """読み取り済みのフレーム数（最後のフレームは次の変換が完了した後に数えられる）"""
+    time.sleep(2 / RATE_SPS)
+    chip.read_dout()
+    return chip.frames
+
+
+def _values(buffer):
+    return set(buffer.latest(buffer.capacity))
+
+
+def test_alternates_channels_without_discarding():
+    sampler, frames = _run()
+    a, b = sampler.buffer.total, sampler.buffer_b.total
+    assert _values(sampler.buffer) == {RAW['A128']}
+    assert _values(sampler.buffer_b) == {RAW['B32']}
+    assert abs(a - b) <= 1
+    assert sampler.discarded_count == 0
+    # 読み取ったフレームはすべてどちらかのバッファに入っている
+    assert a + b == frames
+
+
+def test_burst_and_discard_after_switch():
+    sampler, frames = _run(burst=4, discard_after_switch=1)
+    a, b = sampler.buffer.total, sampler.buffer_b.total
+    # 4フレームごとに切り替え、切り替え直後の1フレームだけを読み捨てる
+    assert a + b + sampler.discarded_count == frames
+    assert sampler.discarded_count == pytest.approx(frames / 4, abs=2)
+    assert abs(a - b) <= 3
+    assert _values(sampler.buffer) == {RAW['A128']}
+    assert _values(sampler.buffer_b) == {RAW['B32']}
+
+
+def test_channel_a_keeps_configured_gain():
+    sampler, _ = _run(gain=64)
+    assert _values(sampler.buffer) == {RAW['A64']}
+    assert _values(sampler.buffer_b) == {RAW['B32']}
+
+
+def test_burst_must_exceed_discard():
+    fake_gpio.reset(GPIO)
+    GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=RATE_SPS)
+    hx = HX711(DOUT_PIN, SCK_PIN, startup_delay=0)
+    with pytest.raises(ValueError):
+        DualChannelSampler(hx, burst=2, discard_after_switch=2)
@@ -0,0 +1,133 @@
+"""
+SQLite（WAL）の重量ログのテスト
+
+    python -m pytest tests/test_event_store.py
+"""
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.event_store import SqliteWeightLogger, WeightEventStore, is_sqlite_log
+from core.logger import WeightLogger
+
+START = datetime(2026, 1, 2, 3, 4, 5)
+WEIGHTS = [1502.54, 1480.1, 1480.1, 1710.0, 1650.25, 205.0]
+
+
+def _log(logger, weights, start=START):
+    for i, weight in enumerate(weights):
+        logger.log_weight(weight, start + timedelta(minutes=25 * i))
+
+
+def test_rows_are_inserted_in_batches(tmp_path):
+    path = str(tmp_path / "log.db")
+    logger = SqliteWeightLogger(path, flush_rows=3, flush_interval_s=60)
+    assert is_sqlite_log(path)
+    _log(logger, WEIGHTS[:2])
+    store = WeightEventStore(path)
+    assert store.unsynced()[0] == []
+    _log(logger, WEIGHTS[2:3])
+    rows, previous, _ = store.unsynced()
+    assert [w for _, w in rows] == WEIGHTS[:3]
+    assert previous is None
+    assert rows[0][0] == round(START.timestamp() * 1000)
+    logger.cleanup()
+    assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    store.close()
+
+
+def test_buffered_rows_do_not_change_reported_size(tmp_path):
+    logger = SqliteWeightLogger(str(tmp_path / "log.db"), flush_rows=100, flush_interval_s=60)
+    size = logger.get_log_file_size()
+    _log(logger, WEIGHTS)
+    assert logger.get_log_file_size() == size
+    logger.cleanup()
+
+
+def test_unsynced_query_uses_index(tmp_path):
+    path = str(tmp_path / "log.db")
+    SqliteWeightLogger(path).cleanup()
+    conn = sqlite3.connect(path)
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id, ts_ms, weight_g FROM weight_log WHERE synced = 0 ORDER BY ts_ms, id"
+    ).fetchall()
+    conn.close()
+    assert any("weight_log_unsynced" in row[-1] for row in plan)
+
+
+def test_mark_synced_skips_rows_logged_after_fetch(tmp_path):
+    path = str(tmp_path / "log.db")
+    logger = SqliteWeightLogger(path, flush_rows=1)
+    _log(logger, WEIGHTS[:3])
+    store = WeightEventStore(path)
+    rows, _, max_id = store.unsynced()
+    # 同期中に記録された行
+    logger.log_weight(999.0, START + timedelta(days=1))
+    assert store.mark_synced(max_id) == 3
+    rows, previous, _ = store.unsynced()
+    assert rows == [(round((START + timedelta(days=1)).timestamp() * 1000), 999.0)]
+    assert previous[1] == WEIGHTS[2]
+    assert len(store.history(START, START + timedelta(hours=1))) == 3
+    store.close()
+    logger.cleanup()
+
+
+def test_reader_is_not_blocked_by_open_write_transaction(tmp_path):
+    path = str(tmp_path / "log.db")
+    logger = SqliteWeightLogger(path, flush_rows=1)
+    _log(logger, WEIGHTS[:2])
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO weight_log (ts_ms, weight_g) VALUES (0, 1.0)")
+    store = WeightEventStore(path)
+    started = time.monotonic()
+    rows, _, _ = store.unsynced()
+    assert time.monotonic() - started < 1.0
+    assert len(rows) == 2
+    writer.execute("ROLLBACK")
+    writer.close()
+    store.close()
+    logger.cleanup()
+
+
+def test_sync_service_reads_sqlite_like_csv(tmp_path):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService, calculate_intake_from_csv
+
+    csv_logger = WeightLogger(str(tmp_path / "log.csv"))
+    _log(csv_logger, WEIGHTS)
+    csv_logger.cleanup()
+    db_logger = SqliteWeightLogger(str(tmp_path / "log.db"))
+    _log(db_logger, WEIGHTS)
+    db_logger.cleanup()
+
+    from_csv = calculate_intake_from_csv(str(tmp_path / "log.csv"))
+    service = SupabaseSyncService(str(tmp_path / "log.db"), str(tmp_path / "processed"))
+    assert service.calculate_intake_events() == from_csv
+    assert service.mark_synced()
+    assert service.calculate_intake_events() == []
+
+
+def test_run_sync_marks_rows_without_intake_as_synced(tmp_path):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService
+
+    logger = SqliteWeightLogger(str(tmp_path / "log.db"))
+    _log(logger, [500.0, 500.0, 500.0])
+    logger.cleanup()
+    service = SupabaseSyncService(str(tmp_path / "log.db"), str(tmp_path / "processed"))
+    assert service.run_sync()
+    store = WeightEventStore(str(tmp_path / "log.db"))
+    assert store.unsynced()[0] == []
+    store.close()
+    # 未同期の行がなければ何もしない
+    assert not service.run_sync()
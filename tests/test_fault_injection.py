@@ -0,0 +1,118 @@
+"""
+HX711の故障注入テスト
+
+シミュレーションGPIO上でDOUTをHighに固定し（変換完了が来ない状態）、
+重量の読み取りが期限内に戻ること、HX711のリセットで復帰することを確認します。
+
+    python -m pytest tests/test_fault_injection.py
+    python tests/test_fault_injection.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from controllers.weight_sensor import WeightSensor
+
+DOUT_PIN = 5
+SCK_PIN = 6
+REFERENCE_UNIT = 100
+READ_TIMEOUT_S = 0.1
+# スレッドの切り替えなどを見込んだ許容時間
+SLACK_S = 0.15
+
+
+def _attach(raw: int = 50000):
+    fake_gpio.reset(GPIO)
+    return GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=80.0, value_source=lambda ch: raw)
+
+
+def _sensor(**kwargs) -> WeightSensor:
+    return WeightSensor(
+        DOUT_PIN, SCK_PIN, REFERENCE_UNIT,
+        read_timeout_s=READ_TIMEOUT_S, **kwargs
+    )
+
+
+def test_direct_read_returns_none_within_deadline():
+    chip = _attach()
+    sensor = _sensor()
+    try:
+        assert sensor.get_weight(3) is not None
+
+        chip.dout_stuck_high = True
+        cycles = chip.power_cycles
+        start = time.monotonic()
+        weight = sensor.get_weight(3, timeout=0.2)
+        elapsed = time.monotonic() - start
+
+        assert weight is None
+        # 読み取り期限 + リセット後の待ち（read_timeout_s）で戻る
+        assert elapsed < 0.2 + READ_TIMEOUT_S + SLACK_S
+        assert sensor.timeout_count == 1
+        assert sensor.recovery_count == 1
+        assert chip.power_cycles == cycles + 1
+
+        chip.dout_stuck_high = False
+        assert sensor.get_weight(3) is not None
+    finally:
+        sensor.cleanup()
+
+
+def test_sampler_reports_stale_data_and_recovers():
+    chip = _attach()
+    sensor = _sensor(use_interrupt=True, continuous=True)
+    try:
+        assert sensor.get_weight(3) is not None
+
+        chip.dout_stuck_high = True
+        cycles = chip.power_cycles
+        # 最後のサンプルが read_timeout_s の2倍より古くなるまで待つ
+        time.sleep(2 * READ_TIMEOUT_S + SLACK_S)
+        start = time.monotonic()
+        assert sensor.get_weight(3) is None
+        assert time.monotonic() - start < SLACK_S
+
+        # サンプリングスレッドが連続タイムアウトでHX711をリセットしている
+        time.sleep(3 * READ_TIMEOUT_S)
+        assert sensor.sampler.timeout_count >= 2
+        assert sensor.sampler.recovery_count >= 1
+        assert chip.power_cycles > cycles
+
+        chip.dout_stuck_high = False
+        deadline = time.monotonic() + 1.0
+        weight = None
+        while weight is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            weight = sensor.get_weight(3)
+        assert weight is not None
+    finally:
+        sensor.cleanup()
+
+
+def test_initialization_fails_fast_when_dout_stuck():
+    chip = _attach()
+    chip.dout_stuck_high = True
+    start = time.monotonic()
+    try:
+        _sensor()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("RuntimeError was not raised")
+    assert time.monotonic() - start < READ_TIMEOUT_S + SLACK_S
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"OK: {name}")
@@ -0,0 +1,61 @@
+"""
+ストリーミングフィルタのテスト
+
+移動中央値・トリム平均をウィンドウ全体をソートした結果と比べ、
+長時間のドリフトする入力でも移動中央値の内部のヒープが大きくならないことを確認します。
+
+    python -m pytest tests/test_filters.py
+"""
+import random
+import statistics
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from utils.filters import RunningMedian, TrimmedMean
+
+
+def _drifting_stream(count, seed=0):
+    """ゆっくりドリフトし、ノイズと同じ値の繰り返しを含む入力"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield round(i * 0.5 + rng.gauss(0, 20))
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 8])
+def test_running_median_matches_brute_force(window):
+    median = RunningMedian(window)
+    history = []
+    for sample in _drifting_stream(2000, seed=window):
+        history.append(sample)
+        assert median.update(sample) == statistics.median(history[-window:])
+
+
+def test_running_median_heaps_stay_bounded_on_long_stream():
+    window = 5
+    median = RunningMedian(window)
+    largest = 0
+    # 単調増加（削除される値がヒープの奥に残りやすい）と、ドリフト＋ノイズ
+    for stream in (range(100000), _drifting_stream(100000)):
+        for sample in stream:
+            median.update(sample)
+            largest = max(largest, len(median._low) + len(median._high), len(median._delayed))
+    assert largest <= 3 * window + 1
+
+
+def test_trimmed_mean_matches_brute_force():
+    window, ratio = 10, 0.2
+    trimmed = TrimmedMean(window, ratio)
+    history = []
+    for sample in _drifting_stream(500):
+        history.append(sample)
+        values = sorted(history[-window:])
+        trim = int(len(values) * ratio)
+        expected = statistics.fmean(values[trim:len(values) - trim])
+        assert trimmed.update(sample) == pytest.approx(expected)
@@ -0,0 +1,121 @@
+"""
+フリートシミュレータのテスト
+
+シミュレータの各ステーションの遷移が、同じ設置区間で HydrationStateMachine を
+1台ずつ動かした場合の遷移記録と一致することを確認します。
+
+    python -m pytest tests/test_fleet_simulator.py
+"""
+import math
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import MonitoringConfig
+from core.state_machine import ALERT_END, MONITORING_TIMEOUT, HydrationState, HydrationStateMachine
+from simulation.fleet_simulator import DAY_S, FleetSimulator
+
+MONITORING = replace(
+    MonitoringConfig(), MONITORING_DURATION_S=600, ALERT_DURATION_S=120, WEIGHT_THRESHOLD_G=300
+)
+DAYS = 2
+
+
+def _run_scalar(sim: FleetSimulator, station: int) -> HydrationStateMachine:
+    """1台分の設置区間で HydrationStateMachine を動かします"""
+    cfg = sim.monitoring
+    now = [0.0]
+    sm = HydrationStateMachine(
+        cfg.MONITORING_DURATION_S, alert_duration_s=cfg.ALERT_DURATION_S, clock=lambda: now[0]
+    )
+    interval = sim.sample_interval_s
+    phase = sim.sample_phase[station]
+    confirm_delay = (cfg.DRINK_CONFIRM_SAMPLES - 1) * interval
+    schedule = sim.schedule
+    slots = len(schedule.place_at[station])
+
+    def next_sample(t):
+        return phase + math.ceil((t - phase) / interval) * interval
+
+    k = 0
+    present = False
+    after_drink = False
+    settle_at = math.inf
+    while k < slots:
+        place_at = schedule.place_at[station, k]
+        remove_at = schedule.remove_at[station, k]
+        weight = schedule.weight_g[station, k]
+        t_remove = next_sample(remove_at) + confirm_delay if present else math.inf
+        t_place = math.inf if present else place_at
+        due = sm.deadlines.next_due()
+        t = min(t_remove, t_place, settle_at, math.inf if due is None else due)
+        if t > DAYS * DAY_S:
+            break
+        now[0] = t
+
+        if t == t_remove:
+            if sm.state != HydrationState.IDLE:
+                after_drink = sm.state == HydrationState.MONITORING
+                sm.transition_to_idle()
+            settle_at = math.inf
+            present = False
+            k += 1
+        elif t == t_place:
+            present = True
+            if weight >= cfg.WEIGHT_THRESHOLD_G:
+                settle_at = next_sample(t) + cfg.SETTLE_WINDOW_S
+        elif t == settle_at:
+            if after_drink:
+                sm.reset_monitoring_timer(weight)
+            else:
+                sm.transition_to_monitoring(weight)
+            settle_at = math.inf
+        else:
+            for name in sm.pop_due_deadlines():
+                if name == MONITORING_TIMEOUT:
+                    sm.transition_to_alerting()
+                elif name == ALERT_END:
+                    sm.transition_to_idle()
+                    after_drink = False
+                    settle_at = next_sample(t) + cfg.SETTLE_WINDOW_S
+    return sm
+
+
+def test_matches_scalar_state_machine():
+    sim = FleetSimulator(40, MONITORING, seed=1, trace=True)
+    report = sim.run(days=DAYS)
+    assert report.alerts.sum() > 0
+    assert report.missed_drinks.sum() > 0
+
+    for station in range(sim.n_stations):
+        expected = _run_scalar(sim, station).journal.records()
+        actual = report.transitions[station]
+        assert len(actual) == len(expected), station
+        for a, e in zip(actual, expected):
+            assert (a.old_state, a.new_state, a.trigger) == (e.old_state, e.new_state, e.trigger)
+            assert a.timestamp == pytest.approx(e.timestamp, abs=1e-9)
+            if e.weight is None:
+                assert a.weight is None
+            else:
+                assert a.weight == pytest.approx(e.weight, rel=1e-6)
+
+
+def test_report_counts_are_consistent():
+    sim = FleetSimulator(200, MONITORING, seed=2, trace=True)
+    report = sim.run(days=DAYS)
+    assert np.array_equal(report.drinks, report.detected_drinks + report.missed_drinks)
+    assert len(report.detection_latency_s) == report.detected_drinks.sum()
+    timeouts = [sum(r.trigger == 'TIMEOUT' for r in records) for records in report.transitions]
+    assert np.array_equal(report.alerts, timeouts)
+    # 持ち上げてから DRINK_CONFIRM_SAMPLES 個目のサンプルで検知する
+    delay = MONITORING.DRINK_CONFIRM_SAMPLES * sim.sample_interval_s
+    assert report.detection_latency_s.max() <= delay + 1e-9
+    assert report.alert_response_s.max() <= MONITORING.ALERT_DURATION_S
@@ -0,0 +1,225 @@
+"""
+ログファイルのセグメントの封印のテスト
+
+    python -m pytest tests/test_log_segments.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core import binary_log
+from core.logger import WeightLogger, sealed_segments, segment_path
+
+START = datetime(2026, 1, 2, 3, 4, 5)
+ROW_BYTES = len("2026-01-02 03:04:05,100.00\r\n")
+
+
+def _log(logger, count, first=0):
+    for i in range(first, first + count):
+        logger.log_weight(1000.0 + i, START + timedelta(minutes=i))
+
+
+def _rows(paths):
+    rows = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines[0] == "timestamp,weight_g"
+        rows.extend(lines[1:])
+    return rows
+
+
+def test_segment_path_and_listing(tmp_path):
+    live = str(tmp_path / "weight_log.csv")
+    assert segment_path(live, 12) == str(tmp_path / "weight_log.000012.csv")
+    for seq in (10, 2):
+        open(segment_path(live, seq), 'w').close()
+    open(str(tmp_path / "weight_log.bin"), 'w').close()
+    open(str(tmp_path / "weight_log.tmp.csv"), 'w').close()
+    assert sealed_segments(live) == [segment_path(live, 2), segment_path(live, 10)]
+
+
+def test_seals_on_size_with_header(tmp_path):
+    live = str(tmp_path / "weight_log.csv")
+    logger = WeightLogger(live, flush_rows=1, segment_max_bytes=len("timestamp,weight_g\r\n") + 3 * ROW_BYTES)
+    _log(logger, 7)
+    sealed = sealed_segments(live)
+    assert sealed == [segment_path(live, 1), segment_path(live, 2)]
+    assert [len(_rows([p])) for p in sealed] == [3, 3]
+    logger.cleanup()
+    # 終了時には行のあるファイルも封印する
+    sealed = sealed_segments(live)
+    assert len(sealed) == 3
+    assert _rows(sealed) == [f"{START + timedelta(minutes=i):%Y-%m-%d %H:%M:%S},{1000.0 + i:.2f}" for i in range(7)]
+    assert _rows([live]) == []
+
+
+def test_seals_on_age(tmp_path):
+    now = [0.0]
+    live = str(tmp_path / "weight_log.csv")
+    logger = WeightLogger(
+        live, flush_rows=100, segment_max_age_s=60, clock=lambda: now[0]
+    )
+    _log(logger, 2)
+    logger.flush()
+    assert sealed_segments(live) == []
+    now[0] = 60.0
+    logger.flush()
+    assert len(sealed_segments(live)) == 1
+    logger.flush()
+    # 空のファイルは封印しない
+    assert len(sealed_segments(live)) == 1
+    logger.cleanup()
+    assert len(sealed_segments(live)) == 1
+
+
+def test_numbering_continues_after_restart(tmp_path):
+    live = str(tmp_path / "weight_log.csv")
+    logger = WeightLogger(live, segment_max_bytes=1024)
+    _log(logger, 2)
+    logger.cleanup()
+    logger = WeightLogger(live, segment_max_bytes=1024)
+    _log(logger, 2, first=2)
+    logger.cleanup()
+    assert sealed_segments(live) == [segment_path(live, 1), segment_path(live, 2)]
+
+
+def test_binary_segments(tmp_path):
+    live = str(tmp_path / "weight_log.bin")
+    logger = WeightLogger(
+        live, flush_rows=1, log_format="binary",
+        segment_max_bytes=binary_log.HEADER_SIZE + 2 * binary_log.RECORD_SIZE
+    )
+    _log(logger, 5)
+    logger.cleanup()
+    sealed = sealed_segments(live)
+    assert [len(binary_log.read_binary_log(p)) for p in sealed] == [2, 2, 1]
+
+
+def test_sync_consumes_only_sealed_segments(tmp_path):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService
+
+    live = str(tmp_path / "weight_log.csv")
+    logger = WeightLogger(live, flush_rows=1, segment_max_bytes=len("timestamp,weight_g\r\n") + 3 * ROW_BYTES)
+    # 減り続ける重量で、1行ごとに摂取イベントになる
+    for i in range(4):
+        logger.log_weight(1000.0 - 10 * i, START + timedelta(minutes=i))
+    service = SupabaseSyncService(live, str(tmp_path / "processed"), segmented=True)
+    events = service.calculate_intake_events()
+    assert len(events) == 2
+    # 同期中にも記録は続く
+    logger.log_weight(900.0, START + timedelta(minutes=10))
+    assert service.archive_log_file()
+    assert sealed_segments(live) == []
+    assert len(os.listdir(tmp_path / "processed")) == 1
+    assert _rows([live]) == [
+        f"{START + timedelta(minutes=3):%Y-%m-%d %H:%M:%S},970.00",
+        f"{START + timedelta(minutes=10):%Y-%m-%d %H:%M:%S},900.00",
+    ]
+    logger.cleanup()
+    assert len(service.calculate_intake_events()) == 1
+
+
+def test_run_sync_archives_segments_without_intake(tmp_path):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService
+
+    live = str(tmp_path / "weight_log.csv")
+    logger = WeightLogger(live, flush_rows=1, segment_max_bytes=1)
+    # 重量が変わらない（飲んでいない）記録だけのセグメント
+    for i in range(3):
+        logger.log_weight(500.0, START + timedelta(minutes=i))
+    logger.flush()
+    assert len(sealed_segments(live)) == 3
+    service = SupabaseSyncService(live, str(tmp_path / "processed"), segmented=True)
+    # 摂取イベントがないため、Supabaseには接続しない
+    assert service.run_sync()
+    assert sealed_segments(live) == []
+    assert len(list((tmp_path / "processed").glob("*_weight_log.*.csv"))) == 3
+    # 次のバッチの比較の起点として最後の記録を保存する
+    assert (tmp_path / "processed" / "weight_log.last_row").read_text() == \
+        f"{START + timedelta(minutes=2):%Y-%m-%d %H:%M:%S},500.00\n"
+    logger.cleanup()
+
+
+def test_archive_moves_each_segment_independently(tmp_path, monkeypatch):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService
+
+    live = str(tmp_path / "weight_log.csv")
+    logger = WeightLogger(live, flush_rows=1, segment_max_bytes=1)
+    for i in range(3):
+        logger.log_weight(1000.0 - 10 * i, START + timedelta(minutes=i))
+    logger.flush()
+    first, second, third = sealed_segments(live)
+    service = SupabaseSyncService(live, str(tmp_path / "processed"), segmented=True)
+    assert len(service.calculate_intake_events()) == 2
+
+    rename = os.rename
+
+    def failing_rename(src, dst):
+        if src == second:
+            raise OSError("device busy")
+        rename(src, dst)
+
+    # 2つ目の移動に失敗しても3つ目は移動する
+    monkeypatch.setattr(os, "rename", failing_rename)
+    assert not service.archive_log_file()
+    assert sealed_segments(live) == [second]
+
+    # 呼び直すと、移動済みのファイルは読み飛ばして残りを移動する
+    monkeypatch.setattr(os, "rename", rename)
+    assert service.archive_log_file()
+    assert sealed_segments(live) == []
+    assert len(list((tmp_path / "processed").glob("*_weight_log.*.csv"))) == 3
+    logger.cleanup()
+
+
+@pytest.mark.parametrize("log_format,ext", [("csv", "csv"), ("binary", "bin")])
+def test_carry_over_seeds_with_last_archived_row(tmp_path, log_format, ext):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService
+
+    live = str(tmp_path / f"weight_log.{ext}")
+    logger = WeightLogger(live, flush_rows=1, log_format=log_format, segment_max_bytes=1)
+    service = SupabaseSyncService(live, str(tmp_path / "processed"), segmented=True)
+    amounts = []
+    # 1行ずつ封印されるため、毎回の同期で読み取るのは1行だけになる
+    for i, weight in enumerate([1000.0, 990.0, 960.0, 900.0]):
+        logger.log_weight(weight, START + timedelta(minutes=i))
+        logger.flush()
+        amounts.extend(e['amount'] for e in service.calculate_intake_events(carry_over=True))
+        assert service.archive_log_file()
+    assert amounts == [10, 30, 60]
+
+    # 引き継ぎを指定しない場合は、保存した記録を使わない
+    logger.log_weight(850.0, START + timedelta(minutes=4))
+    logger.flush()
+    assert service.calculate_intake_events() == []
+    logger.cleanup()
+
+
+def test_carry_over_applies_only_to_segments(tmp_path):
+    pytest.importorskip("dotenv")
+    from services.sync_service import SupabaseSyncService
+
+    live = tmp_path / "weight_log.csv"
+    logger = WeightLogger(str(live), flush_rows=1)
+    logger.log_weight(900.0, START)
+    logger.cleanup()
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    (processed / "weight_log.last_row").write_text("2000-01-01 00:00:00,5000.00\n", encoding='utf-8')
+    service = SupabaseSyncService(str(live), str(processed))
+    assert service.calculate_intake_events(carry_over=True) == []
+    assert service.archive_log_file()
+    assert (processed / "weight_log.last_row").read_text() == "2000-01-01 00:00:00,5000.00\n"
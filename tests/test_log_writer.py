@@ -0,0 +1,225 @@
+"""
+ログの書き込みキューのテスト
+
+書き込み先は遅いロガーに置き換え、呼び出し側が待たされないことと
+キューが満杯のときの動作を確認します。
+
+    python -m pytest tests/test_log_writer.py
+"""
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.log_writer import QueuedWeightLogger
+from core.logger import WeightLogger
+
+
+class GatedLogger:
+    """gate が開くまで書き込みを止めるロガー"""
+
+    log_file_path = "gated.csv"
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.rows = []
+        self.closed = False
+
+    def log_weight(self, weight, timestamp=None):
+        self.gate.wait()
+        self.rows.append((weight, timestamp))
+        return True
+
+    def get_log_file_size(self):
+        return 0
+
+    def flush_telemetry(self):
+        return {
+            'flush_count': 0, 'flush_error_count': 0, 'rows_written': len(self.rows),
+            'last_flush_duration_s': 0.0, 'max_flush_duration_s': 0.0,
+            'mean_flush_duration_s': 0.0,
+        }
+
+    def cleanup(self):
+        self.closed = True
+
+
+class RaisingLogger(GatedLogger):
+    """偶数の重量で例外を送出するロガー"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate.set()
+
+    def log_weight(self, weight, timestamp=None):
+        if weight % 2 == 0:
+            raise RuntimeError("broken")
+        return super().log_weight(weight, timestamp)
+
+
+class FlakyLogger(WeightLogger):
+    """最初の書き出しに失敗するロガー"""
+
+    def __init__(self, *args, **kwargs):
+        self.failures = 1
+        super().__init__(*args, **kwargs)
+
+    def _write_rows(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk busy")
+        super()._write_rows(rows)
+
+
+class SlowSyncLogger(WeightLogger):
+    """fsync に時間がかかるロガー"""
+
+    SYNC_DELAY_S = 0.05
+
+    def _sync(self):
+        time.sleep(self.SYNC_DELAY_S)
+        super()._sync()
+
+
+def _fill(writer, count):
+    for i in range(count):
+        writer.log_weight(float(i))
+
+
+def test_log_weight_does_not_wait_for_storage():
+    logger = GatedLogger()
+    writer = QueuedWeightLogger(logger, capacity=4, overflow="spill")
+    started = time.monotonic()
+    _fill(writer, 20)
+    assert time.monotonic() - started < 0.05
+    logger.gate.set()
+    writer.cleanup()
+    assert [w for w, _ in logger.rows] == [float(i) for i in range(20)]
+    assert logger.closed
+    metrics = writer.telemetry()
+    assert metrics['written_count'] == 20
+    assert metrics['spilled_count'] > 0
+    assert metrics['dropped_count'] == 0
+    assert metrics['depth'] == 0
+
+
+def test_timestamp_is_taken_when_queued():
+    logger = GatedLogger()
+    writer = QueuedWeightLogger(logger)
+    before = datetime.now()
+    writer.log_weight(1.0)
+    time.sleep(0.05)
+    logger.gate.set()
+    writer.cleanup()
+    assert (logger.rows[0][1] - before).total_seconds() < 0.04
+
+
+def test_drop_oldest_keeps_newest_records():
+    logger = GatedLogger()
+    writer = QueuedWeightLogger(logger, capacity=3, overflow="drop_oldest")
+    writer.log_weight(-1.0)
+    # 書き込みスレッドが最初の記録を取り出して止まるのを待つ
+    time.sleep(0.05)
+    _fill(writer, 6)
+    assert writer.depth == 3
+    logger.gate.set()
+    writer.cleanup()
+    assert [w for w, _ in logger.rows] == [-1.0, 3.0, 4.0, 5.0]
+    assert writer.telemetry()['dropped_count'] == 3
+
+
+def test_spill_limit_drops_oldest():
+    logger = GatedLogger()
+    writer = QueuedWeightLogger(logger, capacity=2, overflow="spill", spill_limit=4)
+    writer.log_weight(-1.0)
+    time.sleep(0.05)
+    _fill(writer, 6)
+    assert writer.telemetry()['max_depth'] == 4
+    logger.gate.set()
+    writer.cleanup()
+    assert [w for w, _ in logger.rows] == [-1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_block_waits_for_space():
+    logger = GatedLogger()
+    writer = QueuedWeightLogger(logger, capacity=2, overflow="block")
+    writer.log_weight(-1.0)
+    time.sleep(0.05)
+    _fill(writer, 2)
+    blocked = threading.Thread(target=writer.log_weight, args=(9.0,))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+    logger.gate.set()
+    blocked.join(1.0)
+    assert not blocked.is_alive()
+    writer.cleanup()
+    assert [w for w, _ in logger.rows] == [-1.0, 0.0, 1.0, 9.0]
+
+
+def test_writes_through_to_csv(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = QueuedWeightLogger(WeightLogger(str(path), flush_rows=100))
+    writer.log_weight(123.0, datetime(2026, 1, 2, 3, 4, 5))
+    assert writer.drain(1.0)
+    writer.cleanup()
+    assert path.read_text(encoding='utf-8').splitlines() == [
+        "timestamp,weight_g", "2026-01-02 03:04:05,123.00"
+    ]
+    assert writer.telemetry()['written_count'] == 1
+    assert not writer.log_weight(1.0)
+
+
+def test_failed_flush_is_retried_and_counted_once(tmp_path):
+    path = tmp_path / "log.csv"
+    writer = QueuedWeightLogger(FlakyLogger(str(path), flush_rows=2, flush_interval_s=60))
+    # 1回目の書き出し（0, 1）は失敗してバッファに残り、3件目で3行まとめて書き出す
+    _fill(writer, 3)
+    assert writer.drain(1.0)
+    metrics = writer.telemetry()
+    assert metrics['written_count'] == 3
+    assert metrics['flush_error_count'] == 1
+    assert metrics['error_count'] == 0
+    # バッファに残っているだけの記録は書き込み件数に含めない
+    writer.log_weight(3.0)
+    assert writer.drain(1.0)
+    assert writer.telemetry()['written_count'] == 3
+    writer.cleanup()
+    assert writer.telemetry()['written_count'] == 4
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 5
+
+
+def test_records_lost_to_exceptions_are_counted():
+    writer = QueuedWeightLogger(RaisingLogger())
+    _fill(writer, 5)
+    writer.cleanup()
+    metrics = writer.telemetry()
+    assert metrics['written_count'] == 2
+    assert metrics['error_count'] == 3
+
+
+def test_write_latency_includes_fsync(tmp_path):
+    logger = SlowSyncLogger(str(tmp_path / "log.csv"), flush_rows=2, fsync_policy="always")
+    writer = QueuedWeightLogger(logger)
+    # 1件目はバッファに入るだけで、2件目で書き出しと fsync が行われる
+    _fill(writer, 2)
+    assert writer.drain(1.0)
+    metrics = writer.telemetry()
+    assert metrics['flush_count'] == 1
+    assert metrics['written_count'] == 2
+    assert metrics['last_write_latency_s'] >= SlowSyncLogger.SYNC_DELAY_S
+    assert metrics['mean_write_latency_s'] == metrics['last_write_latency_s']
+    writer.cleanup()
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        QueuedWeightLogger(GatedLogger(), overflow="wait")
@@ -0,0 +1,129 @@
+"""
+サーボの軌道計算とモーション再生エンジンのテスト
+
+書き込み先は記録用の関数に置き換えるため、サーボやgpiozeroは不要です。
+
+    python -m pytest tests/test_motion_engine.py
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from controllers.motion_engine import MotionEngine
+from utils.motion_profile import hold, s_curve, trapezoidal
+
+
+class RecordingServo:
+    """出力した角度と時刻を記録する"""
+
+    def __init__(self):
+        self.writes = []
+        self.detaches = 0
+        self.lock = threading.Lock()
+
+    def write(self, angle):
+        with self.lock:
+            self.writes.append((time.monotonic(), angle))
+
+    def detach(self):
+        with self.lock:
+            self.detaches += 1
+
+
+@pytest.fixture
+def servo_engine():
+    servo = RecordingServo()
+    engine = MotionEngine(servo.write, servo.detach, step_hold_s=0.05)
+    yield servo, engine
+    engine.close()
+
+
+@pytest.mark.parametrize("profile", [
+    trapezoidal(90, -90, 2.0, accel_fraction=0.25, rate_hz=50),
+    s_curve(90, -90, 2.0, rate_hz=50),
+])
+def test_profiles_reach_target_monotonically(profile):
+    assert profile.times[0] == 0.0
+    assert profile.duration == pytest.approx(2.0)
+    assert profile.angles[0] == pytest.approx(90)
+    assert profile.end_angle == pytest.approx(-90)
+    steps = [b - a for a, b in zip(profile.angles, profile.angles[1:])]
+    assert all(step <= 1e-9 for step in steps)
+
+
+def test_s_curve_starts_and_ends_slowly():
+    profile = s_curve(0, 180, 1.0, rate_hz=100)
+    steps = [b - a for a, b in zip(profile.angles, profile.angles[1:])]
+    middle = steps[len(steps) // 2]
+    assert steps[0] < middle / 50
+    assert steps[-1] < middle / 50
+
+
+def test_quantize_keeps_one_point_per_degree():
+    profile = trapezoidal(90, -90, 300, accel_fraction=0.0, rate_hz=50).quantize(1.0)
+    assert list(profile.angles) == [float(a) for a in range(90, -91, -1)]
+    assert profile.duration == pytest.approx(300, abs=0.02)
+
+
+def test_play_returns_immediately_and_follows_schedule(servo_engine):
+    servo, engine = servo_engine
+    profile = trapezoidal(0, 60, 0.6, accel_fraction=0.0, rate_hz=50).quantize(1.0)
+    started = time.monotonic()
+    handle = engine.play(profile)
+    assert time.monotonic() - started < 0.05
+    assert handle.wait(2.0)
+    assert not handle.interrupted
+    assert handle.last_angle == 60
+    # 絶対時刻で出力するため、各点の遅れは積み重ならない
+    lateness = [
+        (t - handle.started_at) - scheduled
+        for (t, _), scheduled in zip(servo.writes, profile.times)
+    ]
+    assert max(lateness) < 0.02
+    assert handle.finished_at - handle.started_at == pytest.approx(profile.duration, abs=0.03)
+
+
+def test_cancel_stops_within_milliseconds(servo_engine):
+    servo, engine = servo_engine
+    slow = engine.play(trapezoidal(90, -90, 30, accel_fraction=0.0).quantize(1.0))
+    queued = engine.play(hold(90), hold_s=1.0)
+    time.sleep(0.2)
+    slow.cancel()
+    assert slow.wait(1.0)
+    assert slow.interrupted
+    assert slow.finished_at - slow.token.cancelled_at < 0.02
+    # 次の動作はキャンセルされた動作の後に再生される
+    assert queued.wait(2.0)
+    assert servo.writes[-1][1] == 90
+    assert servo.detaches >= 2
+
+
+def test_handle_can_be_awaited(servo_engine):
+    _, engine = servo_engine
+
+    async def main():
+        started = time.monotonic()
+        handle = engine.play(hold(0), hold_s=0.1)
+        interrupted = await handle
+        return interrupted, time.monotonic() - started
+
+    interrupted, elapsed = asyncio.run(main())
+    assert interrupted is False
+    assert elapsed >= 0.1
+
+
+def test_profile_factory_uses_last_angle(servo_engine):
+    _, engine = servo_engine
+    engine.play(hold(30))
+    handle = engine.play(lambda start: s_curve(start, 0, 0.1))
+    assert handle.wait(2.0)
+    assert handle.profile.angles[0] == 30
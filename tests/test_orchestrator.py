@@ -0,0 +1,190 @@
+"""
+イベント駆動の監視エンジン（HydrationOrchestrator）のテスト
+
+センサーとサーボを偽物に置き換え、短い監視時間・警告時間で
+コップの設置 → 監視 → 水分補給、監視のタイムアウト → 警告 → 水分補給での停止、
+警告時間の終了の各流れを実際のイベントループで確認します。
+
+    python -m pytest tests/test_orchestrator.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config.settings import MonitoringConfig
+from core.orchestrator import HydrationOrchestrator
+from core.state_machine import HydrationState, HydrationStateMachine
+
+SAMPLE_INTERVAL_S = 0.01
+# 水分補給は WEIGHT_THRESHOLD_G 以上の減少で検知する（減少後もコップありのまま）
+CUP_G = 400.0
+AFTER_DRINK_G = 240.0
+
+
+class FakeAsyncSensor:
+    """AsyncWeightSensor の代わり（push() した重量を順に返す）"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.latest = None
+        self.zero_tracking = []
+        self.sensor = SimpleNamespace(set_zero_tracking=self.zero_tracking.append)
+
+    def push(self, weight):
+        self.queue.put_nowait((time.monotonic(), weight))
+
+    def __aiter__(self):
+        return self._samples()
+
+    async def _samples(self):
+        while True:
+            sample = await self.queue.get()
+            self.latest = sample
+            yield sample
+
+
+class FakeSweep:
+    """alert_sweep() が返すハンドルの代わり（キャンセルか時間切れで終わる）"""
+
+    def __init__(self, duration_s, token):
+        self.duration_s = duration_s
+        self.token = token
+        self.finished_at = None
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def _run(self):
+        deadline = time.monotonic() + self.duration_s
+        while not self.token.cancelled and time.monotonic() < deadline:
+            await asyncio.sleep(0.002)
+        self.finished_at = time.monotonic()
+        return self.token.cancelled
+
+
+class FakeServo:
+    def __init__(self):
+        self.actions = []
+
+    def move_to_initial_position(self, gradual=False):
+        self.actions.append(("initial", gradual))
+        return asyncio.sleep(0)
+
+    def alert_sweep(self, duration_s, token, on_step=None):
+        self.actions.append(("alert", duration_s))
+        return FakeSweep(duration_s, token)
+
+
+def _monitoring(**overrides):
+    options = dict(
+        WEIGHT_THRESHOLD_G=150,
+        MONITORING_DURATION_S=0.3,
+        ALERT_DURATION_S=0.3,
+        DRINK_CONFIRM_SAMPLES=3,
+        SETTLE_WINDOW_S=0.1,
+        SETTLE_TOLERANCE_G=2.0,
+        SETTLE_MAX_SLOPE_G_S=2.0,
+        SETTLE_TIMEOUT_S=1.0,
+    )
+    options.update(overrides)
+    return MonitoringConfig(**options)
+
+
+async def _feed(sensor, weight, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sensor.push(weight)
+        await asyncio.sleep(SAMPLE_INTERVAL_S)
+
+
+def _scenario(steps, **overrides):
+    """steps: [(重量, 秒数), ...] を順に与え、(エンジン, 各ステップ後の状態) を返します"""
+    monitoring = _monitoring(**overrides)
+
+    async def main():
+        sensor = FakeAsyncSensor()
+        servo = FakeServo()
+        state_machine = HydrationStateMachine(
+            monitoring_duration_s=monitoring.MONITORING_DURATION_S,
+            alert_duration_s=monitoring.ALERT_DURATION_S
+        )
+        engine = HydrationOrchestrator(
+            state_machine, sensor, servo, monitoring, status_interval_s=3600.0
+        )
+        task = asyncio.create_task(engine.run())
+        states = []
+        try:
+            for weight, seconds in steps:
+                await _feed(sensor, weight, seconds)
+                states.append(state_machine.state)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return engine, sensor, servo, states
+
+    return asyncio.run(main())
+
+
+def _transitions(engine):
+    return [(r.old_state, r.new_state, r.trigger) for r in engine.state_machine.journal.records()]
+
+
+def test_cup_settles_then_drink_returns_to_idle():
+    engine, sensor, servo, states = _scenario(
+        [(0.0, 0.05), (CUP_G, 0.2), (AFTER_DRINK_G, 0.2)],
+        MONITORING_DURATION_S=10.0
+    )
+    assert states == [HydrationState.IDLE, HydrationState.MONITORING, HydrationState.MONITORING]
+    assert _transitions(engine) == [
+        ("IDLE", "IDLE", "STOP"),
+        ("IDLE", "MONITORING", "START_MONITORING"),
+        ("MONITORING", "IDLE", "STOP"),
+        # 水分補給後はコップが置かれたままなので、新しい基準重量で監視を続ける
+        ("IDLE", "MONITORING", "RESET_MONITORING"),
+    ]
+    assert engine.state_machine.last_significant_weight == AFTER_DRINK_G
+    # 空の間だけゼロ点の自動追従を行う
+    assert sensor.zero_tracking[0] is True
+    assert sensor.zero_tracking[-1] is False
+    assert ("alert", 0.3) not in servo.actions
+
+
+def test_timeout_alerts_and_drink_stops_servo():
+    engine, sensor, servo, states = _scenario(
+        [(CUP_G, 0.5), (AFTER_DRINK_G, 0.1)],
+        ALERT_DURATION_S=5.0
+    )
+    assert states == [HydrationState.ALERTING, HydrationState.IDLE]
+    assert _transitions(engine)[1:4] == [
+        ("IDLE", "MONITORING", "START_MONITORING"),
+        ("MONITORING", "ALERTING", "TIMEOUT"),
+        ("ALERTING", "IDLE", "STOP"),
+    ]
+    # 最初に減少したサンプルから停止まで（確認のサンプル分を含む）
+    assert len(engine.alert_stop_latencies_s) == 1
+    assert engine.alert_stop_latencies_s[0] < 0.2
+    alert_index = servo.actions.index(("alert", 5.0))
+    assert servo.actions[alert_index + 1] == ("initial", False)
+
+
+def test_alert_ends_after_alert_duration():
+    engine, sensor, servo, states = _scenario(
+        [(CUP_G, 0.4), (CUP_G, 0.3)],
+        MONITORING_DURATION_S=0.2, ALERT_DURATION_S=0.2
+    )
+    assert states[0] == HydrationState.ALERTING
+    # 警告時間が終わるとIDLEに戻り、コップが置かれたままなので監視を始め直す
+    assert _transitions(engine)[1:5] == [
+        ("IDLE", "MONITORING", "START_MONITORING"),
+        ("MONITORING", "ALERTING", "TIMEOUT"),
+        ("ALERTING", "IDLE", "STOP"),
+        ("IDLE", "MONITORING", "START_MONITORING"),
+    ]
+    assert engine.alert_stop_latencies_s == []
@@ -0,0 +1,122 @@
+"""
+HX711の生値の記録（RawSampleRecorder）のテスト
+
+サンプリングスレッドの代わりに on_sample() を直接呼び出します。
+
+    python -m pytest tests/test_sample_recorder.py
+"""
+import os
+import random
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.sample_recorder import (
+    RawSampleRecorder,
+    _get_deltas,
+    _put_deltas,
+    iter_samples,
+    read_chunks,
+)
+from utils.sample_stats import to_weight
+
+# 2026-01-02 00:00:00 UTC 付近（日付の境界をまたがないよう正午を使う）
+WALL_START = 1767355200.0
+
+
+def _recorder(tmp_path, **kwargs):
+    context = kwargs.pop('context', None)
+    return RawSampleRecorder(
+        str(tmp_path), context=context, fsync=False,
+        wall_clock=lambda: WALL_START, clock=lambda: 0.0, **kwargs
+    )
+
+
+def _files(tmp_path):
+    return sorted(str(p) for p in tmp_path.glob("raw_*.hxr"))
+
+
+def test_varint_round_trip_extremes():
+    values = [0, 1, -1, 63, -64, 64, 2 ** 23 - 1, -2 ** 23, 2 ** 31 - 1, -2 ** 31, 5, 5]
+    out = bytearray()
+    _put_deltas(out, values)
+    decoded, pos = _get_deltas(bytes(out), 0, len(values), 'q')
+    assert list(decoded) == values
+    assert pos == len(out)
+
+
+def test_samples_round_trip_with_state(tmp_path):
+    recorder = _recorder(tmp_path, chunk_samples=50)
+    random.seed(3)
+    expected = []
+    for i in range(200):
+        if i == 120:
+            recorder.set_state("MONITORING")
+        t = i * 0.1 + random.uniform(-0.002, 0.002)
+        value = 84210 + 215000 + random.randint(-800, 800)
+        recorder.on_sample(t, value)
+        expected.append((round((WALL_START + t) * 1000) / 1000, value, recorder.state))
+    recorder.close()
+    samples = [(round(t, 3), v, s) for t, v, s in iter_samples(_files(tmp_path))]
+    assert samples == [(round(t, 3), v, s) for t, v, s in expected]
+    # 状態が変わった時点でチャンクが分かれる
+    chunks = list(read_chunks(_files(tmp_path)))
+    assert [len(c) for c in chunks] == [50, 50, 20, 50, 30]
+    assert recorder.chunk_count == 5
+
+
+def test_calibration_change_starts_new_chunk(tmp_path):
+    calibration = [(84210.0, 717.0)]
+    recorder = _recorder(tmp_path, context=lambda: calibration[0])
+    for i in range(10):
+        if i == 4:
+            calibration[0] = (84300.0, 717.0)
+        recorder.on_sample(i * 0.1, 84210 + 717 * 100)
+    recorder.close()
+    chunks = list(read_chunks(_files(tmp_path)))
+    assert [(c.offset, len(c)) for c in chunks] == [(84210.0, 4), (84300.0, 6)]
+    assert chunks[0].weights()[0] == 100.0
+    assert chunks[1].weights().tolist() == [
+        to_weight(v, 84300.0, 717.0) for v in chunks[1].raw
+    ]
+
+
+def test_chunk_seconds_limits_chunk_length(tmp_path):
+    recorder = _recorder(tmp_path, chunk_samples=1000, chunk_seconds=1.0)
+    for i in range(25):
+        recorder.on_sample(i * 0.1, i)
+    recorder.flush(1.0)
+    assert [len(c) for c in read_chunks(_files(tmp_path))] == [10, 10, 5]
+    recorder.close()
+
+
+def test_torn_chunk_is_skipped_and_truncated(tmp_path):
+    recorder = _recorder(tmp_path, chunk_samples=10)
+    for i in range(30):
+        recorder.on_sample(i * 0.1, i)
+    recorder.close()
+    path = _files(tmp_path)[0]
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 3)
+    assert [len(c) for c in read_chunks(path)] == [10, 10]
+
+    recorder = _recorder(tmp_path)
+    recorder.on_sample(10.0, 99)
+    recorder.close()
+    assert [v for _, v, _ in iter_samples(path)] == list(range(20)) + [99]
+
+
+def test_encoded_size_is_small(tmp_path):
+    recorder = _recorder(tmp_path)
+    random.seed(5)
+    count = 6000
+    for i in range(count):
+        recorder.on_sample(i * 0.1 + random.uniform(-0.001, 0.001), 300000 + random.randint(-800, 800))
+    recorder.close()
+    # 時刻（8バイト）と生値（4バイト）をそのまま保存するよりずっと小さい
+    assert recorder.bytes_written < count * 12 / 5
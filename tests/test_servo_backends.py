@@ -0,0 +1,120 @@
+"""
+サーボ出力バックエンドのテスト
+
+バックエンドの選択（"auto" の試す順番と gpiozero への切り替え）と、
+一時ディレクトリに作った sysfs の PWM ツリーへの書き込みを確認します。
+
+    python -m pytest tests/test_servo_backends.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import controllers.servo_backends as servo_backends
+from controllers.servo_backends import HardwarePwmBackend, ServoBackend, create_servo_backend
+
+SERVO_ARGS = (12, -90, 90, 0.5 / 1000, 2.4 / 1000)
+
+
+def _fake_backends(monkeypatch, available):
+    """作成を試した順番を記録し、available に含まれるものだけ作成できるようにします"""
+    attempts = []
+
+    def factory(name):
+        class FakeBackend(ServoBackend):
+            def __init__(self, pin, *args, **kwargs):
+                attempts.append(name)
+                if name not in available:
+                    raise OSError(f"{name} is not available")
+                super().__init__(*args)
+                self.name = name
+
+            def set_pulse_width(self, seconds):
+                pass
+
+            def detach(self):
+                pass
+        return FakeBackend
+
+    monkeypatch.setattr(servo_backends, "HardwarePwmBackend", factory("hardware_pwm"))
+    monkeypatch.setattr(servo_backends, "LgpioBackend", factory("lgpio"))
+    monkeypatch.setattr(servo_backends, "GpiozeroBackend", factory("gpiozero"))
+    return attempts
+
+
+@pytest.mark.parametrize("backend, available, expected_attempts", [
+    ("auto", {"hardware_pwm", "lgpio", "gpiozero"}, ["hardware_pwm"]),
+    ("auto", {"lgpio", "gpiozero"}, ["hardware_pwm", "lgpio"]),
+    ("auto", {"gpiozero"}, ["hardware_pwm", "lgpio", "gpiozero"]),
+    ("lgpio", {"lgpio", "gpiozero"}, ["lgpio"]),
+    # 指定したものが使えない場合は "auto" の残りではなく gpiozero に切り替える
+    ("lgpio", {"hardware_pwm", "gpiozero"}, ["lgpio", "gpiozero"]),
+    ("hardware_pwm", {"lgpio", "gpiozero"}, ["hardware_pwm", "gpiozero"]),
+    ("gpiozero", {"hardware_pwm", "gpiozero"}, ["gpiozero"]),
+])
+def test_backend_fallback_order(monkeypatch, backend, available, expected_attempts):
+    attempts = _fake_backends(monkeypatch, available)
+    result = create_servo_backend(backend, *SERVO_ARGS)
+    assert attempts == expected_attempts
+    assert result.name == expected_attempts[-1]
+
+
+def test_gpiozero_failure_is_raised(monkeypatch):
+    attempts = _fake_backends(monkeypatch, set())
+    with pytest.raises(OSError):
+        create_servo_backend("auto", *SERVO_ARGS)
+    assert attempts == ["hardware_pwm", "lgpio", "gpiozero"]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_servo_backend("pigpio", *SERVO_ARGS)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class NoDetach(ServoBackend):
+        def set_pulse_width(self, seconds):
+            pass
+
+    with pytest.raises(TypeError):
+        NoDetach(-90, 90, 0.5 / 1000, 2.4 / 1000)
+
+
+def _fake_sysfs(root):
+    """エクスポート済みの pwmchip0/pwm0 を作ります"""
+    pwm_dir = root / "pwmchip0" / "pwm0"
+    pwm_dir.mkdir(parents=True)
+    for name in ("export", "unexport"):
+        (root / "pwmchip0" / name).write_text("")
+    for name in ("period", "duty_cycle", "enable"):
+        (pwm_dir / name).write_text("")
+    return pwm_dir
+
+
+def test_hardware_pwm_writes_sysfs(tmp_path):
+    pwm_dir = _fake_sysfs(tmp_path)
+    backend = HardwarePwmBackend(*SERVO_ARGS, sysfs_root=str(tmp_path))
+    assert (pwm_dir / "period").read_text() == "20000000"
+    assert (pwm_dir / "enable").read_text() == "0"
+
+    backend.write(0)
+    assert (pwm_dir / "duty_cycle").read_text() == "1450000"
+    assert (pwm_dir / "enable").read_text() == "1"
+    backend.write(90)
+    assert (pwm_dir / "duty_cycle").read_text() == "2400000"
+
+    backend.close()
+    assert (pwm_dir / "enable").read_text() == "0"
+    assert (tmp_path / "pwmchip0" / "unexport").read_text() == "0"
+
+
+def test_hardware_pwm_rejects_non_pwm_pin(tmp_path):
+    _fake_sysfs(tmp_path)
+    with pytest.raises(ValueError):
+        HardwarePwmBackend(17, *SERVO_ARGS[1:], sysfs_root=str(tmp_path))
@@ -0,0 +1,88 @@
+"""
+整定・コップの有無・水分補給の判定のテスト
+
+仮想の時刻と重量の列を与え、しきい値付近でばたつかないこと
+（ヒステリシス・連続回数による確認）と、揺れが収まってから安定と判定することを確認します。
+
+    python -m pytest tests/test_settle_detector.py
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.settle_detector import DrinkDetector, PresenceDetector, SettleDetector
+
+SAMPLE_INTERVAL_S = 0.1
+
+
+def test_presence_detector_hysteresis():
+    detector = PresenceDetector(on_threshold_g=50.0, off_threshold_g=30.0)
+    # しきい値の間では直前の判定を維持する
+    weights = [0, 40, 49.9, 50, 45, 31, 30, 29.9, 40, 49, 60]
+    expected = [False, False, False, True, True, True, True, False, False, False, True]
+    assert [detector.update(w) for w in weights] == expected
+    detector.reset()
+    assert not detector.present
+
+
+def test_presence_detector_does_not_chatter_near_threshold():
+    detector = PresenceDetector(on_threshold_g=50.0, off_threshold_g=30.0)
+    rng = random.Random(1)
+    changes = 0
+    previous = detector.update(100.0)
+    for _ in range(1000):
+        present = detector.update(50.0 + rng.uniform(-15.0, 15.0))
+        changes += present != previous
+        previous = present
+    assert changes == 0
+
+
+def test_presence_detector_rejects_inverted_thresholds():
+    with pytest.raises(ValueError):
+        PresenceDetector(on_threshold_g=30.0, off_threshold_g=50.0)
+
+
+def test_settle_detector_waits_until_shaking_stops():
+    detector = SettleDetector(window_s=1.0, tolerance_g=2.0, max_slope_g_per_s=2.0)
+    t = 0.0
+    # 置いた直後の揺れ（±20g）
+    for i in range(10):
+        assert not detector.update(t, 300.0 + (20.0 if i % 2 else -20.0))
+        t += SAMPLE_INTERVAL_S
+    # 揺れが収まってもウィンドウから揺れが外れるまでは不安定
+    settled_at = None
+    for _ in range(20):
+        if detector.update(t, 300.0 + random.Random(t).uniform(-0.5, 0.5)) and settled_at is None:
+            settled_at = t
+        t += SAMPLE_INTERVAL_S
+    assert settled_at is not None
+    assert settled_at >= 1.9
+    assert detector.mean == pytest.approx(300.0, abs=0.5)
+
+
+def test_settle_detector_rejects_slow_drift():
+    detector = SettleDetector(window_s=1.0, tolerance_g=5.0, max_slope_g_per_s=2.0)
+    # ばらつきは小さいが 4 g/s で減り続けている（こぼれている）
+    results = [detector.update(i * SAMPLE_INTERVAL_S, 300.0 - 0.4 * i) for i in range(30)]
+    assert not any(results)
+    assert detector.slope == pytest.approx(-4.0)
+
+
+def test_drink_detector_requires_consecutive_samples():
+    detector = DrinkDetector(threshold_g=10.0, confirm_samples=3)
+    # 1サンプルだけの減少（ノイズ）では検知しない
+    assert not detector.update(0.0, 300.0, 285.0)
+    assert not detector.update(0.1, 300.0, 299.0)
+    assert detector.first_crossed_at is None
+    assert not detector.update(0.2, 300.0, 280.0)
+    assert not detector.update(0.3, 300.0, 281.0)
+    assert detector.update(0.4, 300.0, 280.5)
+    assert detector.first_crossed_at == 0.2
+    assert detector.weight_diff == pytest.approx(19.5)
@@ -0,0 +1,118 @@
+"""
+起動処理のテスト
+
+重いモジュール（RPi.GPIO・gpiozero・supabase など）を起動時にインポートしないこと、
+起動時間の計測（StartupProfiler）と、ロガー・センサー・サーボの並行した初期化
+（失敗時に初期化済みのものを片付けること）を確認します。
+
+    python -m pytest tests/test_startup.py
+"""
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import main
+from utils.startup_profiler import StartupProfiler
+
+DEFERRED_MODULES = ("RPi", "gpiozero", "lgpio", "supabase", "numpy", "controllers.weight_sensor")
+
+
+def test_main_does_not_import_heavy_modules():
+    code = (
+        "import sys, main, utils\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_root,
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_profiler_records_imports_and_phases(tmp_path, monkeypatch):
+    (tmp_path / "startup_probe_child.py").write_text("import time\ntime.sleep(0.02)\n")
+    (tmp_path / "startup_probe.py").write_text("import startup_probe_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = StartupProfiler()
+    profiler.track_imports()
+    try:
+        import startup_probe  # noqa: F401
+    finally:
+        profiler.stop_tracking_imports()
+        sys.modules.pop("startup_probe", None)
+        sys.modules.pop("startup_probe_child", None)
+
+    self_time, total = profiler._imports["startup_probe"]
+    child_self, child_total = profiler._imports["startup_probe_child"]
+    assert child_self >= 0.02
+    # 子モジュールの時間は親の累積時間に含まれ、自身の時間には含まれない
+    assert total >= child_total
+    assert self_time < 0.02
+
+    def work():
+        with profiler.phase("テスト"):
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=work, name="probe-thread")
+    thread.start()
+    thread.join()
+    report = profiler.report()
+    assert "startup_probe" in report
+    assert "probe-thread" in report
+
+
+class FakeComponent:
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def cleanup(self):
+        self.events.append(f"cleanup:{self.name}")
+
+
+def _patch_factories(monkeypatch, events, failing=None, delay_s=0.1):
+    def factory(name):
+        def create(self):
+            events.append(f"start:{name}")
+            time.sleep(delay_s)
+            if name == failing:
+                raise RuntimeError(f"{name} failed")
+            return FakeComponent(name, events)
+        return create
+
+    for name in ("logger", "sensor", "servo"):
+        monkeypatch.setattr(main.HydrationMonitor, f"_create_{name}", factory(name))
+
+
+def test_components_are_initialized_in_parallel(monkeypatch):
+    events = []
+    _patch_factories(monkeypatch, events)
+    monkeypatch.setattr(main.HydrationMonitor, "_create_recorder", lambda self: None)
+    started = time.monotonic()
+    monitor = main.HydrationMonitor()
+    assert time.monotonic() - started < 0.25
+    assert {monitor.logger.name, monitor.sensor.name, monitor.servo.name} == {
+        "logger", "sensor", "servo"
+    }
+    phases = {name for name, _, _, _ in monitor.profiler._phases}
+    assert phases == {"ロガー初期化", "センサー初期化", "サーボ初期化"}
+
+
+def test_failed_initialization_cleans_up_started_components(monkeypatch):
+    events = []
+    _patch_factories(monkeypatch, events, failing="sensor")
+    with pytest.raises(RuntimeError, match="sensor failed"):
+        main.HydrationMonitor()
+    assert sorted(e for e in events if e.startswith("cleanup:")) == [
+        "cleanup:logger", "cleanup:servo"
+    ]
@@ -0,0 +1,115 @@
+"""
+ステートマシンの期限管理のテスト
+
+VirtualClock で時刻を進めるため、25分の監視サイクルも一瞬で終わります。
+
+    python -m pytest tests/test_state_machine_timers.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.state_machine import (
+    ALERT_END,
+    MONITORING_TIMEOUT,
+    HydrationState,
+    HydrationStateMachine,
+)
+from core.timers import DeadlineScheduler, VirtualClock
+
+MONITORING_DURATION_S = 1500
+ALERT_DURATION_S = 300
+
+
+def _state_machine(clock: VirtualClock) -> HydrationStateMachine:
+    return HydrationStateMachine(
+        MONITORING_DURATION_S, alert_duration_s=ALERT_DURATION_S, clock=clock
+    )
+
+
+def test_full_cycle_on_virtual_clock():
+    clock = VirtualClock(1000.0)
+    sm = _state_machine(clock)
+    start = time.perf_counter()
+
+    sm.transition_to_monitoring(400.0)
+    assert sm.deadlines.time_until_next() == MONITORING_DURATION_S
+
+    clock.advance(MONITORING_DURATION_S - 0.001)
+    assert sm.pop_due_deadlines() == []
+    assert not sm.is_monitoring_timeout()
+
+    clock.advance(0.001)
+    assert sm.pop_due_deadlines() == [MONITORING_TIMEOUT]
+    assert sm.is_monitoring_timeout()
+    assert sm.get_remaining_monitoring_time() == 0.0
+
+    sm.transition_to_alerting()
+    assert sm.state == HydrationState.ALERTING
+    clock.advance(ALERT_DURATION_S)
+    assert sm.pop_due_deadlines() == [ALERT_END]
+
+    sm.transition_to_idle()
+    assert len(sm.deadlines) == 0
+    assert time.perf_counter() - start < 1.0
+
+
+def test_reset_monitoring_timer_moves_deadline():
+    clock = VirtualClock()
+    sm = _state_machine(clock)
+    sm.transition_to_monitoring(400.0)
+
+    clock.advance(1000)
+    sm.reset_monitoring_timer(250.0)
+    assert sm.last_significant_weight == 250.0
+    assert sm.get_elapsed_monitoring_time() == 0.0
+
+    clock.advance(MONITORING_DURATION_S - 1)
+    assert sm.pop_due_deadlines() == []
+    clock.advance(1)
+    assert sm.pop_due_deadlines() == [MONITORING_TIMEOUT]
+    # 一度取り出した期限は再び発火しない
+    assert sm.pop_due_deadlines() == []
+
+
+def test_idle_cancels_pending_deadlines():
+    clock = VirtualClock()
+    sm = _state_machine(clock)
+    sm.transition_to_monitoring(400.0)
+    sm.transition_to_idle()
+    clock.advance(10 * MONITORING_DURATION_S)
+    assert sm.pop_due_deadlines() == []
+    assert sm.deadlines.next_due() is None
+
+
+def test_wall_clock_step_does_not_affect_timeout(monkeypatch):
+    clock = VirtualClock()
+    sm = _state_machine(clock)
+    sm.transition_to_monitoring(400.0)
+    # NTPによる時刻合わせで壁時計が1時間進んでも、監視時間には影響しない
+    wall = time.time() + 3600
+    monkeypatch.setattr(time, 'time', lambda: wall)
+    assert not sm.is_monitoring_timeout()
+    assert sm.get_remaining_monitoring_time() == MONITORING_DURATION_S
+
+
+def test_scheduler_orders_and_replaces_deadlines():
+    clock = VirtualClock()
+    scheduler = DeadlineScheduler(clock)
+    scheduler.schedule_in('b', 20)
+    scheduler.schedule_in('a', 10)
+    scheduler.schedule_in('c', 30)
+    # 登録し直すと前の期限は無効になる
+    scheduler.schedule_in('a', 25)
+    scheduler.cancel('c')
+
+    assert scheduler.next_due() == 20
+    assert scheduler.due_time('a') == 25
+    clock.advance(30)
+    assert scheduler.pop_due() == ['b', 'a']
+    assert len(scheduler) == 0
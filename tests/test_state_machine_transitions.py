@@ -0,0 +1,129 @@
+"""
+ステートマシンの遷移表・リスナー・遷移記録のテスト
+
+    python -m pytest tests/test_state_machine_transitions.py
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.state_machine import (
+    HydrationState,
+    HydrationStateMachine,
+    InvalidTransitionError,
+    Trigger,
+)
+from core.timers import VirtualClock
+from core.transition_journal import TransitionJournal
+
+MONITORING_DURATION_S = 1500
+
+
+def test_transitions_outside_table_are_rejected():
+    sm = HydrationStateMachine(MONITORING_DURATION_S, clock=VirtualClock())
+    assert not sm.can_fire(Trigger.TIMEOUT)
+    with pytest.raises(InvalidTransitionError):
+        sm.fire(Trigger.TIMEOUT)
+    # 基準重量のない監視開始はガード条件で拒否される
+    with pytest.raises(InvalidTransitionError):
+        sm.fire(Trigger.START_MONITORING)
+    assert sm.state == HydrationState.IDLE
+    assert sm.journal.total == 0
+
+
+def test_timeout_guard_requires_elapsed_monitoring_time():
+    clock = VirtualClock()
+    sm = HydrationStateMachine(MONITORING_DURATION_S, clock=clock)
+    sm.transition_to_monitoring(400.0)
+    with pytest.raises(InvalidTransitionError):
+        sm.transition_to_alerting()
+    clock.advance(MONITORING_DURATION_S)
+    assert sm.can_fire(Trigger.TIMEOUT)
+    sm.transition_to_alerting()
+    assert sm.state == HydrationState.ALERTING
+
+
+def test_listeners_receive_records_in_order():
+    clock = VirtualClock(10.0)
+    sm = HydrationStateMachine(MONITORING_DURATION_S, clock=clock)
+    seen = []
+    sm.add_listener(seen.append)
+    # 例外を送出するリスナーがあっても遷移と他のリスナーは止まらない
+    sm.add_listener(lambda record: 1 / 0)
+
+    sm.transition_to_monitoring(400.0)
+    clock.advance(5)
+    sm.transition_to_idle()
+
+    assert [(r.old_state, r.new_state, r.trigger) for r in seen] == [
+        ('IDLE', 'MONITORING', 'START_MONITORING'),
+        ('MONITORING', 'IDLE', 'STOP'),
+    ]
+    assert seen[0].weight == 400.0
+    assert seen[1].weight is None
+    assert seen[1].timestamp == 15.0
+    assert sm.journal.records() == seen
+
+    sm.remove_listener(seen.append)
+    sm.transition_to_idle()
+    assert len(seen) == 2
+
+
+def test_journal_wraps_and_counts():
+    journal = TransitionJournal(('A', 'B'), ('GO',), capacity=3)
+    for i in range(5):
+        journal.append(float(i), 'A', 'B' if i % 2 else 'A', 'GO', float(i))
+
+    assert journal.total == 5
+    assert len(journal) == 3
+    assert [r.timestamp for r in journal.records()] == [2.0, 3.0, 4.0]
+    assert [r.timestamp for r in journal.records(2)] == [3.0, 4.0]
+    assert journal.last().weight == 4.0
+    assert journal.counts() == {('A', 'A'): 2, ('A', 'B'): 1}
+
+    journal.clear()
+    assert journal.records() == []
+    assert journal.last() is None
+
+
+def test_records_carry_wall_clock_time():
+    clock = VirtualClock(10.0)
+    wall = VirtualClock(1_700_000_000.0)
+    sm = HydrationStateMachine(MONITORING_DURATION_S, clock=clock, wall_clock=wall)
+
+    sm.transition_to_monitoring(400.0)
+    clock.advance(5)
+    wall.advance(5)
+    sm.transition_to_idle()
+
+    assert [r.wall_time for r in sm.journal.records()] == [1_700_000_000.0, 1_700_000_005.0]
+
+
+def test_persist_appends_only_new_records(tmp_path):
+    path = tmp_path / "log" / "transitions.csv"
+    journal = TransitionJournal(('A', 'B'), ('GO',), capacity=3)
+    journal.append(1.0, 'A', 'B', 'GO', 400.0, 1_700_000_000.0)
+    journal.append(2.0, 'B', 'A', 'GO')
+
+    assert journal.persist(str(path)) == 2
+    assert journal.persist(str(path)) == 0
+
+    # 容量を超えて上書きされた記録は保存できない
+    for i in range(4):
+        journal.append(3.0 + i, 'A', 'B', 'GO', None, 1_700_000_010.0 + i)
+    assert journal.persist(str(path)) == 3
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert lines[0] == "wall_time,monotonic,old_state,new_state,trigger,weight_g"
+    assert len(lines) == 6
+    assert lines[1].endswith(",1.000,A,B,GO,400.00")
+    assert lines[1].startswith(datetime.fromtimestamp(1_700_000_000.0).isoformat(timespec='milliseconds'))
+    assert lines[2] == ",2.000,B,A,GO,"
+    assert [line.split(',')[1] for line in lines[3:]] == ["4.000", "5.000", "6.000"]
@@ -0,0 +1,127 @@
+"""
+バッファ付きCSVロガーのテスト
+
+    python -m pytest tests/test_weight_logger.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from core.logger import WeightLogger
+
+TS = datetime(2026, 1, 2, 3, 4, 5)
+
+
+def _lines(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_rows_are_buffered_until_flush_rows(tmp_path):
+    path = tmp_path / "log.csv"
+    logger = WeightLogger(str(path), flush_rows=3, flush_interval_s=60)
+    logger.log_weight(100.0, TS)
+    logger.log_weight(101.5, TS)
+    assert _lines(path) == ["timestamp,weight_g"]
+    assert logger.get_log_file_size() == path.stat().st_size + 2 * len("2026-01-02 03:04:05,100.00\r\n")
+    logger.log_weight(102.0, TS)
+    assert _lines(path)[1:] == [
+        "2026-01-02 03:04:05,100.00",
+        "2026-01-02 03:04:05,101.50",
+        "2026-01-02 03:04:05,102.00",
+    ]
+    logger.cleanup()
+
+
+def test_flush_interval_writes_pending_rows(tmp_path):
+    path = tmp_path / "log.csv"
+    logger = WeightLogger(str(path), flush_rows=100, flush_interval_s=0.05)
+    logger.log_weight(250.0, TS)
+    deadline = time.monotonic() + 2.0
+    while len(_lines(path)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _lines(path)[1] == "2026-01-02 03:04:05,250.00"
+    logger.cleanup()
+
+
+def test_cleanup_flushes_and_fsyncs(tmp_path, monkeypatch):
+    path = tmp_path / "log.csv"
+    logger = WeightLogger(str(path), flush_rows=100, flush_interval_s=60, fsync_policy="never")
+    synced = []
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd))
+    logger.log_weight(300.0, TS)
+    logger.cleanup()
+    assert _lines(path)[1] == "2026-01-02 03:04:05,300.00"
+    assert len(synced) == 1
+
+
+def test_fsync_interval_policy(tmp_path, monkeypatch):
+    now = [0.0]
+    path = tmp_path / "log.csv"
+    logger = WeightLogger(
+        str(path), flush_rows=1, fsync_policy="interval", fsync_interval_s=10,
+        clock=lambda: now[0]
+    )
+    synced = []
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd))
+    logger.log_weight(1.0, TS)
+    assert synced == []
+    now[0] = 10.0
+    logger.log_weight(2.0, TS)
+    assert len(synced) == 1
+    logger.cleanup()
+
+
+def test_torn_last_row_is_removed_on_open(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("timestamp,weight_g\n2026-01-02 03:04:05,100.00\n2026-01-02 03:04", encoding='utf-8')
+    logger = WeightLogger(str(path), flush_rows=1)
+    logger.log_weight(200.0, TS)
+    logger.cleanup()
+    assert _lines(path) == [
+        "timestamp,weight_g",
+        "2026-01-02 03:04:05,100.00",
+        "2026-01-02 03:04:05,200.00",
+    ]
+
+
+def test_appends_crlf_rows_to_existing_log(tmp_path):
+    # 以前の csv.writer が書いたファイル（行末 "\r\n"）。最後の行は "\r" の直後で切れている
+    path = tmp_path / "log.csv"
+    path.write_bytes(
+        b"timestamp,weight_g\r\n2026-01-02 03:04:05,100.00\r\n2026-01-02 03:04:05,150.00\r"
+    )
+    logger = WeightLogger(str(path), flush_rows=1)
+    logger.log_weight(200.0, TS)
+    logger.cleanup()
+    assert path.read_bytes() == (
+        b"timestamp,weight_g\r\n"
+        b"2026-01-02 03:04:05,100.00\r\n"
+        b"2026-01-02 03:04:05,200.00\r\n"
+    )
+
+
+def test_torn_header_is_rewritten(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("timest", encoding='utf-8')
+    WeightLogger(str(path)).cleanup()
+    assert _lines(path) == ["timestamp,weight_g"]
+
+
+def test_reopens_after_file_is_moved(tmp_path):
+    path = tmp_path / "log.csv"
+    logger = WeightLogger(str(path), flush_rows=1)
+    logger.log_weight(100.0, TS)
+    # 同期処理によるアーカイブ
+    os.rename(path, tmp_path / "archived.csv")
+    logger.log_weight(200.0, TS)
+    logger.cleanup()
+    assert _lines(tmp_path / "archived.csv")[1:] == ["2026-01-02 03:04:05,100.00"]
+    assert _lines(path) == ["timestamp,weight_g", "2026-01-02 03:04:05,200.00"]
@@ -0,0 +1,139 @@
+"""
+連続サンプリング（WeightSampler）のテスト
+
+HX711を読み取りの動作だけを持つ偽のオブジェクトに置き換え、
+開始・停止・再開と、連続タイムアウトからのリセットによる復帰を確認します。
+
+    python -m pytest tests/test_weight_sampler.py
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+fake_gpio.install()
+
+from controllers.weight_sampler import WeightSampler
+from utils.hx711 import HX711TimeoutError
+
+
+class FakeHX711:
+    """一定の間隔で値を返すHX711の代わり"""
+
+    def __init__(self, interval_s=0.002):
+        self.interruptMode = True
+        self.readTimeout = 0.05
+        self.interval_s = interval_s
+        self.value = 1000
+        self.stuck = False
+        # 読み取りを止めておくゲート（スレッドが終わらない状態の再現）
+        self.gate = threading.Event()
+        self.gate.set()
+        self.blocked = threading.Event()
+        self.reads = 0
+        self.reset_count = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def read_long(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if not self.gate.is_set():
+                self.blocked.set()
+            self.gate.wait()
+            time.sleep(self.interval_s)
+            if self.stuck:
+                raise HX711TimeoutError("no data ready")
+            self.reads += 1
+            return self.value
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def reset(self):
+        self.reset_count += 1
+
+
+def _wait_until(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_start_stop_and_restart():
+    hx = FakeHX711()
+    sampler = WeightSampler(hx, capacity=16)
+    samples = []
+    sampler.add_listener(lambda ts, value: samples.append(value))
+    sampler.start()
+    try:
+        assert sampler.running
+        assert len(sampler.latest(4, timeout=1.0)) >= 1
+        assert sampler.stop()
+        assert not sampler.running
+        count = len(samples)
+        time.sleep(0.02)
+        assert len(samples) == count
+
+        assert sampler.start()
+        assert _wait_until(lambda: len(samples) > count)
+    finally:
+        sampler.stop()
+
+
+def test_start_waits_for_thread_that_did_not_stop():
+    hx = FakeHX711()
+    sampler = WeightSampler(hx)
+    sampler.start()
+    try:
+        assert _wait_until(lambda: hx.reads > 0)
+        # 読み取りの途中で止まったまま、停止の待ち時間を過ぎる
+        hx.gate.clear()
+        assert hx.blocked.wait(1.0)
+        assert not sampler.stop(timeout=0.02)
+        assert sampler.running
+
+        # 前のスレッドが残っている間は開始しない
+        assert not sampler.start(timeout=0.02)
+
+        # 前のスレッドが終われば開始でき、同時に読むスレッドは常に1つ
+        threading.Timer(0.05, hx.gate.set).start()
+        assert sampler.start(timeout=1.0)
+        reads = hx.reads
+        assert _wait_until(lambda: hx.reads > reads + 5)
+        assert hx.max_active == 1
+    finally:
+        hx.gate.set()
+        sampler.stop()
+
+
+def test_consecutive_timeouts_reset_and_recover():
+    hx = FakeHX711()
+    sampler = WeightSampler(hx, recover_after=2)
+    sampler.start()
+    try:
+        assert _wait_until(lambda: hx.reads > 0)
+        hx.stuck = True
+        assert _wait_until(lambda: sampler.recovery_count >= 1)
+        assert hx.reset_count == sampler.recovery_count
+        assert sampler.timeout_count >= 2
+
+        hx.stuck = False
+        reads = hx.reads
+        assert _wait_until(lambda: hx.reads > reads)
+        assert sampler.running
+    finally:
+        sampler.stop()
@@ -0,0 +1,127 @@
+"""
+ゼロ点の自動追従のテスト
+
+仮想の時刻で空の状態の重量を与え、1回の補正量の上限・補正の間隔・
+荷重がある間は補正しないことと、補正したオフセットをサンプリングの外で
+まとめて保存することを確認します。
+
+    python -m pytest tests/test_zero_tracker.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tests import fake_gpio
+
+GPIO = fake_gpio.install()
+
+from controllers.weight_sensor import WeightSensor
+from core.calibration import CalibrationStore
+from core.zero_tracker import ZeroTracker
+
+DOUT_PIN = 5
+SCK_PIN = 6
+REFERENCE_UNIT = 100
+RAW_EMPTY = 50000
+SAMPLE_INTERVAL_S = 0.1
+
+
+def _feed(tracker, weight, start, seconds):
+    """一定の重量を SAMPLE_INTERVAL_S ごとに与え、返された補正量の列を返します"""
+    steps = []
+    count = round(seconds / SAMPLE_INTERVAL_S)
+    for i in range(count):
+        step = tracker.update(start + i * SAMPLE_INTERVAL_S, weight)
+        if step is not None:
+            steps.append(step)
+    return steps
+
+
+def test_step_is_capped_and_rate_limited():
+    tracker = ZeroTracker(window_s=2.0, zero_band_g=10.0, tolerance_g=1.0,
+                          max_step_g=0.5, min_interval_s=5.0)
+    # 3 g ずれていても1回の補正は 0.5 g まで、間隔は 5 秒以上
+    steps = _feed(tracker, 3.0, 0.0, 20.0)
+    assert steps == [0.5] * len(steps)
+    assert 3 <= len(steps) <= 4
+    assert tracker.correction_count == len(steps)
+    assert tracker.total_correction_g == pytest.approx(0.5 * len(steps))
+
+    # 負のずれも同じ上限
+    tracker = ZeroTracker(window_s=2.0, max_step_g=0.5, min_interval_s=5.0)
+    assert _feed(tracker, -0.2, 0.0, 3.0) == [pytest.approx(-0.2)]
+
+
+def test_no_correction_while_loaded_or_unstable():
+    tracker = ZeroTracker(window_s=2.0, zero_band_g=10.0, tolerance_g=1.0, min_interval_s=0.0)
+    # ゼロ付近の範囲外（コップが載っている）
+    assert _feed(tracker, 250.0, 0.0, 10.0) == []
+    # ばらつきが大きい
+    noisy = [tracker.update(10.0 + i * SAMPLE_INTERVAL_S, 4.0 if i % 2 else -4.0)
+             for i in range(50)]
+    assert not any(step is not None for step in noisy)
+    assert tracker.correction_count == 0
+
+
+def _sensor(tmp_path, save_delay_s):
+    fake_gpio.reset(GPIO)
+    GPIO.attach_hx711(DOUT_PIN, SCK_PIN, rate=80.0, value_source=lambda ch: RAW_EMPTY)
+    return WeightSensor(
+        DOUT_PIN, SCK_PIN, REFERENCE_UNIT,
+        read_timeout_s=0.1,
+        calibration_store=CalibrationStore(str(tmp_path / "calibration.json")),
+        zero_tracker=ZeroTracker(window_s=1.0, max_step_g=0.5, min_interval_s=0.0),
+        calibration_save_delay_s=save_delay_s
+    )
+
+
+def test_corrections_are_saved_outside_sampling(tmp_path, monkeypatch):
+    sensor = _sensor(tmp_path, save_delay_s=60.0)
+    try:
+        saved = []
+        original_save = sensor.calibration_store.save
+        monkeypatch.setattr(
+            sensor.calibration_store, "save", lambda data: saved.append(data) or original_save(data)
+        )
+        offset = sensor.hx.get_offset_A()
+        sensor.set_zero_tracking(True)
+        for i in range(60):
+            sensor._track_zero(i * SAMPLE_INTERVAL_S, 2.0)
+        assert sensor.zero_tracker.correction_count >= 2
+        # 補正してもその場では保存しない
+        assert saved == []
+
+        assert sensor.flush_calibration()
+        assert len(saved) == 1
+        assert not sensor.flush_calibration()
+        corrected = offset + sensor.zero_tracker.total_correction_g * REFERENCE_UNIT
+        assert sensor.calibration_store.load().offset == pytest.approx(corrected)
+    finally:
+        sensor.cleanup()
+
+
+def test_pending_correction_is_saved_by_timer_and_cleanup(tmp_path):
+    sensor = _sensor(tmp_path, save_delay_s=0.05)
+    store = sensor.calibration_store
+    sensor.set_zero_tracking(True)
+    for i in range(20):
+        sensor._track_zero(i * SAMPLE_INTERVAL_S, 2.0)
+    deadline = time.monotonic() + 1.0
+    while store.load().offset == RAW_EMPTY and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.load().offset == pytest.approx(sensor.hx.get_offset_A())
+
+    # 保存前に終了しても cleanup() で保存される
+    sensor.calibration_save_delay_s = 60.0
+    for i in range(20, 40):
+        sensor._track_zero(i * SAMPLE_INTERVAL_S, 2.0)
+    assert store.load().offset != pytest.approx(sensor.hx.get_offset_A())
+    sensor.cleanup()
+    assert store.load().offset == pytest.approx(sensor.hx.get_offset_A())
@@ -2,7 +2,45 @@
 ユーティリティモジュール
 
 HX711ドライバなどの共通ユーティリティを提供します。
+HX711ドライバは RPi.GPIO を読み込むため、最初に参照されたときにインポートします。
 """
-from .hx711 import HX711
+import importlib
 
-__all__ = ['HX711']
+from .cancellation import CancellationToken
+from .filters import (
+    ExponentialMovingAverage,
+    FilterChain,
+    KalmanFilter1D,
+    RunningMedian,
+    StreamFilter,
+    TrimmedMean,
+    build_filter_chain,
+)
+from .motion_profile import MotionProfile, s_curve, trapezoidal
+from .ring_buffer import SampleRingBuffer
+from .sample_stats import median, trimmed_mean, to_weight, to_weights
+from .startup_profiler import StartupProfiler
+
+__all__ = [
+    'HX711', 'HX711TimeoutError', 'SampleRingBuffer',
+    'median', 'trimmed_mean', 'to_weight', 'to_weights',
+    'StreamFilter', 'RunningMedian', 'TrimmedMean', 'ExponentialMovingAverage',
+    'KalmanFilter1D', 'FilterChain', 'build_filter_chain',
+    'StartupProfiler', 'CancellationToken',
+    'MotionProfile', 'trapezoidal', 's_curve',
+]
+
+# 遅延インポートする属性と、その定義モジュール
+_LAZY_ATTRIBUTES = {
+    'HX711': '.hx711',
+    'HX711TimeoutError': '.hx711',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,44 @@
+"""
+スレッド間のキャンセル通知
+
+長い動作（サーボの警告動作など）を別スレッドから途中で止めるためのトークンです。
+動作側は time.sleep の代わりに wait() で待つことで、キャンセルされた瞬間に戻れます。
+"""
+import threading
+import time
+from typing import Optional
+
+
+class CancellationToken:
+    """
+    キャンセル要求を伝えるトークン
+
+    キャンセルは一度だけ有効で、取り消せません。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.cancelled_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセルされている場合True"""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """キャンセルを要求します（どのスレッドからでも呼び出せます）"""
+        if not self._event.is_set():
+            self.cancelled_at = time.monotonic()
+            self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        指定時間待ちます。キャンセルされた時点ですぐに戻ります。
+
+        Args:
+            timeout: 最大待ち時間（秒）。Noneの場合はキャンセルまで待つ
+
+        Returns:
+            bool: キャンセルされた場合True
+        """
+        return self._event.wait(timeout)
@@ -0,0 +1,285 @@
+"""
+重量推定用のストリーミングフィルタ
+
+HX711の生値を1サンプルずつ受け取り、逐次的に推定値を更新します。
+ウィンドウ全体を毎回ソートし直すことはありません。
+
+- RunningMedian: 2つのヒープによる移動中央値（更新 O(log n)）
+- TrimmedMean: ソート済みウィンドウによる移動トリム平均
+- ExponentialMovingAverage: 指数移動平均（EMA）
+- KalmanFilter1D: 1次元カルマンフィルタ（ランダムウォークモデル）
+
+各フィルタは FilterChain で連結できます。
+オフセット・参照単位による変換は一次変換なので、フィルタは生値に適用し、
+グラムへの変換は最後に行います。
+"""
+import heapq
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+
+class StreamFilter:
+    """ストリーミングフィルタの基底クラス"""
+
+    def __init__(self):
+        self.value: Optional[float] = None
+
+    def update(self, sample: float) -> float:
+        """
+        サンプルを1件追加し、更新後の推定値を返します。
+
+        Args:
+            sample: 入力値
+
+        Returns:
+            float: 推定値
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """内部状態を破棄します"""
+        self.value = None
+
+
+class RunningMedian(StreamFilter):
+    """
+    直近window件の中央値
+
+    下半分を最大ヒープ、上半分を最小ヒープで保持し、
+    ウィンドウから外れた値は遅延削除します。
+    ヒープの奥に残った削除済みの値がウィンドウの2倍を超えたら、
+    ウィンドウからヒープを作り直します（メモリはウィンドウ長に比例します）。
+    """
+
+    def __init__(self, window: int):
+        super().__init__()
+        if window <= 0:
+            raise ValueError("window must be greater than zero")
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self._window: deque = deque()
+        self._low: List[float] = []    # 符号反転した最大ヒープ
+        self._high: List[float] = []   # 最小ヒープ
+        self._low_size = 0
+        self._high_size = 0
+        self._delayed: Dict[float, int] = {}
+        self._delayed_count = 0
+
+    def update(self, sample: float) -> float:
+        self._window.append(sample)
+        if self._low and sample > -self._low[0]:
+            heapq.heappush(self._high, sample)
+            self._high_size += 1
+        else:
+            heapq.heappush(self._low, -sample)
+            self._low_size += 1
+
+        if len(self._window) > self.window:
+            self._remove(self._window.popleft())
+
+        self._balance()
+        if self._delayed_count > 2 * self.window:
+            self._rebuild()
+        if self._low_size > self._high_size:
+            self.value = float(-self._low[0])
+        else:
+            self.value = (-self._low[0] + self._high[0]) / 2.0
+        return self.value
+
+    def _remove(self, old: float) -> None:
+        self._delayed[old] = self._delayed.get(old, 0) + 1
+        self._delayed_count += 1
+        if old <= -self._low[0]:
+            self._low_size -= 1
+            if old == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if self._high and old == self._high[0]:
+                self._prune(self._high, 1)
+
+    def _balance(self) -> None:
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+    def _prune(self, heap: List[float], sign: int) -> None:
+        """ヒープ先頭の削除済み要素を取り除きます"""
+        delayed = self._delayed
+        while heap:
+            top = sign * heap[0]
+            count = delayed.get(top)
+            if not count:
+                break
+            if count == 1:
+                del delayed[top]
+            else:
+                delayed[top] = count - 1
+            self._delayed_count -= 1
+            heapq.heappop(heap)
+
+    def _rebuild(self) -> None:
+        """削除済みの値を捨て、現在のウィンドウからヒープを作り直します"""
+        values = sorted(self._window)
+        split = (len(values) + 1) // 2
+        self._low = [-v for v in reversed(values[:split])]
+        self._high = values[split:]
+        self._low_size = len(self._low)
+        self._high_size = len(self._high)
+        self._delayed = {}
+        self._delayed_count = 0
+
+
+class TrimmedMean(StreamFilter):
+    """
+    直近window件のトリム平均
+
+    ウィンドウをソート済みで保持し、合計値を差分更新します。
+    上下trim件の合計だけを求めるため、更新ごとにウィンドウ全体を走査しません。
+    """
+
+    def __init__(self, window: int, trim_ratio: float = 0.2):
+        super().__init__()
+        if window <= 0:
+            raise ValueError("window must be greater than zero")
+        if not 0.0 <= trim_ratio < 0.5:
+            raise ValueError("trim_ratio must be in [0, 0.5)")
+        self.window = window
+        self.trim_ratio = trim_ratio
+        self.reset()
+
+    def reset(self) -> None:
+        super().reset()
+        self._window: deque = deque()
+        self._sorted: List[float] = []
+        self._total = 0.0
+
+    def update(self, sample: float) -> float:
+        self._window.append(sample)
+        insort(self._sorted, sample)
+        self._total += sample
+        if len(self._window) > self.window:
+            old = self._window.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+            self._total -= old
+
+        count = len(self._sorted)
+        trim = int(count * self.trim_ratio)
+        if trim == 0:
+            self.value = self._total / count
+        else:
+            trimmed = sum(self._sorted[:trim]) + sum(self._sorted[-trim:])
+            self.value = (self._total - trimmed) / (count - 2 * trim)
+        return self.value
+
+
+class ExponentialMovingAverage(StreamFilter):
+    """指数移動平均"""
+
+    def __init__(self, alpha: float):
+        super().__init__()
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+
+    def update(self, sample: float) -> float:
+        if self.value is None:
+            self.value = float(sample)
+        else:
+            self.value += self.alpha * (sample - self.value)
+        return self.value
+
+
+class KalmanFilter1D(StreamFilter):
+    """
+    1次元カルマンフィルタ
+
+    重量をランダムウォーク（プロセス分散 process_variance）とみなし、
+    観測ノイズ分散 measurement_variance のサンプルから推定します。
+    """
+
+    def __init__(self, process_variance: float, measurement_variance: float):
+        super().__init__()
+        if process_variance < 0 or measurement_variance <= 0:
+            raise ValueError("variances must be positive")
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self.error_variance = measurement_variance
+
+    def reset(self) -> None:
+        super().reset()
+        self.error_variance = self.measurement_variance
+
+    def update(self, sample: float) -> float:
+        if self.value is None:
+            self.value = float(sample)
+            self.error_variance = self.measurement_variance
+            return self.value
+        predicted_variance = self.error_variance + self.process_variance
+        gain = predicted_variance / (predicted_variance + self.measurement_variance)
+        self.value += gain * (sample - self.value)
+        self.error_variance = (1.0 - gain) * predicted_variance
+        return self.value
+
+
+class FilterChain(StreamFilter):
+    """複数のフィルタを順に適用するフィルタ"""
+
+    def __init__(self, filters: Sequence[StreamFilter]):
+        super().__init__()
+        self.filters = list(filters)
+
+    def reset(self) -> None:
+        super().reset()
+        for f in self.filters:
+            f.reset()
+
+    def update(self, sample: float) -> float:
+        value = float(sample)
+        for f in self.filters:
+            value = f.update(value)
+        self.value = value
+        return value
+
+
+def build_filter_chain(config) -> Optional[FilterChain]:
+    """
+    センサー設定からフィルタチェーンを構築します。
+
+    Args:
+        config: FILTERS と各フィルタのパラメータを持つ設定（SensorConfig）
+
+    Returns:
+        Optional[FilterChain]: FILTERS が空の場合はNone
+
+    Raises:
+        ValueError: 未知のフィルタ名が指定された場合
+    """
+    filters: List[StreamFilter] = []
+    for name in config.FILTERS:
+        if name == "median":
+            filters.append(RunningMedian(config.MEDIAN_WINDOW))
+        elif name == "trimmed_mean":
+            filters.append(TrimmedMean(config.TRIM_WINDOW, config.TRIM_RATIO))
+        elif name == "ema":
+            filters.append(ExponentialMovingAverage(config.EMA_ALPHA))
+        elif name == "kalman":
+            filters.append(KalmanFilter1D(
+                config.KALMAN_PROCESS_VARIANCE, config.KALMAN_MEASUREMENT_VARIANCE
+            ))
+        else:
+            raise ValueError(f"Unknown filter: {name!r}")
+    if not filters:
+        return None
+    return FilterChain(filters)
@@ -1,10 +1,61 @@
 import RPi.GPIO as GPIO
 import time
 import threading
+from array import array
+
+from .sample_stats import median, trimmed_mean
+
+
+# Bit-reversal lookup for one byte.  Used to decode frames when bit_format is
+# LSB, so no per-bit format checks are needed while clocking.
+_BIT_REVERSE = bytes(int('{:08b}'.format(i)[::-1], 2) for i in range(256))
+
+
+# Frame decoders.  Each takes the 24 data bits in the order they were clocked
+# out (first bit in bit 23) and returns the 24bit twos-complement word for the
+# configured byte/bit format.  Selected once in set_reading_format().
+def _decode_msb_msb(word):
+    return word
+
+
+def _decode_lsb_msb(word):
+    return ((word & 0xff) << 16) | (word & 0xff00) | (word >> 16)
+
+
+def _decode_msb_lsb(word, rev=_BIT_REVERSE):
+    return ((rev[word >> 16] << 16) |
+            (rev[(word >> 8) & 0xff] << 8) |
+            rev[word & 0xff])
+
+
+def _decode_lsb_lsb(word, rev=_BIT_REVERSE):
+    return ((rev[word & 0xff] << 16) |
+            (rev[(word >> 8) & 0xff] << 8) |
+            rev[word >> 16])
+
+
+_FRAME_DECODERS = {
+    ('MSB', 'MSB'): _decode_msb_msb,
+    ('LSB', 'MSB'): _decode_lsb_msb,
+    ('MSB', 'LSB'): _decode_msb_lsb,
+    ('LSB', 'LSB'): _decode_lsb_lsb,
+}
+
+
+# Number of PD_SCK pulses after the 24 data bits that select the channel/gain
+# of the next conversion: 1 = A/128, 2 = B/32, 3 = A/64.
+_PULSES_BY_GAIN = {128: 1, 64: 3, 32: 2}
+_GAIN_BY_PULSES = {1: 128, 2: 32, 3: 64}
+
+
+class HX711TimeoutError(RuntimeError):
+    """Raised when the HX711 does not signal data ready within the timeout."""
+    pass
+
 
 class HX711:
 
-    def __init__(self, dout, pd_sck, gain=128):
+    def __init__(self, dout, pd_sck, gain=128, startup_delay=1.0, read_timeout=None):
         self.PD_SCK = pd_sck
 
         self.DOUT = dout
@@ -12,6 +63,16 @@ class HX711:
         # Mutex for reading from the HX711, in case multiple threads in client
         # software try to access get values from the class at the same time.
         self.readLock = threading.Lock()
+
+        # Edge-triggered acquisition state.  When interrupt mode is enabled a
+        # DOUT falling-edge callback sets this event, so readers can sleep
+        # instead of spinning on is_ready().
+        self.dataReadyEvent = threading.Event()
+        self.interruptMode = False
+
+        # Longest time (seconds) a read may block.  Set before the first
+        # set_gain() below so a dead chip can't hang the constructor.
+        self.readTimeout = read_timeout
         
         GPIO.setmode(GPIO.BCM)
         GPIO.setup(self.PD_SCK, GPIO.OUT)
@@ -19,6 +80,11 @@ class HX711:
 
         self.GAIN = 0
 
+        # Channel/gain of the conversion the HX711 is currently producing, and
+        # of the last frame read.  The chip powers up on channel A, gain 128.
+        self.conversionGain = 128
+        self.lastFrameGain = 128
+
         # The value returned by the hx711 that corresponds to your reference
         # unit AFTER dividing by the SCALE.
         self.REFERENCE_UNIT = 1
@@ -32,11 +98,14 @@ class HX711:
 
         self.byte_format = 'MSB'
         self.bit_format = 'MSB'
+        self.decodeFrame = _decode_msb_msb
 
         self.set_gain(gain)
-        
-        # Think about whether this is necessary.
-        time.sleep(1)
+
+        # set_gain() above already waited for a full conversion, so callers
+        # that need a fast start can pass startup_delay=0.
+        if startup_delay > 0:
+            time.sleep(startup_delay)
 
 
     def convertFromTwosComplement24bit(self, inputValue):
@@ -46,6 +115,74 @@ class HX711:
     def is_ready(self):
         return GPIO.input(self.DOUT) == 0
 
+
+    def enable_interrupt_mode(self, timeout=0.5):
+        # Register a falling-edge callback on DOUT.  The HX711 pulls DOUT low
+        # when a conversion is ready, so readers can block on an Event rather
+        # than busy-polling the pin.  timeout is the longest time (seconds) a
+        # read will wait for data before raising HX711TimeoutError.
+        if self.interruptMode:
+            self.readTimeout = timeout
+            return
+
+        GPIO.add_event_detect(self.DOUT, GPIO.FALLING,
+                              callback=self._dataReadyCallback)
+        self.readTimeout = timeout
+        self.interruptMode = True
+
+
+    def disable_interrupt_mode(self):
+        if not self.interruptMode:
+            return
+
+        GPIO.remove_event_detect(self.DOUT)
+        self.interruptMode = False
+
+
+    def set_read_timeout(self, timeout):
+        # Longest time (seconds) a single read may wait for the read lock and
+        # for data ready, in either polling or interrupt mode.  None waits
+        # forever.
+        self.readTimeout = timeout
+
+
+    def _dataReadyCallback(self, channel):
+        self.dataReadyEvent.set()
+
+
+    def wait_ready(self, timeout=None):
+        # Wait until DOUT goes low.  Returns False if timeout (seconds) expires
+        # first; timeout=None waits forever.
+        if timeout is None:
+            deadline = None
+        else:
+            deadline = time.monotonic() + timeout
+
+        if not self.interruptMode:
+            # Polling path: spin on the pin.
+            while not self.is_ready():
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+            return True
+
+        while not self.is_ready():
+            # Clocking bits out also produces DOUT falling edges, so the event
+            # may be stale.  Clear it, then re-check the pin so an edge that
+            # happened between the check above and clear() is not missed.
+            self.dataReadyEvent.clear()
+            if self.is_ready():
+                break
+
+            if deadline is None:
+                self.dataReadyEvent.wait()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.dataReadyEvent.wait(remaining)
+
+        return True
+
     
     def set_gain(self, gain):
         if gain == 128:
@@ -58,7 +195,7 @@ class HX711:
         GPIO.output(self.PD_SCK, False)
 
         # Read out a set of raw bytes and throw it away.
-        self.readRawBytes()
+        self.readRawFrame()
 
         
     def get_gain(self):
@@ -102,64 +239,129 @@ class HX711:
        return byteValue 
         
 
-    def readRawBytes(self):
+    def readRawFrame(self, gainPulses=None, timeout=None):
+        # gainPulses overrides the number of trailing pulses (and so the
+        # channel/gain of the next conversion) for this frame only.  timeout
+        # overrides readTimeout and bounds both the lock wait and the data
+        # ready wait.
+        if gainPulses is None:
+            gainPulses = self.GAIN
+        if timeout is None:
+            timeout = self.readTimeout
+
         # Wait for and get the Read Lock, in case another thread is already
         # driving the HX711 serial interface.
-        self.readLock.acquire()
-
-        # Wait until HX711 is ready for us to read a sample.
-        while not self.is_ready():
-           pass
-
-        # Read three bytes of data from the HX711.
-        firstByte  = self.readNextByte()
-        secondByte = self.readNextByte()
-        thirdByte  = self.readNextByte()
-
-        # HX711 Channel and gain factor are set by number of bits read
-        # after 24 data bits.
-        for i in range(self.GAIN):
-           # Clock a bit out of the HX711 and throw it away.
-           self.readNextBit()
+        if timeout is None:
+            self.readLock.acquire()
+            remaining = None
+        else:
+            deadline = time.monotonic() + timeout
+            if not self.readLock.acquire(timeout=max(timeout, 0)):
+                raise HX711TimeoutError(
+                    "HX711::readRawFrame(): read lock not acquired within %.3f s" % timeout)
+            remaining = deadline - time.monotonic()
+
+        try:
+            # Wait until HX711 is ready for us to read a sample.  In interrupt
+            # mode this sleeps until the DOUT falling edge.
+            if not self.wait_ready(remaining):
+                raise HX711TimeoutError(
+                    "HX711::readRawFrame(): no data ready within %.3f s" % timeout)
+
+            # Clock out the 24 data bits as one integer, first bit on top.
+            # Locals keep the per-bit cost to two output calls and one input
+            # call, so PD_SCK never stays high long enough (60us) to power
+            # the HX711 down.
+            output = GPIO.output
+            input_ = GPIO.input
+            sck = self.PD_SCK
+            dout = self.DOUT
+            word = 0
+            for _ in range(24):
+                output(sck, True)
+                output(sck, False)
+                word = (word << 1) | input_(dout)
+
+            # HX711 Channel and gain factor are set by number of bits read
+            # after 24 data bits.
+            for _ in range(gainPulses):
+                output(sck, True)
+                output(sck, False)
+
+            self.lastFrameGain = self.conversionGain
+            self.conversionGain = _GAIN_BY_PULSES.get(gainPulses, 128)
+        finally:
+            # Release the Read Lock, now that we've finished driving the HX711
+            # serial interface.
+            self.readLock.release()
+
+        return word
 
-        # Release the Read Lock, now that we've finished driving the HX711
-        # serial interface.
-        self.readLock.release()           
 
+    def readRawBytes(self):
         # Depending on how we're configured, return an ordered list of raw byte
         # values.
-        if self.byte_format == 'LSB':
-           return [thirdByte, secondByte, firstByte]
-        else:
-           return [firstByte, secondByte, thirdByte]
-
+        value = self.decodeFrame(self.readRawFrame())
+        return [value >> 16, (value >> 8) & 0xff, value & 0xff]
 
-    def read_long(self):
-        # Get a sample from the HX711 in the form of raw bytes.
-        dataBytes = self.readRawBytes()
 
-
-        if self.DEBUG_PRINTING:
-            print(dataBytes,)
-        
-        # Join the raw bytes into a single 24bit 2s complement value.
-        twosComplementValue = ((dataBytes[0] << 16) |
-                               (dataBytes[1] << 8)  |
-                               dataBytes[2])
+    def read_long(self, timeout=None):
+        # Get a sample from the HX711 and reorder it for the configured
+        # byte/bit format.
+        twosComplementValue = self.decodeFrame(self.readRawFrame(timeout=timeout))
 
         if self.DEBUG_PRINTING:
             print("Twos: 0x%06x" % twosComplementValue)
-        
+
         # Convert from 24bit twos-complement to a signed value.
-        signedIntValue = self.convertFromTwosComplement24bit(twosComplementValue)
+        signedIntValue = twosComplementValue - ((twosComplementValue & 0x800000) << 1)
 
         # Record the latest sample value we've read.
         self.lastVal = signedIntValue
 
         # Return the sample value we've read from the HX711.
-        return int(signedIntValue)
+        return signedIntValue
 
     
+    def read_long_interleaved(self, next_gain):
+        # Read the conversion the HX711 already has in progress and clock the
+        # trailing pulses for next_gain, so the following conversion comes
+        # from that channel/gain.  Alternating channels this way wastes no
+        # conversion, unlike set_gain() which throws one away.
+        # Returns (gain of the returned sample, signed value).
+        if next_gain not in _PULSES_BY_GAIN:
+            raise ValueError("HX711::read_long_interleaved(): invalid gain %r" % next_gain)
+
+        twosComplementValue = self.decodeFrame(self.readRawFrame(_PULSES_BY_GAIN[next_gain]))
+        signedIntValue = twosComplementValue - ((twosComplementValue & 0x800000) << 1)
+        return self.lastFrameGain, signedIntValue
+
+
+    def read_many(self, times, timeout=None):
+        # Read a batch of samples into a compact array of signed 32bit ints,
+        # rather than growing a Python list one reading at a time.  timeout
+        # is a budget (seconds) for the whole batch; each read gets whatever
+        # is left of it, and HX711TimeoutError is raised once it runs out.
+        if times <= 0:
+            raise ValueError("HX711::read_many(): times must be greater than zero!")
+
+        values = array('i', bytes(4 * times))
+        if timeout is None:
+            for i in range(times):
+                values[i] = self.read_long()
+            return values
+
+        deadline = time.monotonic() + timeout
+        for i in range(times):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HX711TimeoutError(
+                    "HX711::read_many(): %d of %d samples within %.3f s" % (i, times, timeout))
+            values[i] = self.read_long(timeout=remaining)
+
+        return values
+
+
     def read_average(self, times=3):
         # Make sure we've been asked to take a rational amount of samples.
         if times <= 0:
@@ -174,23 +376,9 @@ class HX711:
         if times < 5:
             return self.read_median(times)
 
-        # If we're taking a lot of samples, we'll collect them in a list, remove
-        # the outliers, then take the mean of the remaining set.
-        valueList = []
-
-        for x in range(times):
-            valueList += [self.read_long()]
-
-        valueList.sort()
-
-        # We'll be trimming 20% of outlier samples from top and bottom of collected set.
-        trimAmount = int(len(valueList) * 0.2)
-
-        # Trim the edge case values.
-        valueList = valueList[trimAmount:-trimAmount]
-
-        # Return the mean of remaining samples.
-        return sum(valueList) / len(valueList)
+        # If we're taking a lot of samples, remove the outliers (20% from top
+        # and bottom of collected set), then take the mean of the remaining set.
+        return trimmed_mean(self.read_many(times), 0.2)
 
 
     # A median-based read method, might help when getting random value spikes
@@ -203,21 +391,8 @@ class HX711:
        if times == 1:
           return self.read_long()
 
-       valueList = []
-
-       for x in range(times):
-          valueList += [self.read_long()]
-
-       valueList.sort()
-
-       # If times is odd we can just take the centre value.
-       if (times & 0x1) == 0x1:
-          return valueList[len(valueList) // 2]
-       else:
-          # If times is even we have to take the arithmetic mean of
-          # the two middle values.
-          midpoint = len(valueList) / 2
-          return sum(valueList[midpoint:midpoint+2]) / 2.0
+       # For an even count this is the arithmetic mean of the two middle values.
+       return median(self.read_many(times))
 
 
     # Compatibility function, uses channel A version
@@ -314,6 +489,9 @@ class HX711:
         else:
             raise ValueError("Unrecognised bitformat: \"%s\"" % bit_format)
 
+        # Pick the frame decoder once, rather than checking formats per bit.
+        self.decodeFrame = _FRAME_DECODERS[(self.byte_format, self.bit_format)]
+
             
     # sets offset for channel A for compatibility reasons
     def set_offset(self, offset):
@@ -395,6 +573,7 @@ class HX711:
 
         # Lower the HX711 Digital Serial Clock (PD_SCK) line.
         GPIO.output(self.PD_SCK, False)
+        self.conversionGain = 128
 
         # Wait 100 us for the HX711 to power back up.
         time.sleep(0.0001)
@@ -408,7 +587,7 @@ class HX711:
         # throw it away, so that next sample from the HX711 will be from the
         # correct channel/gain.
         if self.get_gain() != 128:
-            self.readRawBytes()
+            self.readRawFrame()
 
 
     def reset(self):
@@ -416,7 +595,7 @@ class HX711:
         self.power_up()
 
 def hx711_add_event_detect(hx711_instance, event_callback):
-        GPIO.add_event_detect(self.DOUT, GPIO.FALLING, 
-            callback=event_callback)
+    GPIO.add_event_detect(hx711_instance.DOUT, GPIO.FALLING,
+                          callback=event_callback)
 
 # EOF - hx711.py
@@ -0,0 +1,160 @@
+"""
+サーボの角度軌道（モーションプロファイル）
+
+開始角度から目標角度までの角度を、動作開始からの時刻の関数として事前に計算します。
+再生側（controllers/motion_engine.py）は計算済みの点を時刻どおりに出力するだけです。
+
+    - trapezoidal: 加速・等速・減速の台形速度
+    - s_curve: 最小躍度の5次多項式。始点・終点で速度と加速度が0になるS字の軌道
+"""
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class MotionProfile:
+    """
+    時刻と角度の列
+
+    times は動作開始からの時刻（秒、昇順）、angles はその時刻に出力する角度（度）です。
+    """
+    times: array
+    angles: array
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def duration(self) -> float:
+        """動作にかかる時間（秒）"""
+        return self.times[-1] if len(self.times) else 0.0
+
+    @property
+    def end_angle(self) -> float:
+        """最後の角度"""
+        return self.angles[-1]
+
+    def quantize(self, step_deg: float = 1.0) -> "MotionProfile":
+        """
+        角度を step_deg の格子に丸め、角度が変わる点だけを残します。
+
+        格子の角度は、軌道がその角度に達した時点で出力します（開始側へ丸める）。
+        ゆっくりした動作では出力回数が減り、点の間でサーボへの電力供給を止められます。
+
+        Args:
+            step_deg: 角度の刻み（度）
+
+        Returns:
+            MotionProfile: 丸めた軌道
+        """
+        times = array('d')
+        angles = array('d')
+        if not len(self.angles):
+            return MotionProfile(times, angles)
+        # 浮動小数点の誤差で格子の手前に留まらないよう、わずかに進めて丸める
+        if self.angles[-1] >= self.angles[0]:
+            snap = lambda x: math.floor(x / step_deg + 1e-9) * step_deg
+        else:
+            snap = lambda x: math.ceil(x / step_deg - 1e-9) * step_deg
+        for t, angle in zip(self.times, self.angles):
+            snapped = snap(angle)
+            if not angles or snapped != angles[-1]:
+                times.append(t)
+                angles.append(snapped)
+        return MotionProfile(times, angles)
+
+
+def hold(angle: float) -> MotionProfile:
+    """
+    指定した角度へすぐに移動する軌道（1点のみ）
+
+    Args:
+        angle: 角度（度）
+    """
+    return MotionProfile(array('d', [0.0]), array('d', [angle]))
+
+
+def _sample(
+    start: float,
+    end: float,
+    duration_s: float,
+    rate_hz: float,
+    shape: Callable[[float], float]
+) -> MotionProfile:
+    """正規化した形状関数 shape(0..1) -> 0..1 を rate_hz で標本化します"""
+    if duration_s <= 0:
+        return hold(end)
+    steps = max(1, math.ceil(duration_s * rate_hz))
+    times = array('d')
+    angles = array('d')
+    distance = end - start
+    for i in range(steps + 1):
+        tau = i / steps
+        times.append(duration_s * tau)
+        angles.append(start + distance * shape(tau))
+    return MotionProfile(times, angles)
+
+
+def trapezoidal(
+    start: float,
+    end: float,
+    duration_s: float,
+    accel_fraction: float = 0.25,
+    rate_hz: float = 50.0
+) -> MotionProfile:
+    """
+    台形速度の軌道を計算します。
+
+    Args:
+        start: 開始角度（度）
+        end: 目標角度（度）
+        duration_s: 動作時間（秒）
+        accel_fraction: 加速（と減速）にかける時間の割合（0〜0.5、0で等速）
+        rate_hz: 標本化の周波数（Hz）
+
+    Returns:
+        MotionProfile: 軌道
+    """
+    if not 0.0 <= accel_fraction <= 0.5:
+        raise ValueError("accel_fraction must be between 0 and 0.5")
+    f = accel_fraction
+    if f == 0.0:
+        return _sample(start, end, duration_s, rate_hz, lambda tau: tau)
+    # 最高速度（正規化）。加速・減速で進む分を等速区間で補う
+    v = 1.0 / (1.0 - f)
+
+    def shape(tau: float) -> float:
+        if tau < f:
+            return 0.5 * v / f * tau * tau
+        if tau <= 1.0 - f:
+            return v * (tau - f / 2)
+        rest = 1.0 - tau
+        return 1.0 - 0.5 * v / f * rest * rest
+
+    return _sample(start, end, duration_s, rate_hz, shape)
+
+
+def s_curve(
+    start: float,
+    end: float,
+    duration_s: float,
+    rate_hz: float = 50.0
+) -> MotionProfile:
+    """
+    S字（最小躍度）の軌道を計算します。
+
+    Args:
+        start: 開始角度（度）
+        end: 目標角度（度）
+        duration_s: 動作時間（秒）
+        rate_hz: 標本化の周波数（Hz）
+
+    Returns:
+        MotionProfile: 軌道
+    """
+    return _sample(
+        start, end, duration_s, rate_hz,
+        lambda tau: tau * tau * tau * (10.0 + tau * (-15.0 + 6.0 * tau))
+    )
@@ -0,0 +1,112 @@
+"""
+固定長リングバッファ
+
+タイムスタンプ付きのHX711生値を配列ベースで保持します。
+書き込みはO(1)、最新n件の取得はO(n)で、要素ごとのオブジェクト生成を行いません。
+"""
+import threading
+from array import array
+from typing import Optional, Tuple
+
+
+class SampleRingBuffer:
+    """
+    タイムスタンプ（float）と生値（符号付き32bit整数）を保持するリングバッファ
+
+    容量を超えると古いサンプルから上書きされます。
+    1つの書き込みスレッドと複数の読み取りスレッドから安全に使用できます。
+    """
+
+    def __init__(self, capacity: int):
+        """
+        バッファを初期化します。
+
+        Args:
+            capacity: 保持する最大サンプル数
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than zero")
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._values = array('i', bytes(4 * capacity))
+        self._total = 0
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
+
+    @property
+    def total(self) -> int:
+        """これまでに追加されたサンプルの総数（通し番号として使用可能）"""
+        return self._total
+
+    def append(self, timestamp: float, value: int) -> None:
+        """
+        サンプルを追加します。
+
+        Args:
+            timestamp: 取得時刻（time.monotonic()）
+            value: HX711の生値
+        """
+        with self._cond:
+            index = self._total % self.capacity
+            self._timestamps[index] = timestamp
+            self._values[index] = value
+            self._total += 1
+            self._cond.notify_all()
+
+    def clear(self) -> None:
+        """すべてのサンプルを破棄します"""
+        with self._cond:
+            self._total = 0
+
+    def latest(self, n: int) -> array:
+        """
+        最新n件の生値を古い順に返します。
+
+        Args:
+            n: 取得件数（保持数より多い場合は保持数まで）
+
+        Returns:
+            array: 生値の配列（'i'）
+        """
+        with self._cond:
+            return self._slice(self._values, n)
+
+    def latest_with_timestamps(self, n: int) -> Tuple[array, array]:
+        """
+        最新n件のタイムスタンプと生値を古い順に返します。
+
+        Returns:
+            Tuple[array, array]: (タイムスタンプ配列, 生値配列)
+        """
+        with self._cond:
+            return self._slice(self._timestamps, n), self._slice(self._values, n)
+
+    def last_timestamp(self) -> Optional[float]:
+        """最新サンプルのタイムスタンプ。空の場合はNone"""
+        with self._cond:
+            if self._total == 0:
+                return None
+            return self._timestamps[(self._total - 1) % self.capacity]
+
+    def wait_for_total(self, total: int, timeout: Optional[float] = None) -> bool:
+        """
+        サンプル総数が指定値以上になるまで待機します。
+
+        Args:
+            total: 待機する総数
+            timeout: タイムアウト（秒）
+
+        Returns:
+            bool: 条件を満たした場合True
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._total >= total, timeout)
+
+    def _slice(self, data: array, n: int) -> array:
+        count = min(n, self._total, self.capacity)
+        end = self._total % self.capacity
+        if count <= end:
+            return data[end - count:end]
+        return data[self.capacity - (count - end):] + data[:end]
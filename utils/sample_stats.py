@@ -0,0 +1,94 @@
+"""
+HX711サンプルのバッチ統計処理
+
+read_many() が返す array('i') などの生値の並びをまとめて処理します。
+ソートや合計は組み込み関数（C実装）で行い、要素ごとのPython処理を避けます。
+中央値・平均はオフセットと参照単位の一次変換と可換なので、
+生値のまま集約してから最後に1回だけグラムへ変換します。
+"""
+from typing import Sequence
+
+
+def median(values: Sequence[int]) -> float:
+    """
+    中央値を返します。
+
+    Args:
+        values: 生値の並び（1件以上）
+
+    Returns:
+        float: 中央値。偶数件の場合は中央2値の平均
+
+    Raises:
+        ValueError: 空の場合
+    """
+    count = len(values)
+    if count == 0:
+        raise ValueError("median(): values must not be empty")
+    ordered = sorted(values)
+    mid = count // 2
+    if count & 1:
+        return float(ordered[mid])
+    return (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+def trimmed_mean(values: Sequence[int], trim_ratio: float = 0.2) -> float:
+    """
+    上下の外れ値を除いた平均（トリム平均）を返します。
+
+    Args:
+        values: 生値の並び（1件以上）
+        trim_ratio: 上下それぞれから除外する割合（0以上0.5未満）
+
+    Returns:
+        float: トリム平均
+
+    Raises:
+        ValueError: 空の場合、またはtrim_ratioが範囲外の場合
+    """
+    count = len(values)
+    if count == 0:
+        raise ValueError("trimmed_mean(): values must not be empty")
+    if not 0.0 <= trim_ratio < 0.5:
+        raise ValueError("trimmed_mean(): trim_ratio must be in [0, 0.5)")
+    trim = int(count * trim_ratio)
+    if trim == 0:
+        return sum(values) / count
+    ordered = sorted(values)
+    kept = ordered[trim:count - trim]
+    return sum(kept) / len(kept)
+
+
+def to_weight(raw: float, offset: float, reference_unit: float) -> float:
+    """
+    生値（または集約済みの値）をグラムに変換します。
+
+    Args:
+        raw: 生値
+        offset: 風袋引きのオフセット
+        reference_unit: 1gあたりの値
+
+    Returns:
+        float: 重量（グラム）
+    """
+    return (raw - offset) / reference_unit
+
+
+def to_weights(values: Sequence[int], offset: float, reference_unit: float):
+    """
+    生値の並びをまとめてグラムに変換します。
+
+    NumPy で配列全体を一度に変換します（要素ごとのPython処理はありません）。
+    重量の読み取りは生値のまま集約してから to_weight() で1回だけ変換するため、
+    この関数は記録した生値の列（RawChunk.weights()）をまとめて変換する場合に使います。
+
+    Args:
+        values: 生値の並び（array('i') などバッファプロトコルに対応した配列も可）
+        offset: 風袋引きのオフセット
+        reference_unit: 1gあたりの値
+
+    Returns:
+        numpy.ndarray: 重量（グラム）の配列（float64）
+    """
+    import numpy as np
+    return (np.asarray(values, dtype=np.float64) - offset) / reference_unit
@@ -0,0 +1,166 @@
+"""
+起動時間の計測モジュール
+
+`python -X importtime` と同様にモジュールごとのインポート時間を記録し、
+初期化フェーズごとの所要時間とあわせてレポートします。
+
+使い方:
+    profiler = StartupProfiler()
+    profiler.track_imports()           # 以降のインポート時間を記録
+    with profiler.phase("センサー初期化"):
+        ...
+    profiler.stop_tracking_imports()
+    print(profiler.report())
+"""
+import importlib.abc
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """元のローダーに処理を委譲し、モジュールの実行時間を記録するローダー"""
+
+    def __init__(self, loader, profiler: "StartupProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        # 拡張モジュールはここで読み込まれる
+        with self._profiler._timing(self._name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        try:
+            with self._profiler._timing(self._name):
+                self._loader.exec_module(module)
+        finally:
+            # 後からローダーを参照するコード（importlib.resources等）のために元へ戻す
+            module.__loader__ = self._loader
+            if getattr(module, '__spec__', None) is not None:
+                module.__spec__.loader = self._loader
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """他のファインダーで見つけたモジュールのローダーを _TimedLoader で包むファインダー"""
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, self._profiler, fullname)
+        return spec
+
+
+class StartupProfiler:
+    """
+    起動時のインポート時間と初期化フェーズの所要時間を記録するクラス
+
+    複数スレッドから同時に使用できます。
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._finder: Optional[_TimingFinder] = None
+        # モジュール名 -> (自身の時間, 累積時間)
+        self._imports: Dict[str, Tuple[float, float]] = {}
+        # (フェーズ名, 開始時刻, 所要時間, スレッド名)
+        self._phases: List[Tuple[str, float, float, str]] = []
+
+    def track_imports(self) -> None:
+        """これ以降のインポート時間の記録を開始します"""
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def stop_tracking_imports(self) -> None:
+        """インポート時間の記録を終了します"""
+        if self._finder is not None:
+            if self._finder in sys.meta_path:
+                sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        with文で囲んだ区間の所要時間を記録します。
+
+        Args:
+            name: フェーズ名
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._phases.append(
+                    (name, start - self._start, elapsed, threading.current_thread().name)
+                )
+
+    @contextmanager
+    def _timing(self, name: str) -> Iterator[None]:
+        """インポート1件の自身の時間と累積時間を記録します（ネストに対応）"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cumulative = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            with self._lock:
+                self_time, total = self._imports.get(name, (0.0, 0.0))
+                self._imports[name] = (self_time + cumulative - children, total + cumulative)
+
+    def elapsed(self) -> float:
+        """計測開始からの経過時間（秒）"""
+        return time.perf_counter() - self._start
+
+    def report(self, top: int = 15) -> str:
+        """
+        計測結果のレポートを作成します。
+
+        Args:
+            top: 表示するインポートの件数（累積時間の長い順）
+
+        Returns:
+            str: レポート文字列
+        """
+        lines = [f"=== 起動時間レポート（合計 {self.elapsed() * 1000:.1f} ms）==="]
+        with self._lock:
+            phases = sorted(self._phases, key=lambda p: p[1])
+            imports = sorted(self._imports.items(), key=lambda item: item[1][1], reverse=True)
+
+        if phases:
+            lines.append("フェーズ          開始(ms)  所要(ms)  スレッド")
+            for name, start, elapsed, thread in phases:
+                lines.append(f"  {name:<14} {start * 1000:8.1f}  {elapsed * 1000:8.1f}  {thread}")
+
+        if imports:
+            lines.append(f"インポート（累積時間の上位{top}件）  自身(ms)  累積(ms)")
+            for name, (self_time, total) in imports[:top]:
+                lines.append(f"  {name:<30} {self_time * 1000:8.1f}  {total * 1000:8.1f}")
+        return "\n".join(lines)